@@ -0,0 +1,12 @@
+import os
+
+# Кэш счётчиков фильтров и ответов автодополнения админки (movies/filters.py, movies/views.py) должен быть
+# общим для всех процессов: сигналы сбрасывают его только в процессе, где изменились данные, а load_data.py -
+# в таблице CACHE_LOCATION. По умолчанию - таблица в PostgreSQL (python manage.py createcachetable);
+# для Redis: CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, CACHE_LOCATION=redis://host:6379/0
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'django_cache'),
+    }
+}
@@ -11,6 +11,9 @@ DATABASES = {
         'OPTIONS': {
             # Нужно явно указать схемы, с которыми будет работать приложение.
             'options': '-c search_path=public,content'
-        }
+        },
+        # Миграции рассчитаны на схему из schema_design/movies_database.ddl и не воспроизводят её с нуля:
+        # тестовая база создаётся по моделям
+        'TEST': {'MIGRATE': False},
     }
 }
\ No newline at end of file
@@ -6,7 +6,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 include('components/database.py', 'components/installed_apps.py', 'components/middleware.py',
-        'components/allowed_hosts.py', 'components/templates.py', 'components/auth_password_validators.py')
+        'components/allowed_hosts.py', 'components/templates.py', 'components/auth_password_validators.py',
+        'components/caches.py')
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
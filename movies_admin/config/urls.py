@@ -17,6 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from movies.views import CachedAutocompleteJsonView
+
 urlpatterns = [
+    # Перекрывает стандартный admin/autocomplete/: виджеты админки находят его по тому же адресу
+    path('admin/autocomplete/', admin.site.admin_view(CachedAutocompleteJsonView.as_view(admin_site=admin.site))),
     path('admin/', admin.site.urls),
 ]
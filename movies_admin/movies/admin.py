@@ -1,5 +1,13 @@
+import re
+from functools import lru_cache
 from django.contrib import admin
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField, TrigramWordSimilarity
+from django.db import connection, connections
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.expressions import RawSQL
+from .filters import CreationDateFilter, GenreFilter, RatingFilter, TypeFilter
 from .models import Genre, Filmwork, GenreFilmwork, Person, PersonFilmwork
+from .pagination import EstimatedCountPaginator, KeysetChangeList
 
 
 class GenreFilmworkInline(admin.TabularInline):
@@ -8,25 +16,28 @@ class GenreFilmworkInline(admin.TabularInline):
 
 class PersonFilmworkInline(admin.TabularInline):
     model = PersonFilmwork
-    autocomplete_fields = ('person_id', 'role')
+    autocomplete_fields = ('person_id',)
 
 
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
-    list_display = ('genre_name', 'description')
-    list_filter = ('genre_name', 'description')
+    list_display = ('name', 'description')
 
 
 @admin.register(Filmwork)
 class FilmworkAdmin(admin.ModelAdmin):
+    # Без точного COUNT(*) и OFFSET на больших таблицах, см. pagination.py
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-created_at', '-id')
     inlines = (GenreFilmworkInline, PersonFilmworkInline)
     search_fields = ('title', 'description')
     list_display = ('title', 'get_genres', 'creation_date', 'rating')
-    list_filter = ('title', 'short_description', 'creation_date', 'rating')
-
-    def short_description(self, obj):
-        return (obj.description[:50] + "...") if len(obj.description) > 50 else obj.description
+    # Фильтры с фиксированными значениями и кэшированными счётчиками, см. filters.py
+    list_filter = (GenreFilter, TypeFilter, RatingFilter, CreationDateFilter)
 
+    # Жанры читаются из живых данных одним запросом на страницу: content.film_work_summary обновляется
+    # после загрузок и по расписанию и не видит правок, сделанных в админке
     list_prefetch_related = ('genres',)
 
     def get_queryset(self, request):
@@ -37,13 +48,77 @@ class FilmworkAdmin(admin.ModelAdmin):
         )
         return queryset
 
+    search_help_text = 'Поиск по названию и описанию (русский и английский)'
+
+    def get_search_results(self, request, queryset, search_term):
+        # Полнотекстовый поиск по столбцу search_vector (GIN-индекс) вместо UPPER(...) LIKE '%...%'
+        # по title и description; лучшие совпадения - первыми. Столбец генерирует PostgreSQL,
+        # поэтому в модели его нет. Каждое слово ищется как префикс ('матр' находит 'Матрица').
+        words = re.findall(r'[^\W_]+', search_term)
+        if not words:
+            return queryset, False
+        prefixes = ' & '.join(f'{word}:*' for word in words)
+        search_vector = RawSQL(
+            f'{connection.ops.quote_name(Filmwork._meta.db_table)}.search_vector', [], output_field=SearchVectorField()
+        )
+        query = (SearchQuery(prefixes, config='russian', search_type='raw')
+                 | SearchQuery(prefixes, config='english', search_type='raw'))
+        queryset = (
+            queryset
+            .alias(search_vector=search_vector)
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(search_vector, query))
+            .order_by('-search_rank')
+        )
+        return queryset, False
+
     def get_genres(self, obj):
         return ','.join((genre.name for genre in obj.genres.all()))
 
     get_genres.short_description = 'Жанры фильма'
 
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+@lru_cache(maxsize=None)
+def trigram_search_available(alias):
+    """Установлено ли расширение pg_trgm в базе alias (см. миграцию 0007); проверяется один раз на процесс."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        return cursor.fetchone()[0]
+
+
 @admin.register(Person)
 class PersonAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-created_at', '-id')
     list_display = ('full_name',)
-    list_filter = ('full_name',)
     search_fields = ('full_name',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по триграммному индексу (оператор %> из pg_trgm) вместо UPPER(full_name) LIKE '%...%':
+        # сначала имена, начинающиеся с введённого текста, затем по убыванию сходства
+        # Без pg_trgm на сервере - обычный поиск ILIKE по search_fields
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if not trigram_search_available(queryset.db):
+            return super().get_search_results(request, queryset, search_term)
+        queryset = (
+            queryset
+            .filter(full_name__trigram_word_similar=search_term)
+            .annotate(
+                prefix_match=Case(
+                    When(full_name__istartswith=search_term, then=Value(0)),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                ),
+                similarity=TrigramWordSimilarity(search_term, 'full_name'),
+            )
+            .order_by('prefix_match', '-similarity', 'full_name')
+        )
+        return queryset, False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
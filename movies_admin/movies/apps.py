@@ -5,3 +5,7 @@ class MoviesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'movies'
     verbose_name = _('movies')
+
+    def ready(self):
+        # Сброс кэша счётчиков фильтров админки при изменении фильмов и жанров
+        from . import signals  # noqa: F401
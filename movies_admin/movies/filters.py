@@ -0,0 +1,137 @@
+import datetime
+
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+
+from .models import Filmwork, Genre
+
+# Ключ и время жизни (секунды) кэша счётчиков фильтров FilmworkAdmin.
+# Кэш сбрасывается сигналами (movies/signals.py) при изменениях через Django, а после загрузки
+# sqlite_to_postgres/load_data.py удаляет из таблицы кэша ключи admin-* (см. admin_cache.py).
+# Время жизни ограничивает устаревание, если кэш хранится не в таблице PostgreSQL
+FACETS_CACHE_KEY = 'admin-facets:filmwork'
+FACETS_CACHE_TTL = 10 * 60
+
+RATING_BUCKETS = {
+    'low': ('ниже 5', Q(rating__lt=5)),
+    'mid': ('от 5 до 7', Q(rating__gte=5, rating__lt=7)),
+    'good': ('от 7 до 8.5', Q(rating__gte=7, rating__lt=8.5)),
+    'top': ('8.5 и выше', Q(rating__gte=8.5)),
+    'none': ('без рейтинга', Q(rating__isnull=True)),
+}
+
+CREATION_DATE_RANGES = {
+    'before-1980': ('до 1980', Q(creation_date__lt=datetime.date(1980, 1, 1))),
+    '1980-1999': ('1980–1999', Q(creation_date__gte=datetime.date(1980, 1, 1),
+                                 creation_date__lt=datetime.date(2000, 1, 1))),
+    '2000-2009': ('2000–2009', Q(creation_date__gte=datetime.date(2000, 1, 1),
+                                 creation_date__lt=datetime.date(2010, 1, 1))),
+    'since-2010': ('с 2010', Q(creation_date__gte=datetime.date(2010, 1, 1))),
+    'none': ('без даты', Q(creation_date__isnull=True)),
+}
+
+TYPES = {value: (label, Q(type=value)) for value, label in Filmwork.ContentType.choices}
+
+
+def filmwork_facets(request=None):
+    """
+    Счётчики фильмов для фильтров FilmworkAdmin, из кэша или из базы.
+
+    Корзины рейтинга, диапазоны дат и типы считаются одним запросом с условной агрегацией
+    (COUNT(*) FILTER (WHERE ...)), жанры - одним запросом с GROUP BY. Число запросов не зависит
+    ни от числа фильмов, ни от числа значений в фильтрах.
+
+    :param request: Запрос страницы: все фильтры страницы читают кэш (общий, в базе) один раз.
+    :return: Словарь {'rating': {...}, 'creation_date': {...}, 'type': {...}, 'genre': [...]}.
+    """
+    facets = getattr(request, '_filmwork_facets', None)
+    if facets is None:
+        facets = cache.get(FACETS_CACHE_KEY)
+    if facets is None:
+        facets = _count_filmwork_facets()
+        cache.set(FACETS_CACHE_KEY, facets, FACETS_CACHE_TTL)
+    if request is not None:
+        request._filmwork_facets = facets
+    return facets
+
+
+def _count_filmwork_facets():
+    """Считает счётчики filmwork_facets() по базе."""
+
+    groups = {'rating': RATING_BUCKETS, 'creation_date': CREATION_DATE_RANGES, 'type': TYPES}
+    aggregates = {
+        f'{group}_{index}': Count('pk', filter=condition)
+        for group, buckets in groups.items()
+        for index, (label, condition) in enumerate(buckets.values())
+    }
+    counts = Filmwork.objects.aggregate(**aggregates)
+    facets = {
+        group: {key: counts[f'{group}_{index}'] for index, key in enumerate(buckets)}
+        for group, buckets in groups.items()
+    }
+    facets['genre'] = list(
+        Genre.objects.annotate(films=Count('filmwork')).order_by('name').values_list('pk', 'name', 'films')
+    )
+    return facets
+
+
+def invalidate_filmwork_facets():
+    """Сбрасывает кэш счётчиков фильтров FilmworkAdmin."""
+    cache.delete(FACETS_CACHE_KEY)
+
+
+class BucketFacetFilter(admin.SimpleListFilter):
+    """
+    Фильтр по заранее заданным корзинам: {значение параметра: (подпись, условие Q)}.
+
+    В отличие от фильтра по полю, не выполняет SELECT DISTINCT по столбцу: значения фиксированы,
+    а число фильмов в каждой корзине берётся из filmwork_facets().
+    """
+
+    buckets = {}
+
+    def lookups(self, request, model_admin):
+        counts = filmwork_facets(request)[self.parameter_name]
+        return [(key, f'{label} ({counts[key]})') for key, (label, condition) in self.buckets.items()]
+
+    def queryset(self, request, queryset):
+        if self.value() in self.buckets:
+            return queryset.filter(self.buckets[self.value()][1])
+        return queryset
+
+
+class RatingFilter(BucketFacetFilter):
+    title = 'рейтинг'
+    parameter_name = 'rating'
+    buckets = RATING_BUCKETS
+
+
+class CreationDateFilter(BucketFacetFilter):
+    title = 'дата выхода'
+    parameter_name = 'creation_date'
+    buckets = CREATION_DATE_RANGES
+
+
+class TypeFilter(BucketFacetFilter):
+    title = 'тип'
+    parameter_name = 'type'
+    buckets = TYPES
+
+
+class GenreFilter(admin.SimpleListFilter):
+    title = 'жанр'
+    parameter_name = 'genre'
+
+    def lookups(self, request, model_admin):
+        return [(str(pk), f'{name} ({films})') for pk, name, films in filmwork_facets(request)['genre']]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            try:
+                return queryset.filter(genres=self.value())
+            except ValidationError as e:
+                raise IncorrectLookupParameters(e)
+        return queryset
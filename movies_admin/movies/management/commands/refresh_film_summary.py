@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from movies.models import FilmworkSummary
+
+
+class Command(BaseCommand):
+    help = 'Обновляет материализованное представление content.film_work_summary (для запуска по расписанию)'
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT ispopulated FROM pg_matviews WHERE schemaname = 'content' AND matviewname = 'film_work_summary'"
+            )
+            row = cursor.fetchone()
+            if row is None:
+                raise CommandError('content.film_work_summary does not exist, apply the migrations first')
+            # CONCURRENTLY не блокирует чтение, но требует уже заполненного представления
+            concurrently = 'CONCURRENTLY ' if row[0] else ''
+            view = connection.ops.quote_name(FilmworkSummary._meta.db_table)
+            cursor.execute(f'REFRESH MATERIALIZED VIEW {concurrently}{view}')
+        self.stdout.write(self.style.SUCCESS('content.film_work_summary refreshed'))
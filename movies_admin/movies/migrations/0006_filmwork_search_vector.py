@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_filmwork_type'),
+    ]
+
+    # Столбец вычисляется PostgreSQL (GENERATED ALWAYS ... STORED) и в модели не описан,
+    # см. FilmworkAdmin.get_search_results и schema_design/movies_database.ddl
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE content.film_work ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+                    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                    setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+                    setweight(to_tsvector('english', coalesce(description, '')), 'B')
+                ) STORED;
+                CREATE INDEX IF NOT EXISTS idx_film_work_search_vector ON content.film_work USING GIN (search_vector);
+            """,
+            reverse_sql="""
+                DROP INDEX IF EXISTS content.idx_film_work_search_vector;
+                ALTER TABLE content.film_work DROP COLUMN IF EXISTS search_vector;
+            """,
+        ),
+    ]
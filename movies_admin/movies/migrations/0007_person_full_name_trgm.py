@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_filmwork_search_vector'),
+    ]
+
+    # Индекс для PersonAdmin.get_search_results (операторы %> и ILIKE), см. schema_design/movies_database.ddl.
+    # Без pg_trgm на сервере (или без прав на CREATE EXTENSION) миграция проходит без индекса,
+    # а PersonAdmin ищет обычным ILIKE
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                DO $$
+                BEGIN
+                    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+                        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                        CREATE INDEX IF NOT EXISTS idx_person_full_name_trgm ON content.person
+                            USING GIN (full_name gin_trgm_ops);
+                    ELSE
+                        RAISE NOTICE 'pg_trgm is not available, idx_person_full_name_trgm is not created';
+                    END IF;
+                EXCEPTION WHEN insufficient_privilege THEN
+                    RAISE NOTICE 'no privilege to create pg_trgm, idx_person_full_name_trgm is not created';
+                END $$;
+            """,
+            reverse_sql="DROP INDEX IF EXISTS content.idx_person_full_name_trgm;",
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_person_full_name_trgm'),
+    ]
+
+    # Индексы для постраничного перехода по ключу (created_at, id) в админке, см. movies/pagination.py
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS idx_film_work_created_at_id ON content.film_work (created_at, id);",
+            reverse_sql="DROP INDEX IF EXISTS content.idx_film_work_created_at_id;",
+        ),
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS idx_person_created_at_id ON content.person (created_at, id);",
+            reverse_sql="DROP INDEX IF EXISTS content.idx_person_created_at_id;",
+        ),
+    ]
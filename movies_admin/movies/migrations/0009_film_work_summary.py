@@ -0,0 +1,57 @@
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0008_created_at_id_indexes'),
+    ]
+
+    # Материализованное представление создаётся SQL (см. schema_design/movies_database.ddl),
+    # модель FilmworkSummary только читает его (managed = False)
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                CREATE MATERIALIZED VIEW IF NOT EXISTS content.film_work_summary AS
+                SELECT fw.id, fw.title, fw.description, fw.creation_date, fw.rating, fw.type, fw.created_at, fw.updated_at,
+                       coalesce(g.genres, '{}') AS genres,
+                       coalesce(p.actors, '{}') AS actors,
+                       coalesce(p.directors, '{}') AS directors,
+                       coalesce(p.writers, '{}') AS writers
+                FROM content.film_work fw
+                LEFT JOIN (
+                    SELECT gfw.film_work_id, array_agg(g.name ORDER BY g.name) AS genres
+                    FROM content.genre_film_work gfw
+                    JOIN content.genre g ON g.id = gfw.genre_id
+                    GROUP BY gfw.film_work_id
+                ) g ON g.film_work_id = fw.id
+                LEFT JOIN (
+                    SELECT pfw.film_work_id,
+                           array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role = 'actor') AS actors,
+                           array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role = 'director') AS directors,
+                           array_agg(p.full_name ORDER BY p.full_name) FILTER (WHERE pfw.role = 'writer') AS writers
+                    FROM content.person_film_work pfw
+                    JOIN content.person p ON p.id = pfw.person_id
+                    GROUP BY pfw.film_work_id
+                ) p ON p.film_work_id = fw.id;
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_film_work_summary_id ON content.film_work_summary (id);
+            """,
+            reverse_sql="DROP MATERIALIZED VIEW IF EXISTS content.film_work_summary;",
+        ),
+        migrations.CreateModel(
+            name='FilmworkSummary',
+            fields=[
+                ('film_work', models.OneToOneField(db_column='id', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='summary', serialize=False, to='movies.filmwork')),
+                ('genres', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+                ('actors', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+                ('directors', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+                ('writers', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+            ],
+            options={
+                'db_table': 'content"."film_work_summary',
+                'managed': False,
+            },
+        ),
+    ]
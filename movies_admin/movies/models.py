@@ -1,4 +1,5 @@
 import uuid
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
@@ -28,7 +29,7 @@ class Genre(UUIDMixin, TimeStampedMixin):
         verbose_name_plural = _('genres')
 
     def __str__(self):
-        return self.genre_name
+        return self.name
 
 
 class Filmwork(UUIDMixin, TimeStampedMixin):
@@ -55,14 +56,14 @@ class Filmwork(UUIDMixin, TimeStampedMixin):
 
 
 class GenreFilmwork(UUIDMixin):
-    film_work_id = models.ForeignKey(Filmwork, on_delete=models.CASCADE)
-    genre_id = models.ForeignKey(Genre, on_delete=models.CASCADE)
+    film_work_id = models.ForeignKey(Filmwork, on_delete=models.CASCADE, db_column='film_work_id')
+    genre_id = models.ForeignKey(Genre, on_delete=models.CASCADE, db_column='genre_id')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "content\".\"genre_film_work"
         constraints = [
-            UniqueConstraint(fields=['film_work_id', 'genre_id'], name='unique_genre_film_work')]
+            models.UniqueConstraint(fields=['film_work_id', 'genre_id'], name='unique_genre_film_work')]
 
 class Person(UUIDMixin, TimeStampedMixin):
     full_name = models.CharField('full_name', max_length=255)
@@ -82,10 +83,24 @@ class PersonFilmwork(UUIDMixin):
         DIRECTOR = 'director', _('director')
         WRITER = 'writer', _('writer')
 
-    film_work_id = models.ForeignKey(Filmwork, on_delete=models.CASCADE)
-    person_id = models.ForeignKey(Person, on_delete=models.CASCADE)
+    film_work_id = models.ForeignKey(Filmwork, on_delete=models.CASCADE, db_column='film_work_id')
+    person_id = models.ForeignKey(Person, on_delete=models.CASCADE, db_column='person_id')
     role = models.TextField('role', choices=RoleChoices.choices, default=RoleChoices.ACTOR)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "content\".\"person_film_work"
+
+
+class FilmworkSummary(models.Model):
+    """Строка материализованного представления content.film_work_summary (обновляется вне Django)."""
+    film_work = models.OneToOneField(Filmwork, primary_key=True, db_column='id', on_delete=models.DO_NOTHING,
+                                     related_name='summary')
+    genres = ArrayField(models.TextField())
+    actors = ArrayField(models.TextField())
+    directors = ArrayField(models.TextField())
+    writers = ArrayField(models.TextField())
+
+    class Meta:
+        managed = False
+        db_table = "content\".\"film_work_summary"
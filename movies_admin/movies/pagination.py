@@ -0,0 +1,164 @@
+import uuid
+from datetime import datetime
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+
+# Ниже этого числа строк (по оценке планировщика) страница показывает точное число
+ESTIMATE_THRESHOLD = 10_000
+
+# Параметры адреса для постраничного перехода по ключу: позиция последней/первой строки страницы
+KEYSET_AFTER_VAR = 'after'
+KEYSET_BEFORE_VAR = 'before'
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, который не считает строки большой таблицы через SELECT COUNT(*).
+
+    Без фильтров число строк берётся из статистики таблицы (pg_class.reltuples), с фильтрами -
+    из оценки планировщика (EXPLAIN). Если оценка меньше ESTIMATE_THRESHOLD, выполняется обычный
+    точный подсчёт: на маленьких выборках он дешёв, а оценка там заметно ошибается.
+    """
+
+    # True, если count - оценка, а не точное число
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate()
+        if estimate is None or estimate < ESTIMATE_THRESHOLD:
+            return super().count
+        self.count_is_estimate = True
+        return estimate
+
+    def estimate(self):
+        """
+        Оценка числа строк в object_list.
+
+        :return: Оценка или None, если оценить нельзя (не QuerySet, таблица ещё не анализировалась).
+        """
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return None
+        connection = connections[queryset.db]
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                # reltuples обновляют VACUUM и ANALYZE; -1 - таблица ещё не анализировалась
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+                return row[0] if row and row[0] >= 0 else None
+            sql, params = queryset.order_by().values('pk').query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Список объектов админки с переходом «следующая/предыдущая страница» по ключу (created_at, id).
+
+    Вместо OFFSET страница выбирается условием (created_at, id) < (позиция последней строки
+    предыдущей страницы), которое читается по индексу (created_at, id): последняя страница
+    открывается так же быстро, как первая. Режим включается, когда список упорядочен по умолчанию
+    (без сортировки по столбцу), без поиска и без «Показать все»; иначе работает обычная нумерация.
+    """
+
+    keyset_fields = ('created_at', 'id')
+
+    def __init__(self, request, *args, **kwargs):
+        self.keyset_after = request.GET.get(KEYSET_AFTER_VAR)
+        self.keyset_before = request.GET.get(KEYSET_BEFORE_VAR)
+        self.keyset_next_url = None
+        self.keyset_previous_url = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        # Позиция страницы - не фильтр по полям модели
+        lookup_params.pop(KEYSET_AFTER_VAR, None)
+        lookup_params.pop(KEYSET_BEFORE_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Смена фильтра или сортировки начинает список с первой страницы
+        remove = [*(remove or []), KEYSET_AFTER_VAR, KEYSET_BEFORE_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_ordering(self, request, queryset):
+        ordering = super().get_ordering(request, queryset)
+        # ChangeList добавляет порядок, заданный поиском (релевантность, см. get_search_results админки),
+        # после порядка по умолчанию, где он ничего не решает: переносим его в начало.
+        # Сортировка по столбцу его заменяет
+        if self.query and ORDER_VAR not in self.params:
+            search_ordering = list(queryset.query.order_by)
+            return [*search_ordering, *(field for field in ordering if field not in search_ordering)]
+        return ordering
+
+    @property
+    def keyset_active(self):
+        return not (self.query or self.show_all or self.list_editable or ORDER_VAR in self.params)
+
+    def _parse_position(self, value):
+        try:
+            created_at, pk = value.split('|')
+            return datetime.fromisoformat(created_at), uuid.UUID(pk)
+        except ValueError:
+            raise IncorrectLookupParameters
+
+    def _position(self, obj):
+        return f'{obj.created_at.isoformat()}|{obj.pk}'
+
+    def _beyond(self, queryset, value, operator):
+        # Сравнение строк (created_at, id) < (%s, %s) PostgreSQL выполняет одним диапазоном по индексу
+        connection = connections[queryset.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        columns = ', '.join(
+            f'{table}.{connection.ops.quote_name(self.model._meta.get_field(name).column)}'
+            for name in self.keyset_fields
+        )
+        condition = RawSQL(f'({columns}) {operator} (%s, %s)', self._parse_position(value),
+                           output_field=BooleanField())
+        return queryset.alias(keyset_beyond=condition).filter(keyset_beyond=True)
+
+    def get_results(self, request):
+        if not self.keyset_active:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        descending = [f'-{name}' for name in self.keyset_fields]
+        limit = self.list_per_page
+        if self.keyset_before:
+            queryset = self._beyond(self.queryset, self.keyset_before, '>').order_by(*self.keyset_fields)
+            result_list = list(queryset[:limit + 1])
+            has_previous, has_next = len(result_list) > limit, True
+            result_list = result_list[:limit][::-1]
+        else:
+            queryset = self.queryset
+            if self.keyset_after:
+                queryset = self._beyond(queryset, self.keyset_after, '<')
+            result_list = list(queryset.order_by(*descending)[:limit + 1])
+            has_previous, has_next = bool(self.keyset_after), len(result_list) > limit
+            result_list = result_list[:limit]
+
+        if result_list and has_next:
+            self.keyset_next_url = self.get_query_string({KEYSET_AFTER_VAR: self._position(result_list[-1])})
+        if result_list and has_previous:
+            self.keyset_previous_url = self.get_query_string({KEYSET_BEFORE_VAR: self._position(result_list[0])})
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = has_next or has_previous
+        self.paginator = paginator
@@ -0,0 +1,23 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_save, pre_migrate
+from django.dispatch import receiver
+
+from .filters import invalidate_filmwork_facets
+from .models import Filmwork, Genre, GenreFilmwork
+
+
+@receiver([post_save, post_delete], sender=Filmwork)
+@receiver([post_save, post_delete], sender=Genre)
+@receiver([post_save, post_delete], sender=GenreFilmwork)
+def reset_filmwork_facets(sender, **kwargs):
+    # Счётчики фильтров FilmworkAdmin зависят от фильмов, жанров и их связей
+    invalidate_filmwork_facets()
+
+
+@receiver(pre_migrate)
+def create_content_schema(sender, using, **kwargs):
+    # Таблицы моделей хранятся в схеме content: без неё не создать тестовую базу по моделям
+    # (см. TEST в config/components/database.py)
+    if sender.label == 'movies':
+        with connections[using].cursor() as cursor:
+            cursor.execute('CREATE SCHEMA IF NOT EXISTS content')
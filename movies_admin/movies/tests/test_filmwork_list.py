@@ -0,0 +1,36 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from movies.models import Filmwork, Genre, GenreFilmwork
+
+
+class FilmworkListTests(TestCase):
+    """Список фильмов в админке показывает текущие жанры, без ожидания обновления film_work_summary."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.film = Filmwork.objects.create(title='The Matrix', creation_date=datetime.date(1999, 3, 31), rating=8.7,
+                                           type=Filmwork.ContentType.MOVIE)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def genres_column(self):
+        response = self.client.get('/admin/movies/filmwork/')
+        self.assertEqual(response.status_code, 200)
+        cl = response.context['cl']
+        return {film.title: cl.model_admin.get_genres(film) for film in cl.result_list}
+
+    def test_genres_follow_changes(self):
+        self.assertEqual(self.genres_column(), {'The Matrix': ''})
+
+        action = Genre.objects.create(name='Action')
+        GenreFilmwork.objects.create(film_work_id=self.film, genre_id=action)
+        self.assertEqual(self.genres_column(), {'The Matrix': 'Action'})
+
+        action.name = 'Sci-Fi'
+        action.save()
+        self.assertEqual(self.genres_column(), {'The Matrix': 'Sci-Fi'})
@@ -0,0 +1,49 @@
+import datetime
+import importlib
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from movies.models import Filmwork
+
+
+class FilmworkSearchTests(TestCase):
+    """Полнотекстовый поиск фильмов в админке: лучшие совпадения - первыми."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Тестовая база создаётся по моделям: генерируемый столбец search_vector добавляется миграцией 0006
+        migration = importlib.import_module('movies.migrations.0006_filmwork_search_vector').Migration
+        with connection.cursor() as cursor:
+            cursor.execute(migration.operations[0].sql)
+        cls.admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        # Фильм, где слово только в описании, создан позже: по умолчанию список показывает его первым
+        for title, description, day in (('The Matrix', 'Neo wakes up', 1),
+                                        ('Animatrix shorts', 'Stories from the world of the matrix', 2),
+                                        ('Alien', 'In space no one can hear you scream', 3)):
+            film = Filmwork.objects.create(title=title, description=description, creation_date=datetime.date(1999, 1, 1),
+                                           rating=8.0, type=Filmwork.ContentType.MOVIE)
+            Filmwork.objects.filter(pk=film.pk).update(created_at=datetime.datetime(2021, 1, day, tzinfo=datetime.timezone.utc))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def titles(self, params):
+        response = self.client.get('/admin/movies/filmwork/', params)
+        self.assertEqual(response.status_code, 200)
+        return [film.title for film in response.context['cl'].result_list]
+
+    def test_best_match_first(self):
+        self.assertEqual(self.titles({'q': 'matrix'}), ['The Matrix', 'Animatrix shorts'])
+
+    def test_prefix_search(self):
+        self.assertEqual(self.titles({'q': 'matr'}), ['The Matrix', 'Animatrix shorts'])
+
+    def test_column_sort_replaces_rank(self):
+        # Сортировка по названию (первый столбец list_display)
+        self.assertEqual(self.titles({'q': 'matrix', 'o': '-1'}), ['The Matrix', 'Animatrix shorts'])
+        self.assertEqual(self.titles({'q': 'matrix', 'o': '1'}), ['Animatrix shorts', 'The Matrix'])
+
+    def test_list_without_search_is_newest_first(self):
+        self.assertEqual(self.titles({}), ['Alien', 'Animatrix shorts', 'The Matrix'])
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from movies.admin import PersonAdmin
+from movies.models import Person
+
+START = datetime(2021, 6, 16, 20, 14, 9, tzinfo=timezone.utc)
+
+
+class KeysetPaginationTests(TestCase):
+    """Переход «следующая/предыдущая страница» по ключу (created_at, id) в списке персон."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        # Две пары персон с одинаковым created_at: порядок внутри пары задаёт id
+        for index, created_at in enumerate([START, START, START + timedelta(days=1), START + timedelta(days=1),
+                                            START + timedelta(days=2)]):
+            person = Person.objects.create(full_name=f'Person {index}')
+            Person.objects.filter(pk=person.pk).update(created_at=created_at)
+        cls.expected = list(Person.objects.order_by('-created_at', '-id').values_list('full_name', flat=True))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def page(self, query='', per_page=2):
+        with mock.patch.object(PersonAdmin, 'list_per_page', per_page):
+            response = self.client.get(f'/admin/movies/person/{query}')
+        self.assertEqual(response.status_code, 200)
+        cl = response.context['cl']
+        self.assertTrue(cl.keyset_active)
+        return [person.full_name for person in cl.result_list], cl.keyset_previous_url, cl.keyset_next_url
+
+    def test_next_pages_cover_list_once(self):
+        names, previous_url, next_url = self.page()
+        self.assertIsNone(previous_url)
+        pages = [names]
+        while next_url:
+            names, previous_url, next_url = self.page(next_url)
+            self.assertIsNotNone(previous_url)
+            pages.append(names)
+
+        self.assertEqual([len(names) for names in pages], [2, 2, 1])
+        self.assertEqual([name for names in pages for name in names], self.expected)
+
+    def test_previous_returns_to_same_page(self):
+        first, _, next_url = self.page()
+        second, _, next_url = self.page(next_url)
+        last, previous_url, last_next_url = self.page(next_url)
+        self.assertIsNone(last_next_url)
+
+        names, previous_url, next_url = self.page(previous_url)
+        self.assertEqual(names, second)
+        self.assertIsNotNone(next_url)
+        names, previous_url, next_url = self.page(previous_url)
+        self.assertEqual(names, first)
+        self.assertIsNone(previous_url)
+        self.assertEqual(self.page(next_url)[0], second)
+
+    def test_full_last_page_has_no_next(self):
+        # Страница читается с одной лишней строкой: ровно заполненная последняя страница - без ссылки «дальше»
+        names, previous_url, next_url = self.page(per_page=5)
+        self.assertEqual(names, self.expected)
+        self.assertIsNone(previous_url)
+        self.assertIsNone(next_url)
+
+        names, previous_url, next_url = self.page(per_page=4)
+        names, previous_url, next_url = self.page(next_url, per_page=4)
+        self.assertEqual(names, self.expected[4:])
+        self.assertIsNone(next_url)
+
+    def test_malformed_position_is_rejected(self):
+        response = self.client.get('/admin/movies/person/', {'after': 'not-a-position'})
+        self.assertRedirects(response, '/admin/movies/person/?e=1', fetch_redirect_response=False)
+
+    def test_sorting_by_column_uses_numbered_pages(self):
+        with mock.patch.object(PersonAdmin, 'list_per_page', 2):
+            response = self.client.get('/admin/movies/person/', {'o': '1'})
+        cl = response.context['cl']
+        self.assertFalse(cl.keyset_active)
+        self.assertEqual(cl.paginator.num_pages, 3)
@@ -0,0 +1,34 @@
+import logging
+
+import psycopg
+from psycopg import sql
+
+logger = logging.getLogger(__name__)
+
+# Ключи кэша админки, зависящие от данных content: счётчики фильтров (movies/filters.py)
+# и ответы автодополнения (movies/views.py). DatabaseCache хранит их как '<префикс>:<версия>:<ключ>'
+ADMIN_KEY_PATTERN = '%:admin-%'
+
+
+def clear_admin_cache(dsl: dict, table: str = 'django_cache') -> int:
+    """
+    Удаляет закэшированные данные админки после загрузки: загрузка идёт в обход Django,
+    и сигналы, сбрасывающие кэш, не срабатывают.
+
+    Работает, если админка хранит кэш в таблице PostgreSQL (DatabaseCache, config/components/caches.py);
+    с другим хранилищем кэш устаревает не дольше времени жизни ключей.
+
+    :param dsl: Параметры подключения к PostgreSQL.
+    :param table: Таблица кэша (CACHE_LOCATION админки), при необходимости со схемой.
+    :return: Количество удалённых ключей; 0, если таблицы нет.
+    """
+    with psycopg.connect(**dsl) as connection:
+        exists = connection.execute("SELECT to_regclass(%s) IS NOT NULL", [table]).fetchone()[0]
+        if not exists:
+            logger.info(f"Cache table {table} does not exist, admin cache is not cleared")
+            return 0
+        deleted = connection.execute(
+            sql.SQL("DELETE FROM {} WHERE cache_key LIKE %s").format(sql.Identifier(*table.split('.'))), [ADMIN_KEY_PATTERN]
+        ).rowcount
+    logger.info(f"Cleared {deleted} admin cache keys in {table}")
+    return deleted
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import threading
+from typing import Union
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import psycopg
+from postgres_saver import PostgresSaver
+from row_converters import get_batch_converter
+from sqlite_loader import SQLiteLoader
+from sqlite_source import SQLiteSource
+
+logger = logging.getLogger(__name__)
+
+# Признак конца потока партий в очереди
+_DONE = None
+
+
+def convert_batch(table_name: str, batch: list[tuple]) -> list[tuple]:
+    """Проверяет и приводит партию строк. Функция модуля, чтобы её можно было выполнить в другом процессе."""
+    return get_batch_converter(SQLiteLoader.TABLE_TO_DATACLASS[table_name])(batch)
+
+
+class AsyncMigrationPipeline:
+    """
+    Асинхронный перенос одной таблицы, в котором чтение, преобразование и запись идут одновременно.
+
+    Чтение из SQLite выполняется в отдельном потоке, преобразование - в пуле исполнителей,
+    запись - несколькими корутинами на собственных AsyncConnection. Стадии связаны
+    ограниченными очередями, поэтому быстрая стадия ждёт медленную, а не копит партии в памяти.
+    """
+
+    def __init__(self, sqlite_db: Union[str, SQLiteSource], dsl: dict, table_name: str, batch: int = 100, writers: int = 2,
+                 converters: int = 2, queue_size: int = 8, converter_executor: str = 'process',
+                 schema: str = 'content', exclude_ids: frozenset[str] = frozenset()) -> None:
+        """
+        Инициализирует объект AsyncMigrationPipeline.
+
+        :param sqlite_db: Путь к файлу SQLite или настроенный источник SQLite.
+        :param dsl: Параметры подключения к PostgreSQL.
+        :param table_name: Имя таблицы.
+        :param batch: Размер партии.
+        :param writers: Число корутин записи (и соединений с PostgreSQL).
+        :param converters: Число параллельных преобразований.
+        :param queue_size: Ёмкость каждой очереди в партиях.
+        :param converter_executor: 'process' или 'thread' - где выполняется преобразование.
+        :param schema: Схема целевой таблицы.
+        :param exclude_ids: id строк, которые не нужно переносить.
+        :raises ValueError: Если переданы некорректные параметры.
+        """
+        for name, value in (('writers', writers), ('converters', converters), ('queue_size', queue_size)):
+            if not isinstance(value, int) or value <= 0:
+                raise ValueError(f"{name} must be a positive integer.")
+        if converter_executor not in ('process', 'thread'):
+            raise ValueError(f"Invalid converter executor: {converter_executor}")
+
+        self.source = sqlite_db if isinstance(sqlite_db, SQLiteSource) else SQLiteSource(sqlite_db)
+        self.dsl = dsl
+        self.table_name = table_name
+        self.batch = batch
+        self.writers = writers
+        self.converters = converters
+        self.queue_size = queue_size
+        self.converter_executor = converter_executor
+        self.schema = schema
+        self.exclude_ids = exclude_ids
+
+        self._stop = threading.Event()
+
+    def _read(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> None:
+        """Читает партии из SQLite в отдельном потоке и кладёт их в очередь, ожидая свободного места."""
+        connection = self.source.connect()
+        try:
+            loader = SQLiteLoader(connection.cursor(), self.table_name, batch=self.batch, exclude_ids=self.exclude_ids)
+            for batch in loader.extract_data(loader.cursor):
+                self._put_from_thread(loop, queue, batch)
+                if self._stop.is_set():
+                    return
+        finally:
+            connection.close()
+            for _ in range(self.converters):
+                self._put_from_thread(loop, queue, _DONE)
+
+    def _put_from_thread(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, item) -> None:
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while not self._stop.is_set():
+            try:
+                future.result(timeout=0.5)
+                return
+            except FutureTimeoutError:
+                continue
+        future.cancel()
+
+    async def _convert(self, executor: Executor, source: asyncio.Queue, target: asyncio.Queue,
+                       finished: list[int]) -> None:
+        loop = asyncio.get_running_loop()
+        while (batch := await source.get()) is not _DONE:
+            await target.put(await loop.run_in_executor(executor, convert_batch, self.table_name, batch))
+
+        # Последний завершившийся преобразователь сообщает об окончании всем корутинам записи
+        finished[0] += 1
+        if finished[0] == self.converters:
+            for _ in range(self.writers):
+                await target.put(_DONE)
+
+    async def _write(self, queue: asyncio.Queue) -> int:
+        written = 0
+        async with await psycopg.AsyncConnection.connect(**self.dsl) as connection:
+            saver = PostgresSaver(connection, self.table_name, batch=self.batch, raw=True, schema=self.schema)
+            async with connection.cursor() as cursor:
+                while (batch := await queue.get()) is not _DONE:
+                    await cursor.executemany(saver.insert_query, saver.prepare_records(batch))
+                    await connection.commit()
+                    written += len(batch)
+        return written
+
+    def _create_executor(self) -> Executor:
+        if self.converter_executor == 'process':
+            return ProcessPoolExecutor(max_workers=self.converters)
+        return ThreadPoolExecutor(max_workers=self.converters)
+
+    async def run(self) -> int:
+        """
+        Переносит таблицу.
+
+        :return: Количество записанных строк.
+        :raises RuntimeError: Если одна из стадий завершилась ошибкой.
+        """
+        loop = asyncio.get_running_loop()
+        raw_batches: asyncio.Queue = asyncio.Queue(self.queue_size)
+        converted_batches: asyncio.Queue = asyncio.Queue(self.queue_size)
+        finished = [0]
+
+        with self._create_executor() as executor, ThreadPoolExecutor(max_workers=1) as reader_thread:
+            reader = loop.run_in_executor(reader_thread, self._read, loop, raw_batches)
+            converters = [
+                asyncio.create_task(self._convert(executor, raw_batches, converted_batches, finished))
+                for _ in range(self.converters)
+            ]
+            writers = [asyncio.create_task(self._write(converted_batches)) for _ in range(self.writers)]
+            try:
+                results = await asyncio.gather(reader, *converters, *writers)
+            except Exception as e:
+                self._stop.set()
+                for task in (*converters, *writers):
+                    task.cancel()
+                logger.error(f"Async pipeline for table {self.table_name} failed: {e}")
+                raise RuntimeError(f"Async pipeline for table {self.table_name} failed: {e}")
+
+        written = sum(results[1 + self.converters:])
+        logger.info(f"Total records inserted into '{self.table_name}': {written}")
+        return written
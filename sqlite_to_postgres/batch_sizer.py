@@ -0,0 +1,110 @@
+import logging
+import sys
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Сколько строк партии взвешивается для оценки её размера в памяти
+SIZE_SAMPLE_ROWS = 32
+
+
+def estimate_row_bytes(rows: list[tuple]) -> float:
+    """
+    Средний размер строки в памяти по выборке строк партии: кортеж и значения в нём.
+
+    :param rows: Строки партии.
+    :return: Оценка в байтах (0 для пустой партии).
+    """
+    if not rows:
+        return 0.0
+    step = max(len(rows) // SIZE_SAMPLE_ROWS, 1)
+    sample = rows[::step]
+    total = sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) for row in sample)
+    return total / len(sample)
+
+
+class AdaptiveBatchSizer:
+    """
+    Подбирает размер партии таблицы во время переноса.
+
+    После каждой партии учитывает, сколько длилась её обработка целиком (чтение, преобразование,
+    запись) и сколько памяти занимает строка, и выбирает размер, при котором партия обрабатывается
+    примерно за target_seconds и занимает не больше memory_limit байт. Время и размер строки
+    сглаживаются, а размер меняется не более чем вдвое за шаг: одна медленная партия не обрушит его.
+    Широким строкам film_work достаются меньшие партии, узким строкам таблиц связей - большие.
+    """
+
+    def __init__(self, table_name: str, initial: int = 100, target_seconds: float = 0.5,
+                 memory_limit: int = 64 * 2 ** 20, min_size: int = 10, max_size: int = 50_000,
+                 smoothing: float = 0.3) -> None:
+        """
+        Инициализирует объект AdaptiveBatchSizer.
+
+        :param table_name: Имя таблицы (для сообщений в логе).
+        :param initial: Начальный размер партии.
+        :param target_seconds: Желаемое время обработки одной партии.
+        :param memory_limit: Наибольший допустимый размер партии в памяти, байты.
+        :param min_size: Наименьший размер партии.
+        :param max_size: Наибольший размер партии.
+        :param smoothing: Вес нового наблюдения в скользящем среднем (0 < smoothing <= 1).
+        :raises ValueError: Если параметры некорректны.
+        """
+        if not 0 < min_size <= max_size:
+            raise ValueError("Batch size bounds must satisfy 0 < min_size <= max_size.")
+        if target_seconds <= 0 or memory_limit <= 0:
+            raise ValueError("target_seconds and memory_limit must be positive.")
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1].")
+
+        self.table_name = table_name
+        self.target_seconds = target_seconds
+        self.memory_limit = memory_limit
+        self.min_size = min_size
+        self.max_size = max_size
+        self.smoothing = smoothing
+        self.size = min(max(initial, min_size), max_size)
+
+        # Сглаженные время обработки и размер одной строки
+        self.seconds_per_row: Optional[float] = None
+        self.bytes_per_row: Optional[float] = None
+        self.batches = 0
+
+    def _smooth(self, average: Optional[float], value: float) -> float:
+        if average is None:
+            return value
+        return average + self.smoothing * (value - average)
+
+    def observe(self, rows: int, seconds: float, row_bytes: float) -> int:
+        """
+        Учитывает обработанную партию и пересчитывает размер следующей.
+
+        :param rows: Число строк в партии.
+        :param seconds: Время обработки партии.
+        :param row_bytes: Средний размер строки в памяти (см. estimate_row_bytes).
+        :return: Новый размер партии.
+        """
+        if rows <= 0:
+            return self.size
+        self.batches += 1
+        self.seconds_per_row = self._smooth(self.seconds_per_row, seconds / rows)
+        self.bytes_per_row = self._smooth(self.bytes_per_row, row_bytes)
+
+        limits = [self.max_size]
+        if self.seconds_per_row > 0:
+            limits.append(self.target_seconds / self.seconds_per_row)
+        if self.bytes_per_row > 0:
+            limits.append(self.memory_limit / self.bytes_per_row)
+        wanted = min(limits)
+
+        # Не более чем вдвое за шаг в любую сторону
+        self.size = int(min(max(wanted, self.size / 2, self.min_size), self.size * 2, self.max_size))
+        return self.size
+
+    def report(self) -> None:
+        """Выводит в лог размер партии, на котором остановился подбор."""
+        if not self.batches:
+            return
+        latency = self.size * self.seconds_per_row
+        memory = self.size * self.bytes_per_row / 2 ** 20
+        logger.info(f"Table '{self.table_name}': batch size settled at {self.size} rows "
+                    f"(~{latency * 1000:.0f}ms and ~{memory:.1f} MiB per batch after {self.batches} batches)")
@@ -0,0 +1,373 @@
+"""
+Бенчмарк переноса данных на синтетическом каталоге.
+
+Стадии extract (чтение SQLite), convert (проверка и приведение строк), write (запись в PostgreSQL),
+verify (сверка TransferVerifier) измеряются по отдельности для каждой таблицы, стадия end_to_end -
+полный перенос через TableScheduler с последующей сверкой. Каждое измерение выполняется в отдельном
+процессе, чтобы пиковое потребление памяти (RSS) относилось только к нему.
+
+Результаты (строк в секунду, p99 времени партии, пиковый RSS) вместе с ревизией git
+записываются в JSON; с --compare печатается сравнение с прежним файлом результатов.
+
+С --cache cold,warm каждое измерение повторяется с холодным кэшем страниц ОС (страницы файла SQLite
+вытесняются через posix_fadvise(POSIX_FADV_DONTNEED)) и с прогретым (файл предварительно прочитан).
+Вытесняются только чистые страницы файла, права root для этого не нужны.
+
+Запуск: python benchmark.py --films small --stages extract,convert,write,verify,end_to_end
+Параметры PostgreSQL берутся из тех же переменных окружения, что и в load_data.py.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from functools import partial
+from itertools import product
+from typing import Any, Callable, Iterable, Iterator
+
+STAGES = ('extract', 'convert', 'write', 'verify', 'end_to_end')
+# Порядок таблиц, при котором записи не нарушают внешние ключи
+TABLES = ['film_work', 'genre', 'person', 'genre_film_work', 'person_film_work']
+RESULTS_DIR = 'benchmark_results'
+CACHE_STATES = ('cold', 'warm')
+
+logger = logging.getLogger(__name__)
+
+
+def _timed(batches: Iterable, latencies: list[float]) -> Iterator:
+    """Пропускает партии через себя и записывает время получения каждой из них."""
+    iterator = iter(batches)
+    while True:
+        started = time.perf_counter()
+        try:
+            batch = next(iterator)
+        except StopIteration:
+            return
+        latencies.append(time.perf_counter() - started)
+        yield batch
+
+
+def _peak_rss_mb() -> float:
+    """Пиковый RSS процесса и его дочерних процессов в мегабайтах (ru_maxrss в Linux - в килобайтах)."""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / 1024, 1)
+
+
+def _dsl() -> dict:
+    return {
+        'dbname': os.getenv('DB_NAME'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'host': os.getenv('DB_HOST'),
+        'port': os.getenv('DB_PORT')
+    }
+
+
+def _source(options: dict):
+    from sqlite_source import SQLiteSource
+
+    return SQLiteSource(options['db'], mmap_size_mb=options['sqlite_mmap_mb'], cache_size_mb=options['sqlite_cache_mb'])
+
+
+def drop_page_cache(path: str) -> None:
+    """Вытесняет страницы файла из кэша ОС, чтобы следующее чтение шло с диска."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def warm_page_cache(path: str) -> None:
+    """Читает файл целиком, чтобы его страницы оказались в кэше ОС."""
+    with open(path, 'rb', buffering=0) as f:
+        while f.read(2 ** 20):
+            pass
+
+
+def _truncate(dsl: dict, tables: list[str]) -> None:
+    import psycopg
+
+    with psycopg.connect(**dsl) as connection:
+        connection.execute(f"TRUNCATE {', '.join(f'content.{table}' for table in tables)} CASCADE")
+
+
+# --- Стадии (выполняются в дочернем процессе) ---
+
+def stage_extract(options: dict, table_name: str, latencies: list[float]) -> int:
+    from sqlite_loader import SQLiteLoader
+
+    connection = _source(options).connect()
+    try:
+        loader = SQLiteLoader(connection.cursor(), table_name, batch=options['batch_size'])
+        return sum(len(batch) for batch in _timed(loader.extract_data(loader.cursor), latencies))
+    finally:
+        connection.close()
+
+
+def stage_convert(options: dict, table_name: str, latencies: list[float]) -> int:
+    from row_converters import get_batch_converter, get_converter
+    from sqlite_loader import SQLiteLoader
+
+    cls = SQLiteLoader.TABLE_TO_DATACLASS[table_name]
+    if options['raw_rows']:
+        convert = get_batch_converter(cls)
+    else:
+        convert_row = get_converter(cls)
+        convert = lambda batch: [convert_row(row) for row in batch]
+
+    connection = _source(options).connect()
+    try:
+        loader = SQLiteLoader(connection.cursor(), table_name, batch=options['batch_size'])
+        rows = 0
+        for batch in loader.extract_data(loader.cursor):
+            started = time.perf_counter()
+            convert(batch)
+            latencies.append(time.perf_counter() - started)
+            rows += len(batch)
+        return rows
+    finally:
+        connection.close()
+
+
+def stage_write(options: dict, table_name: str, latencies: list[float]) -> int:
+    import psycopg
+    from psycopg import ClientCursor
+    from psycopg.rows import dict_row
+    from load_data import read_batches
+    from postgres_saver import PostgresSaver
+    from sqlite_loader import SQLiteLoader
+
+    _truncate(options['dsl'], [table_name])
+    connection = _source(options).connect()
+    try:
+        with psycopg.connect(**options['dsl'], row_factory=dict_row, cursor_factory=ClientCursor) as pg_conn:
+            loader = SQLiteLoader(connection.cursor(), table_name, batch=options['batch_size'])
+            saver = PostgresSaver(pg_conn, table_name, batch=options['batch_size'], mode=options['write_mode'],
+                                  raw=options['raw_rows'])
+            # Время партии - от запроса партии у источника до фиксации записи, без времени чтения
+            read_times: list[float] = []
+            cycle = {'started': time.perf_counter()}
+
+            def checkpoint(cursor, rows: int) -> None:
+                now = time.perf_counter()
+                latencies.append(now - cycle['started'] - read_times[-1])
+                cycle['started'] = now
+
+            return saver.save_all_data(
+                _timed(read_batches(loader, options['raw_rows']), read_times), checkpoint=checkpoint
+            )
+    finally:
+        connection.close()
+
+
+def stage_verify(options: dict, table_name: str, latencies: list[float]) -> int:
+    import psycopg
+    from verification import TransferVerifier
+
+    connection = _source(options).connect()
+    try:
+        with psycopg.connect(**options['dsl']) as pg_conn:
+            started = time.perf_counter()
+            report = TransferVerifier(connection, pg_conn, table_name).verify()
+            latencies.append(time.perf_counter() - started)
+            if not report.ok:
+                raise RuntimeError(f"Verification of {table_name} failed")
+        return connection.execute(f'SELECT count(*) FROM {table_name}').fetchone()[0]
+    finally:
+        connection.close()
+
+
+def stage_end_to_end(options: dict, table_name: str, latencies: list[float]) -> int:
+    from load_data import MigrationConfig, migrate_table
+    from scheduler import TableScheduler
+
+    _truncate(options['dsl'], TABLES)
+    config = MigrationConfig(options['db'], options['dsl'], write_mode=options['write_mode'], resumable=False,
+                             raw_rows=options['raw_rows'], batch_size=options['batch_size'],
+                             sqlite_mmap_mb=options['sqlite_mmap_mb'], sqlite_cache_mb=options['sqlite_cache_mb'])
+    started = time.perf_counter()
+    results = TableScheduler(partial(migrate_table, config), workers=options['workers']).run(TABLES)
+    latencies.append(time.perf_counter() - started)
+    for table in TABLES:
+        stage_verify(options, table, [])
+    return sum(results.values())
+
+
+STAGE_FUNCTIONS: dict[str, Callable[[dict, str, list[float]], int]] = {
+    'extract': stage_extract,
+    'convert': stage_convert,
+    'write': stage_write,
+    'verify': stage_verify,
+    'end_to_end': stage_end_to_end,
+}
+
+
+def run_stage_here(options: dict, stage: str, table_name: str) -> dict[str, Any]:
+    """Выполняет одно измерение в текущем процессе."""
+    latencies: list[float] = []
+    started = time.perf_counter()
+    rows = STAGE_FUNCTIONS[stage](options, table_name, latencies)
+    seconds = time.perf_counter() - started
+
+    if len(latencies) > 1:
+        p99 = statistics.quantiles(latencies, n=100, method='inclusive')[98]
+    else:
+        p99 = latencies[0] if latencies else 0.0
+    return {
+        'stage': stage,
+        'table': table_name,
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds, 1) if seconds else None,
+        'p99_batch_ms': round(p99 * 1000, 3),
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def run_stage(options: dict, stage: str, table_name: str, cache: str = 'warm') -> dict[str, Any]:
+    """Выполняет одно измерение в отдельном процессе с холодным или прогретым кэшем страниц и возвращает его результат."""
+    if cache == 'cold':
+        drop_page_cache(options['db'])
+    else:
+        warm_page_cache(options['db'])
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', json.dumps([options, stage, table_name])],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Stage {stage} for {table_name} failed:\n{completed.stderr}")
+    return dict(json.loads(completed.stdout.splitlines()[-1]), cache=cache)
+
+
+# --- Запуск и отчёт ---
+
+def git_revision() -> str:
+    """Ревизия git рабочего дерева; к изменённому дереву добавляется '-dirty'."""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True).stdout.strip()
+        return f'{revision}-dirty' if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results: list[dict], baseline_path: str) -> None:
+    """Печатает отношение скоростей к прежнему файлу результатов."""
+    with open(baseline_path) as f:
+        baseline = {(r['stage'], r['table'], r.get('cache', 'warm')): r for r in json.load(f)['results']}
+    print(f"\n{'stage':<12} {'table':<18} {'cache':<6} {'rows/s':>12} {'baseline':>12} {'change':>8}")
+    for result in results:
+        old = baseline.get((result['stage'], result['table'], result['cache']))
+        if not old or not old['rows_per_second'] or not result['rows_per_second']:
+            continue
+        change = result['rows_per_second'] / old['rows_per_second'] - 1
+        print(f"{result['stage']:<12} {result['table']:<18} {result['cache']:<6} {result['rows_per_second']:>12,.0f} "
+              f"{old['rows_per_second']:>12,.0f} {change:>+8.1%}")
+
+
+def main() -> None:
+    from synthetic_catalogue import SIZES, generate_catalogue
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--films', default='small', help=f"число фильмов или размер: {', '.join(SIZES)}")
+    parser.add_argument('--db', default='benchmark.sqlite', help='файл синтетического каталога')
+    parser.add_argument('--regenerate', action='store_true', help='пересоздать каталог, даже если файл есть')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--tables', default=','.join(TABLES))
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('BATCH_SIZE', 100)))
+    parser.add_argument('--write-mode', default=os.getenv('PG_WRITE_MODE', 'insert'))
+    parser.add_argument('--raw-rows', action='store_true', default=os.getenv('RAW_ROWS', '0') == '1')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('MIGRATION_WORKERS', 1)))
+    parser.add_argument('--cache', default='warm', help='состояния кэша страниц ОС через запятую: cold, warm')
+    parser.add_argument('--sqlite-mmap-mb', type=int, default=int(os.getenv('SQLITE_MMAP_MB', 256)))
+    parser.add_argument('--sqlite-cache-mb', type=int, default=int(os.getenv('SQLITE_CACHE_MB', 64)))
+    parser.add_argument('--output', help=f'файл результатов (по умолчанию {RESULTS_DIR}/<ревизия>-<время>.json)')
+    parser.add_argument('--compare', help='файл прежних результатов для сравнения')
+    args = parser.parse_args()
+
+    stages = args.stages.split(',')
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    tables = [table for table in TABLES if table in args.tables.split(',')]
+    caches = args.cache.split(',')
+    if set(caches) - set(CACHE_STATES):
+        parser.error(f"unknown cache states: {', '.join(sorted(set(caches) - set(CACHE_STATES)))}")
+
+    films = SIZES[args.films] if args.films in SIZES else int(args.films)
+    if args.regenerate or not os.path.exists(args.db):
+        started = time.perf_counter()
+        generate_catalogue(args.db, films, seed=args.seed)
+        logger.info(f"Catalogue generated in {time.perf_counter() - started:.1f}s")
+
+    connection = sqlite3.connect(args.db)
+    try:
+        catalogue = {table: connection.execute(f'SELECT count(*) FROM {table}').fetchone()[0] for table in TABLES}
+    finally:
+        connection.close()
+
+    options = {
+        'db': os.path.abspath(args.db),
+        'dsl': _dsl(),
+        'batch_size': args.batch_size,
+        'write_mode': args.write_mode,
+        'raw_rows': args.raw_rows,
+        'workers': args.workers,
+        'sqlite_mmap_mb': args.sqlite_mmap_mb,
+        'sqlite_cache_mb': args.sqlite_cache_mb,
+    }
+
+    results = []
+    for stage in stages:
+        for table_name, cache in product(['*'] if stage == 'end_to_end' else tables, caches):
+            result = run_stage(options, stage, table_name, cache)
+            logger.info(f"{stage:<10} {table_name:<18} {cache:<5} {result['rows']:>10} rows "
+                        f"{result['rows_per_second'] or 0:>12,.0f} rows/s  p99 {result['p99_batch_ms']:>9.3f} ms  "
+                        f"RSS {result['peak_rss_mb']} MB")
+            results.append(result)
+
+    revision = git_revision()
+    created_at = datetime.now(timezone.utc)
+    output = args.output or os.path.join(RESULTS_DIR, f"{revision}-{created_at:%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'git_revision': revision,
+            'created_at': created_at.isoformat(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'settings': {key: options[key] for key in ('batch_size', 'write_mode', 'raw_rows', 'workers',
+                                                       'sqlite_mmap_mb', 'sqlite_cache_mb')},
+            'catalogue': catalogue,
+            'results': results,
+        }, f, indent=2)
+    logger.info(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--child':
+        logging.basicConfig(level=logging.WARNING)
+        child_options, child_stage, child_table = json.loads(sys.argv[2])
+        print(json.dumps(run_stage_here(child_options, child_stage, child_table)))
+    else:
+        logging.basicConfig(level=logging.INFO)
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        main()
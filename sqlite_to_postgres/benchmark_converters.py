@@ -0,0 +1,74 @@
+"""
+Микро-бенчмарк преобразования строк SQLite в датаклассы.
+
+Сравнивает прежний рефлексивный __post_init__ (обход __dataclass_fields__, strptime)
+с конструктором датакласса и со сгенерированным конвертером из row_converters.
+
+Запуск: python benchmark_converters.py [число строк]
+"""
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable
+from uuid import UUID
+from film_work_dataclass import FilmWork
+from row_converters import get_converter
+
+
+@dataclass
+class LegacyFilmWork:
+    """Копия FilmWork с прежней построчной рефлексивной пост-обработкой - точка отсчёта."""
+    id: UUID
+    title: str
+    description: str
+    creation_date: str
+    file_path: str
+    rating: float
+    type: str
+    created_at: str
+    updated_at: str
+
+    def __post_init__(self) -> None:
+        for field_name, field_info in self.__dataclass_fields__.items():
+            value: Any = getattr(self, field_name)
+            if field_info.type == UUID:
+                if not value:
+                    raise ValueError("id cannot be null or empty")
+                if isinstance(value, str):
+                    UUID(value)
+            if field_name == "rating" and value is not None and not isinstance(value, float):
+                setattr(self, field_name, float(value))
+            if field_name == "created_at" and value is not None and not isinstance(value, datetime):
+                setattr(self, field_name, datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f+00'))
+            if field_name == "updated_at" and value is not None and not isinstance(value, datetime):
+                setattr(self, field_name, datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f+00'))
+
+
+def make_rows(count: int) -> list[tuple]:
+    """Создаёт синтетические строки film_work в формате SQLite-источника."""
+    return [
+        (str(uuid.uuid4()), f'Film {i}', 'Description ' * 10, '2021-01-01', None, 8, 'movie',
+         '2021-06-16 20:14:09.221838+00', '2021-06-16 20:14:09.221838+00')
+        for i in range(count)
+    ]
+
+
+def measure(name: str, convert: Callable[[tuple], Any], rows: list[tuple]) -> float:
+    """Преобразует все строки и печатает скорость в строках в секунду."""
+    started = time.perf_counter()
+    for row in rows:
+        convert(row)
+    rows_per_second = len(rows) / (time.perf_counter() - started)
+    print(f'{name:<28} {rows_per_second:>12,.0f} rows/s')
+    return rows_per_second
+
+
+if __name__ == '__main__':
+    rows = make_rows(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
+
+    before = measure('legacy __post_init__', lambda row: LegacyFilmWork(*row), rows)
+    measure('FilmWork(*row)', lambda row: FilmWork(*row), rows)
+    after = measure('get_converter(FilmWork)', get_converter(FilmWork), rows)
+    print(f'speed-up: x{after / before:.1f}')
@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+import psycopg
+from psycopg.rows import dict_row
+
+logger = logging.getLogger(__name__)
+
+# Снимаемые ограничения: внешние ключи и UNIQUE (первичные ключи остаются)
+CONSTRAINT_TYPES = {'f': 'foreign_key', 'u': 'unique'}
+
+# Список столбцов в конце определения: 'UNIQUE (a, b)' или '... USING btree (a, b)'
+_COLUMNS = re.compile(r'\(([^()]*)\)\s*$')
+
+
+class BulkLoadMode:
+    """
+    Снимает вторичные индексы, внешние ключи и ограничения UNIQUE перед первичной загрузкой
+    и восстанавливает их после неё.
+
+    Без индексов и ограничений каждая вставленная строка не обновляет B-деревья и не проверяет
+    ссылки; после загрузки индексы строятся один раз (параллельно, с увеличенным
+    maintenance_work_mem), внешние ключи добавляются как NOT VALID и проверяются
+    VALIDATE CONSTRAINT, после чего таблицы анализируются. Первичные ключи остаются:
+    на них держится ON CONFLICT и повторный запуск без дублей.
+
+    Определения снятых объектов сохраняются в JSON-файл до их удаления, поэтому прерванную
+    загрузку можно продолжить и восстановить схему при следующем запуске.
+    """
+
+    def __init__(self, dsl: dict, tables: Iterable[str], state_file: str = 'bulk_mode_state.json',
+                 schema: str = 'content', maintenance_work_mem: str = '1GB', workers: int = 4) -> None:
+        """
+        Инициализирует объект BulkLoadMode.
+
+        :param dsl: Параметры подключения к PostgreSQL.
+        :param tables: Таблицы, для которых снимаются индексы и ограничения.
+        :param state_file: Файл с определениями снятых индексов и ограничений.
+        :param schema: Схема таблиц.
+        :param maintenance_work_mem: Память на построение одного индекса.
+        :param workers: Число индексов и ограничений, восстанавливаемых одновременно.
+        :raises ValueError: Если число исполнителей не положительное.
+        """
+        if not isinstance(workers, int) or workers <= 0:
+            raise ValueError("workers must be a positive integer.")
+
+        self.dsl = dsl
+        self.tables = list(tables)
+        self.state_file = state_file
+        self.schema = schema
+        self.maintenance_work_mem = maintenance_work_mem
+        self.workers = workers
+
+    # --- Сохранение определений ---
+
+    def _record(self, connection: psycopg.Connection) -> dict:
+        """Читает из каталога определения ограничений FK/UNIQUE и вторичных индексов (кроме первичных ключей)."""
+        constraints = connection.execute(
+            """
+            SELECT c.conname AS name, t.relname AS table, c.contype AS type,
+                   pg_get_constraintdef(c.oid) AS definition,
+                   CASE WHEN c.contype = 'u' THEN pg_get_indexdef(c.conindid) END AS index_definition
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = %s AND t.relname = ANY(%s) AND c.contype IN ('f', 'u')
+            ORDER BY c.contype, t.relname, c.conname
+            """,
+            [self.schema, self.tables],
+        ).fetchall()
+
+        # Индексы, которые не обслуживают первичный ключ или ограничение
+        indexes = connection.execute(
+            """
+            SELECT i.relname AS name, t.relname AS table, pg_get_indexdef(i.oid) AS definition
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            JOIN pg_class t ON t.oid = x.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = %s AND t.relname = ANY(%s)
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+            ORDER BY t.relname, i.relname
+            """,
+            [self.schema, self.tables],
+        ).fetchall()
+
+        return {
+            'schema': self.schema,
+            'constraints': [dict(row, type=CONSTRAINT_TYPES[row['type']]) for row in constraints],
+            'indexes': [dict(row) for row in indexes],
+        }
+
+    def _load_state(self) -> Optional[dict]:
+        if not os.path.exists(self.state_file):
+            return None
+        with open(self.state_file) as f:
+            return json.load(f)
+
+    def _save_state(self, state: dict) -> None:
+        temporary = f'{self.state_file}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temporary, self.state_file)
+
+    # --- Снятие ---
+
+    def disable(self) -> None:
+        """
+        Сохраняет определения и снимает внешние ключи, ограничения UNIQUE и вторичные индексы.
+
+        Если файл состояния уже есть, объекты были сняты прерванным запуском и повторно не снимаются.
+
+        :raises RuntimeError: Если таблицы не пусты (режим предназначен для первичной загрузки).
+        """
+        if self._load_state() is not None:
+            logger.info(f"Bulk mode: continuing interrupted load, definitions are kept in {self.state_file}")
+            return
+
+        with psycopg.connect(**self.dsl, row_factory=dict_row) as connection:
+            non_empty = [
+                table for table in self.tables
+                if connection.execute(f'SELECT EXISTS (SELECT 1 FROM {self.schema}.{table}) AS found').fetchone()['found']
+            ]
+            if non_empty:
+                raise RuntimeError(f"Bulk mode requires empty tables, found rows in: {', '.join(non_empty)}")
+
+            state = self._record(connection)
+            # Файл записывается до удаления объектов: без него схему нельзя было бы восстановить
+            self._save_state(state)
+
+            for constraint in sorted(state['constraints'], key=lambda c: c['type'] != 'foreign_key'):
+                connection.execute(
+                    f"ALTER TABLE {self.schema}.{constraint['table']} DROP CONSTRAINT IF EXISTS {constraint['name']}"
+                )
+            for index in state['indexes']:
+                connection.execute(f"DROP INDEX IF EXISTS {self.schema}.{index['name']}")
+
+        logger.info(f"Bulk mode: dropped {len(state['constraints'])} constraints and {len(state['indexes'])} indexes, "
+                    f"definitions saved to {self.state_file}")
+
+    # --- Восстановление ---
+
+    def _remove_duplicates(self, state: dict) -> None:
+        """
+        Удаляет строки, повторяющие уже загруженные по столбцам уникальных ограничений и индексов.
+
+        С ограничениями такие строки отбросил бы ON CONFLICT DO NOTHING; без них они попадают
+        в таблицу и не дают построить уникальный индекс. Остаётся первая записанная строка.
+        """
+        keys = {
+            (constraint['table'], match.group(1))
+            for constraint in state['constraints'] if constraint['type'] == 'unique'
+            if (match := _COLUMNS.search(constraint['definition']))
+        }
+        keys |= {
+            (index['table'], match.group(1))
+            for index in state['indexes'] if index['definition'].startswith('CREATE UNIQUE INDEX ')
+            if (match := _COLUMNS.search(index['definition']))
+        }
+        with psycopg.connect(**self.dsl) as connection:
+            for table, columns in sorted(keys):
+                condition = ' AND '.join(f'a.{column.strip()} = b.{column.strip()}' for column in columns.split(','))
+                deleted = connection.execute(
+                    f"DELETE FROM {state['schema']}.{table} a USING {state['schema']}.{table} b "
+                    f"WHERE a.ctid > b.ctid AND {condition}"
+                ).rowcount
+                if deleted:
+                    logger.warning(f"Bulk mode: removed {deleted} rows of {table} duplicating ({columns})")
+
+    def _execute(self, statements: list[str]) -> None:
+        """Выполняет операторы на отдельном соединении с настройками для обслуживания индексов."""
+        with psycopg.connect(**self.dsl, autocommit=True) as connection:
+            connection.execute(f"SET maintenance_work_mem = '{self.maintenance_work_mem}'")
+            for statement in statements:
+                logger.info(f"Bulk mode: {statement}")
+                connection.execute(statement)
+
+    def _run_parallel(self, jobs: list[list[str]]) -> None:
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # list() пробрасывает первое исключение из исполнителей
+            list(executor.map(self._execute, jobs))
+
+    def _existing_constraints(self) -> set[str]:
+        with psycopg.connect(**self.dsl) as connection:
+            rows = connection.execute(
+                """
+                SELECT c.conname FROM pg_constraint c
+                JOIN pg_namespace n ON n.oid = c.connamespace
+                WHERE n.nspname = %s
+                """,
+                [self.schema],
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def restore(self) -> None:
+        """
+        Восстанавливает снятые объекты: индексы и UNIQUE параллельно, затем внешние ключи
+        (NOT VALID + VALIDATE CONSTRAINT), затем ANALYZE. Повторный вызов безопасен.
+
+        :raises psycopg.Error: Если индекс или ограничение не удалось восстановить
+            (например, данные нарушают UNIQUE); файл состояния при этом сохраняется.
+        """
+        state = self._load_state()
+        if state is None:
+            logger.info("Bulk mode: nothing to restore")
+            return
+
+        self._remove_duplicates(state)
+        existing = self._existing_constraints()
+        schema = state['schema']
+        constraints = [c for c in state['constraints'] if c['name'] not in existing]
+
+        # Вторичные индексы и индексы ограничений UNIQUE строятся параллельно
+        jobs = [
+            [index['definition'].replace('CREATE INDEX ', 'CREATE INDEX IF NOT EXISTS ', 1)
+             .replace('CREATE UNIQUE INDEX ', 'CREATE UNIQUE INDEX IF NOT EXISTS ', 1)]
+            for index in state['indexes']
+        ]
+        jobs += [
+            [constraint['index_definition'].replace('CREATE UNIQUE INDEX ', 'CREATE UNIQUE INDEX IF NOT EXISTS ', 1),
+             f"ALTER TABLE {schema}.{constraint['table']} ADD CONSTRAINT {constraint['name']} "
+             f"UNIQUE USING INDEX {constraint['name']}"]
+            for constraint in constraints if constraint['type'] == 'unique'
+        ]
+        self._run_parallel(jobs)
+
+        # Внешние ключи: быстрое добавление без проверки, затем проверка под блокировкой,
+        # не мешающей чтению и записи. Проверяются и ключи, добавленные прерванным восстановлением.
+        foreign_keys = [c for c in state['constraints'] if c['type'] == 'foreign_key']
+        self._execute([
+            f"ALTER TABLE {schema}.{fk['table']} ADD CONSTRAINT {fk['name']} {fk['definition']} NOT VALID"
+            for fk in foreign_keys if fk['name'] not in existing
+        ])
+        self._run_parallel([
+            [f"ALTER TABLE {schema}.{fk['table']} VALIDATE CONSTRAINT {fk['name']}"] for fk in foreign_keys
+        ])
+
+        self._execute([f'ANALYZE {schema}.{table}' for table in self.tables])
+        os.remove(self.state_file)
+        logger.info(f"Bulk mode: restored {len(state['indexes'])} indexes and {len(constraints)} constraints")
@@ -0,0 +1,117 @@
+import logging
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Generator
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+CHANGE_LOG_TABLE = 'migration_change_log'
+
+# Таблицы-связки не имеют updated_at, поэтому для них журналируются все изменения.
+# Для основных таблиц изменения видны по updated_at, журналировать нужно только удаления.
+FULLY_TRACKED_TABLES = ('genre_film_work', 'person_film_work')
+DELETE_TRACKED_TABLES = ('film_work', 'genre', 'person')
+
+# Операции в журнале: U - строка вставлена или изменена, D - строка удалена (tombstone)
+UPSERT, DELETE = 'U', 'D'
+
+
+@dataclass
+class ChangeBatch:
+    """Итоговое состояние строк по партии записей журнала."""
+    upserted_ids: list[str] = field(default_factory=list)
+    deleted_ids: list[str] = field(default_factory=list)
+    last_seq: int = 0
+
+
+def _trigger_sql(table_name: str, event: str, op: str) -> str:
+    row = 'OLD' if event == 'DELETE' else 'NEW'
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG_TABLE}_{table_name}_{event.lower()}
+        AFTER {event} ON {table_name}
+        BEGIN
+            INSERT INTO {CHANGE_LOG_TABLE} (table_name, row_id, op) VALUES ('{table_name}', {row}.id, '{op}');
+        END;
+    """
+
+
+def install_change_tracking(connection: sqlite3.Connection) -> None:
+    """
+    Создаёт в SQLite журнал изменений и триггеры, которые его заполняют.
+
+    :param connection: Соединение с SQLite, открытое на запись.
+    """
+    statements = [f"""
+        CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id TEXT NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    """, f"CREATE INDEX IF NOT EXISTS {CHANGE_LOG_TABLE}_table_seq ON {CHANGE_LOG_TABLE} (table_name, seq);"]
+
+    for table_name in FULLY_TRACKED_TABLES:
+        statements.append(_trigger_sql(table_name, 'INSERT', UPSERT))
+        statements.append(_trigger_sql(table_name, 'UPDATE', UPSERT))
+        statements.append(_trigger_sql(table_name, 'DELETE', DELETE))
+    for table_name in DELETE_TRACKED_TABLES:
+        statements.append(_trigger_sql(table_name, 'DELETE', DELETE))
+        # Индекс по updated_at нужен, чтобы инкрементальная выборка не читала всю таблицу
+        statements.append(f"CREATE INDEX IF NOT EXISTS {table_name}_updated_at ON {table_name} (updated_at);")
+
+    with connection:
+        for statement in statements:
+            connection.execute(statement)
+    logger.info("SQLite change tracking installed")
+
+
+def read_changes(cursor: sqlite3.Cursor, table_name: str, after_seq: int,
+                 batch: int = 100) -> Generator[ChangeBatch, None, None]:
+    """
+    Читает журнал изменений таблицы партиями, начиная с записи после after_seq.
+
+    Для каждой строки в партии учитывается только последняя операция.
+
+    :param cursor: Курсор SQLite.
+    :param table_name: Имя таблицы.
+    :param after_seq: Последний уже применённый номер записи журнала.
+    :param batch: Размер партии записей журнала.
+    :return: Генератор партий изменений.
+    :raises RuntimeError: Если журнал не удаётся прочитать (например, отслеживание не установлено).
+    """
+    query = (
+        f'SELECT seq, row_id, op FROM {CHANGE_LOG_TABLE} '
+        f'WHERE table_name = ? AND seq > ? ORDER BY seq LIMIT ?;'
+    )
+    while True:
+        try:
+            entries = cursor.execute(query, (table_name, after_seq, batch)).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.error(f"Failed to read change log: {e}")
+            raise RuntimeError(f"Failed to read change log: {e}")
+        if not entries:
+            break
+
+        final_ops: dict[str, str] = {}
+        for _, row_id, op in entries:
+            final_ops[row_id] = op
+        after_seq = entries[-1][0]
+        yield ChangeBatch(
+            upserted_ids=[row_id for row_id, op in final_ops.items() if op == UPSERT],
+            deleted_ids=[row_id for row_id, op in final_ops.items() if op == DELETE],
+            last_seq=after_seq,
+        )
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    sqlite_connection = sqlite3.connect(os.getenv('SQLITE_DB'))
+    try:
+        install_change_tracking(sqlite_connection)
+    finally:
+        sqlite_connection.close()
@@ -0,0 +1,140 @@
+import logging
+from typing import Optional
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """
+    Хранит в PostgreSQL последний перенесённый rowid для каждой задачи переноса.
+
+    Контрольная точка записывается в той же транзакции, что и партия данных,
+    поэтому после сбоя перенос продолжается ровно с первой незафиксированной партии.
+    """
+    STATE_TABLE = 'content.migration_state'
+
+    def __init__(self, connection: psycopg.Connection) -> None:
+        """
+        Инициализирует объект CheckpointStore.
+
+        :param connection: Объект подключения к PostgreSQL.
+        """
+        self.connection = connection
+
+    @classmethod
+    def create_table(cls, connection: psycopg.Connection) -> None:
+        """Создаёт таблицу состояния, если её ещё нет. Вызывается один раз до запуска исполнителей."""
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {cls.STATE_TABLE} (
+                task TEXT PRIMARY KEY,
+                last_key BIGINT NOT NULL,
+                rows BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        connection.commit()
+
+    @staticmethod
+    def task_name(table_name: str, rowid_range: Optional[tuple[int, int]] = None) -> str:
+        """Возвращает имя задачи: таблица или таблица с диапазоном rowid шарда."""
+        if rowid_range is None:
+            return table_name
+        return f'{table_name}:{rowid_range[0]}-{rowid_range[1]}'
+
+    def get(self, task: str) -> Optional[int]:
+        """Возвращает последний зафиксированный rowid задачи или None, если задача ещё не запускалась."""
+        row = self.connection.execute(
+            f"SELECT last_key FROM {self.STATE_TABLE} WHERE task = %s", [task]
+        ).fetchone()
+        if row is None:
+            return None
+        return row['last_key'] if isinstance(row, dict) else row[0]
+
+    def exists(self) -> bool:
+        """Есть ли сохранённые контрольные точки (следующий перенос продолжит прежний)."""
+        row = self.connection.execute(f"SELECT EXISTS (SELECT 1 FROM {self.STATE_TABLE})").fetchone()
+        return row['exists'] if isinstance(row, dict) else row[0]
+
+    def save(self, cursor: psycopg.Cursor, task: str, last_key: int, rows: int) -> None:
+        """
+        Записывает контрольную точку в текущей транзакции курсора.
+
+        :param cursor: Курсор, которым записывается партия данных.
+        :param task: Имя задачи.
+        :param last_key: Последний rowid записанной партии.
+        :param rows: Количество строк в партии.
+        """
+        cursor.execute(
+            f"""
+            INSERT INTO {self.STATE_TABLE} (task, last_key, rows)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (task) DO UPDATE
+            SET last_key = EXCLUDED.last_key,
+                rows = migration_state.rows + EXCLUDED.rows,
+                updated_at = CURRENT_TIMESTAMP;
+            """,
+            [task, last_key, rows],
+        )
+
+    def reset(self, table_name: Optional[str] = None) -> None:
+        """Удаляет контрольные точки таблицы (включая её шарды) или все контрольные точки."""
+        if table_name is None:
+            self.connection.execute(f"DELETE FROM {self.STATE_TABLE}")
+        else:
+            self.connection.execute(
+                f"DELETE FROM {self.STATE_TABLE} WHERE task = %s OR task LIKE %s",
+                [table_name, f'{table_name}:%'],
+            )
+        self.connection.commit()
+        logger.info(f"Checkpoints reset for {table_name or 'all tables'}")
+
+
+class WatermarkStore:
+    """
+    Хранит в PostgreSQL отметки инкрементальной синхронизации:
+    последний перенесённый updated_at и последний применённый номер записи журнала изменений SQLite.
+    """
+    STATE_TABLE = 'content.sync_watermark'
+
+    def __init__(self, connection: psycopg.Connection) -> None:
+        """
+        Инициализирует объект WatermarkStore.
+
+        :param connection: Объект подключения к PostgreSQL.
+        """
+        self.connection = connection
+
+    @classmethod
+    def create_table(cls, connection: psycopg.Connection) -> None:
+        """Создаёт таблицу отметок, если её ещё нет. Вызывается один раз до запуска исполнителей."""
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {cls.STATE_TABLE} (
+                task TEXT PRIMARY KEY,
+                watermark TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        connection.commit()
+
+    def get(self, task: str) -> Optional[str]:
+        """Возвращает сохранённую отметку задачи или None."""
+        row = self.connection.execute(
+            f"SELECT watermark FROM {self.STATE_TABLE} WHERE task = %s", [task]
+        ).fetchone()
+        if row is None:
+            return None
+        return row['watermark'] if isinstance(row, dict) else row[0]
+
+    def save(self, cursor: psycopg.Cursor, task: str, watermark: str) -> None:
+        """Записывает отметку в текущей транзакции курсора."""
+        cursor.execute(
+            f"""
+            INSERT INTO {self.STATE_TABLE} (task, watermark)
+            VALUES (%s, %s)
+            ON CONFLICT (task) DO UPDATE
+            SET watermark = EXCLUDED.watermark,
+                updated_at = CURRENT_TIMESTAMP;
+            """,
+            [task, watermark],
+        )
@@ -0,0 +1,176 @@
+import logging
+from dataclasses import dataclass, field, fields
+from typing import Any, Optional
+from uuid import UUID
+from row_converters import FLOAT_FIELDS, TIMESTAMP_FIELDS, parse_timestamp, validate_uuid
+
+try:
+    import numpy as np
+except ImportError:  # NumPy нужен только для столбцового режима
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Ограничения rating из DDL: CHECK (rating >= 0 AND rating <= 10) и тип DECIMAL(2,1),
+# который после округления до одного знака не вмещает значения от 10.0
+RATING_MIN, RATING_MAX_EXCLUSIVE = 0.0, 10.0
+
+UUID_LENGTH = 36
+UUID_HYPHENS = (8, 13, 18, 23)
+
+
+@dataclass
+class ColumnarBatch:
+    """Партия в виде типизированных столбцов с отметками об отбракованных строках."""
+    names: list[str]
+    columns: list[Any]
+    # Номер строки в исходной партии -> причина отбраковки
+    bad_rows: dict[int, str] = field(default_factory=dict)
+    # Исходные строки партии: по ним восстанавливаются значения отбракованных строк
+    rows: list[tuple] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) - len(self.bad_rows) if self.columns else 0
+
+    def to_records(self) -> list[tuple]:
+        """Возвращает корректные строки кортежами Python-значений в порядке столбцов."""
+        good = np.ones(len(self.columns[0]), dtype=bool)
+        good[list(self.bad_rows)] = False
+        return list(zip(*(column[good].tolist() for column in self.columns)))
+
+    def rejected_records(self) -> list[tuple[dict, str]]:
+        """Отбракованные строки: исходные значения по столбцам и причина отбраковки."""
+        return [(dict(zip(self.names, self.rows[index])), reason) for index, reason in sorted(self.bad_rows.items())]
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("Columnar mode requires NumPy: pip install numpy")
+
+
+def _hex_table() -> 'np.ndarray':
+    table = np.zeros(128, dtype=bool)
+    for char in '0123456789abcdefABCDEF':
+        table[ord(char)] = True
+    return table
+
+
+class ColumnarValidator:
+    """
+    Проверяет и приводит партии строк SQLite по столбцам векторными операциями NumPy.
+
+    Ошибочные значения не прерывают обработку: номера таких строк и причины
+    собираются в ColumnarBatch.bad_rows, остальные строки передаются дальше.
+    """
+
+    def __init__(self, dataclass: type) -> None:
+        """
+        Инициализирует объект ColumnarValidator.
+
+        :param dataclass: Датакласс, описывающий порядок и типы столбцов.
+        :raises RuntimeError: Если NumPy не установлен.
+        """
+        _require_numpy()
+        self.names = [f.name for f in fields(dataclass)]
+        self.kinds = [
+            'uuid' if f.type == UUID else 'float' if f.name in FLOAT_FIELDS
+            else 'timestamp' if f.name in TIMESTAMP_FIELDS else ''
+            for f in fields(dataclass)
+        ]
+        self._is_hex = _hex_table()
+        self._hyphen_mask = np.zeros(UUID_LENGTH, dtype=bool)
+        self._hyphen_mask[list(UUID_HYPHENS)] = True
+
+    def validate(self, rows: list[tuple]) -> ColumnarBatch:
+        """
+        Разворачивает партию в столбцы и проверяет их.
+
+        :param rows: Строки SQLite в порядке полей датакласса.
+        :return: Столбцовая партия с номерами отбракованных строк.
+        :raises TypeError: Если ширина строк не совпадает с числом полей.
+        """
+        if rows and len(rows[0]) != len(self.names):
+            raise TypeError(f"Expected {len(self.names)} columns, got {len(rows[0])}")
+
+        bad_rows: dict[int, str] = {}
+        columns = []
+        for index, (name, kind) in enumerate(zip(self.names, self.kinds)):
+            raw = np.empty(len(rows), dtype=object)
+            raw[:] = [row[index] for row in rows]
+            if kind == 'uuid':
+                column = self._validate_uuids(name, raw, bad_rows)
+            elif kind == 'float' and name == 'rating':
+                column = self._validate_ratings(raw, bad_rows)
+            elif kind == 'float':
+                column = self._to_float(name, raw, bad_rows)
+            elif kind == 'timestamp':
+                column = self._validate_timestamps(name, raw, bad_rows)
+            else:
+                column = raw
+            columns.append(column)
+
+        if bad_rows:
+            logger.warning(f"{len(bad_rows)} of {len(rows)} rows rejected: {dict(list(bad_rows.items())[:5])}")
+        return ColumnarBatch(self.names, columns, bad_rows, rows)
+
+    def _validate_uuids(self, name: str, raw: 'np.ndarray', bad_rows: dict[int, str]) -> 'np.ndarray':
+        """Проверяет каноническую запись UUID по кодам символов; прочие формы проверяет UUID()."""
+        is_str = np.fromiter((isinstance(value, str) for value in raw), dtype=bool, count=len(raw))
+        text = np.where(is_str, raw, '').astype(str)
+        valid = np.char.str_len(text) == UUID_LENGTH
+
+        codes = text[valid].astype(f'U{UUID_LENGTH}').view(np.uint32).reshape(-1, UUID_LENGTH)
+        hex_ok = self._is_hex[np.minimum(codes, 127)] & (codes < 128)
+        layout_ok = np.where(self._hyphen_mask, codes == ord('-'), hex_ok).all(axis=1)
+        valid[np.flatnonzero(valid)[~layout_ok]] = False
+
+        # Нестандартные формы UUID и значения других типов (редкость) проверяются по одному
+        for row_index in np.flatnonzero(~valid):
+            try:
+                validate_uuid(raw[row_index])
+            except ValueError as e:
+                bad_rows.setdefault(int(row_index), f'{name}: {e}')
+        return raw
+
+    def _to_float(self, name: str, raw: 'np.ndarray', bad_rows: dict[int, str]) -> 'np.ndarray':
+        """Приводит столбец к float64 (NULL -> NaN); неприводимые значения отбраковываются."""
+        try:
+            return np.array(raw.tolist(), dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+        column = np.full(len(raw), np.nan)
+        for row_index, value in enumerate(raw):
+            try:
+                column[row_index] = np.nan if value is None else float(value)
+            except (TypeError, ValueError):
+                bad_rows.setdefault(row_index, f'{name}: not a number: {value!r}')
+        return column
+
+    def _validate_ratings(self, raw: 'np.ndarray', bad_rows: dict[int, str]) -> 'np.ndarray':
+        """Приводит rating к числу и проверяет диапазон из DDL."""
+        column = self._to_float('rating', raw, bad_rows)
+        out_of_range = ~np.isnan(column) & ((column < RATING_MIN) | (np.round(column, 1) >= RATING_MAX_EXCLUSIVE))
+        for row_index in np.flatnonzero(out_of_range):
+            bad_rows.setdefault(int(row_index), f'rating: out of range: {column[row_index]}')
+        return np.where(np.isnan(column), None, column.astype(object))
+
+    def _validate_timestamps(self, name: str, raw: 'np.ndarray', bad_rows: dict[int, str]) -> 'np.ndarray':
+        """Разбирает отметки 'YYYY-MM-DD HH:MM:SS.ffffff+00' в datetime64[us] одним вызовом."""
+        is_null = np.fromiter((value is None for value in raw), dtype=bool, count=len(raw))
+        text = np.where(is_null, '', raw).astype(str)
+        well_formed = (np.char.str_len(text) > 22) & np.char.endswith(text, '+00')
+        well_formed &= np.char.find(text, ' ') == 10
+
+        column = np.full(len(raw), np.datetime64('NaT'), dtype='datetime64[us]')
+        try:
+            column[well_formed] = np.char.partition(text[well_formed], '+')[:, 0].astype('datetime64[us]')
+        except ValueError:
+            # Есть значения, которые NumPy не смог разобрать: разбираем партию по одному
+            well_formed[:] = False
+
+        for row_index in np.flatnonzero(~well_formed & ~is_null):
+            try:
+                column[row_index] = parse_timestamp(raw[row_index])
+            except (TypeError, ValueError) as e:
+                bad_rows.setdefault(int(row_index), f'{name}: {e}')
+        return np.where(is_null, None, column.astype(object))
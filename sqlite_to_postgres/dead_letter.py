@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+from datetime import datetime, timezone
+import psycopg
+from psycopg.rows import tuple_row
+
+logger = logging.getLogger(__name__)
+
+# off - ошибка партии останавливает перенос, jsonl - отбракованные строки пишутся в файл,
+# table - в таблицу content.migration_dead_letter (в транзакции партии).
+# Записи относятся к текущему переносу: новый перенос (не продолжение по контрольным точкам)
+# начинается с clear(), поэтому проверка исключает только строки, отложенные им самим
+DEAD_LETTER_MODES = ('off', 'jsonl', 'table')
+
+
+class JsonlDeadLetter:
+    """
+    Записывает строки, отвергнутые PostgreSQL, в JSONL-файл: по одной строке JSON на запись.
+
+    Файл открывается на дозапись, каждая запись - один вызов write, поэтому в него могут
+    писать несколько процессов переноса одновременно.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Инициализирует объект JsonlDeadLetter.
+
+        :param path: Путь к файлу.
+        """
+        self.path = path
+
+    def write(self, cursor: psycopg.Cursor, table_name: str, record: dict, error: str) -> None:
+        """
+        Сохраняет отвергнутую строку.
+
+        :param cursor: Курсор транзакции партии (не используется).
+        :param table_name: Имя таблицы.
+        :param record: Значения строки по столбцам.
+        :param error: Текст ошибки PostgreSQL.
+        """
+        line = json.dumps({
+            'table': table_name,
+            'record': record,
+            'error': error,
+            'pid': os.getpid(),
+            'rejected_at': datetime.now(timezone.utc).isoformat(),
+        }, default=str, ensure_ascii=False)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+    def clear(self, connection: psycopg.Connection) -> None:
+        """
+        Начинает новый перенос: прежний файл переименовывается в <path>.previous.
+
+        :param connection: Соединение с PostgreSQL (не используется).
+        """
+        if os.path.exists(self.path):
+            os.replace(self.path, f'{self.path}.previous')
+
+    def rejected_ids(self, connection: psycopg.Connection) -> dict[str, frozenset[str]]:
+        """
+        id отложенных строк по таблицам - чтобы проверка переноса не считала их потерянными.
+
+        :param connection: Соединение с PostgreSQL (не используется).
+        """
+        ids: dict[str, set[str]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    ids.setdefault(entry['table'], set()).add(str(entry['record'].get('id')))
+        return {table: frozenset(table_ids) for table, table_ids in ids.items()}
+
+
+class TableDeadLetter:
+    """
+    Записывает отвергнутые строки в таблицу PostgreSQL в той же транзакции, что и партию:
+    после сбоя партия и её отбракованные строки либо обе зафиксированы, либо обе нет.
+    """
+    DEAD_LETTER_TABLE = 'content.migration_dead_letter'
+
+    @classmethod
+    def create_table(cls, connection: psycopg.Connection) -> None:
+        """Создаёт таблицу, если её ещё нет. Вызывается один раз до запуска исполнителей."""
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {cls.DEAD_LETTER_TABLE} (
+                id BIGSERIAL PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                record JSONB NOT NULL,
+                error TEXT NOT NULL,
+                rejected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        connection.commit()
+
+    def write(self, cursor: psycopg.Cursor, table_name: str, record: dict, error: str) -> None:
+        """
+        Сохраняет отвергнутую строку в текущей транзакции курсора.
+
+        :param cursor: Курсор транзакции партии.
+        :param table_name: Имя таблицы.
+        :param record: Значения строки по столбцам.
+        :param error: Текст ошибки PostgreSQL.
+        """
+        cursor.execute(
+            f"INSERT INTO {self.DEAD_LETTER_TABLE} (table_name, record, error) VALUES (%s, %s::jsonb, %s)",
+            [table_name, json.dumps(record, default=str, ensure_ascii=False), error],
+        )
+
+    def clear(self, connection: psycopg.Connection) -> None:
+        """
+        Начинает новый перенос: удаляет строки, отложенные прежними переносами.
+
+        :param connection: Соединение с PostgreSQL.
+        """
+        connection.execute(f"DELETE FROM {self.DEAD_LETTER_TABLE}")
+        connection.commit()
+
+    def rejected_ids(self, connection: psycopg.Connection) -> dict[str, frozenset[str]]:
+        """
+        id отложенных строк по таблицам - чтобы проверка переноса не считала их потерянными.
+
+        :param connection: Соединение с PostgreSQL.
+        """
+        with connection.cursor(row_factory=tuple_row) as cursor:
+            rows = cursor.execute(f"SELECT DISTINCT table_name, record->>'id' FROM {self.DEAD_LETTER_TABLE}").fetchall()
+        ids: dict[str, set[str]] = {}
+        for table_name, record_id in rows:
+            ids.setdefault(table_name, set()).add(record_id)
+        return {table: frozenset(table_ids) for table, table_ids in ids.items()}
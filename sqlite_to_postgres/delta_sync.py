@@ -0,0 +1,54 @@
+import logging
+import sqlite3
+import psycopg
+from change_tracking import FULLY_TRACKED_TABLES, read_changes
+from checkpoint import WatermarkStore
+from postgres_saver import PostgresSaver
+from sqlite_loader import TABLES_WITH_UPDATED_AT, SQLiteLoader
+
+logger = logging.getLogger(__name__)
+
+
+def sync_table(cursor: sqlite3.Cursor, pg_conn: psycopg.Connection, table_name: str,
+               write_mode: str = 'insert', batch: int = 100) -> int:
+    """
+    Инкрементально синхронизирует таблицу с PostgreSQL.
+
+    Сначала применяются удаления и (для таблиц-связок) вставки и изменения из журнала SQLite,
+    затем для основных таблиц переносятся строки с updated_at не раньше сохранённой отметки.
+    Все строки записываются через ON CONFLICT (id) DO UPDATE, отметки сохраняются
+    в одной транзакции с данными.
+
+    :param cursor: Курсор SQLite.
+    :param pg_conn: Подключение к PostgreSQL.
+    :param table_name: Имя таблицы.
+    :param write_mode: Режим записи PostgresSaver.
+    :param batch: Размер партии.
+    :return: Количество вставленных, обновлённых и удалённых строк.
+    """
+    watermarks = WatermarkStore(pg_conn)
+    saver = PostgresSaver(pg_conn, table_name, batch=batch, mode=write_mode, on_conflict='update')
+    synced = 0
+
+    # Журнал изменений: удаления для всех таблиц, вставки и изменения для таблиц-связок
+    log_task = f'{table_name}:change_log'
+    loader = SQLiteLoader(cursor, table_name, batch=batch)
+    for changes in read_changes(cursor, table_name, int(watermarks.get(log_task) or 0), batch):
+        synced += saver.delete_ids(changes.deleted_ids)
+        if table_name in FULLY_TRACKED_TABLES and changes.upserted_ids:
+            synced += saver.save_all_data([loader.load_by_ids(changes.upserted_ids)])
+        watermarks.save(pg_conn.cursor(), log_task, str(changes.last_seq))
+        pg_conn.commit()
+
+    # Основные таблицы: строки, изменённые после сохранённой отметки updated_at
+    if table_name in TABLES_WITH_UPDATED_AT:
+        updated_task = f'{table_name}:updated_at'
+        since = watermarks.get(updated_task) or ''
+        loader = SQLiteLoader(cursor, table_name, batch=batch, updated_after=since)
+        synced += saver.save_all_data(
+            loader.load_movies(),
+            checkpoint=lambda pg_cursor, rows: watermarks.save(pg_cursor, updated_task, loader.last_updated_at),
+        )
+
+    logger.info(f"Table '{table_name}' synced incrementally: {synced} rows changed")
+    return synced
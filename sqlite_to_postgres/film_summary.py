@@ -0,0 +1,36 @@
+import logging
+import time
+
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+# Материализованное представление с жанрами и участниками фильма (schema_design/movies_database.ddl)
+SUMMARY_VIEW = 'film_work_summary'
+
+
+def refresh_film_summary(dsl: dict, schema: str = 'content') -> bool:
+    """
+    Обновляет представление film_work_summary после переноса.
+
+    Заполненное представление обновляется CONCURRENTLY: читатели (выгрузки) видят
+    прежние строки до конца обновления. Незаполненное (WITH NO DATA) обновляется обычным REFRESH,
+    CONCURRENTLY для него недоступен.
+
+    :param dsl: Параметры подключения к PostgreSQL.
+    :param schema: Схема представления.
+    :return: False, если представления нет (схема создана до его появления).
+    """
+    with psycopg.connect(**dsl, autocommit=True) as connection:
+        row = connection.execute(
+            "SELECT ispopulated FROM pg_matviews WHERE schemaname = %s AND matviewname = %s",
+            [schema, SUMMARY_VIEW],
+        ).fetchone()
+        if row is None:
+            logger.warning(f"Materialized view {schema}.{SUMMARY_VIEW} does not exist, skipping refresh")
+            return False
+        concurrently = 'CONCURRENTLY ' if row[0] else ''
+        started = time.perf_counter()
+        connection.execute(f'REFRESH MATERIALIZED VIEW {concurrently}{schema}.{SUMMARY_VIEW}')
+    logger.info(f"Refreshed {schema}.{SUMMARY_VIEW} in {time.perf_counter() - started:.1f}s")
+    return True
@@ -3,7 +3,7 @@ from uuid import UUID
 from dataclasses_post_init_mixin import DataclassesPostInitMixin
 
 
-@dataclass
+@dataclass(slots=True)
 class FilmWork(DataclassesPostInitMixin):
     id: UUID
     title: str
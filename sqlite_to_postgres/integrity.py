@@ -0,0 +1,149 @@
+import json
+import logging
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+# Что делать со строками связей, ссылающимися на отсутствующие записи:
+# fail - остановить перенос до записи в PostgreSQL, skip - не переносить такие строки, off - не проверять
+INTEGRITY_POLICIES = ('fail', 'skip', 'off')
+
+# Внешние ключи таблиц связей: столбец -> таблица, на которую он ссылается
+LINK_REFERENCES = {
+    'genre_film_work': {'film_work_id': 'film_work', 'genre_id': 'genre'},
+    'person_film_work': {'film_work_id': 'film_work', 'person_id': 'person'},
+}
+PARENT_TABLES = ('film_work', 'genre', 'person')
+
+FETCH_SIZE = 10_000
+
+
+def uuid_key(value) -> Optional[bytes]:
+    """Компактный ключ UUID (16 байт); None для значения, которое не является UUID."""
+    if isinstance(value, UUID):
+        return value.bytes
+    try:
+        return UUID(value).bytes
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+@dataclass
+class Orphan:
+    """Строка таблицы связей, ссылающаяся на отсутствующую запись."""
+    table: str
+    id: str
+    column: str
+    value: Optional[str]
+    reason: str
+
+
+@dataclass
+class IntegrityReport:
+    """Результат предварительной проверки ссылочной целостности."""
+    parents: dict[str, int] = field(default_factory=dict)
+    checked: dict[str, int] = field(default_factory=dict)
+    orphans: list[Orphan] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.orphans
+
+    def orphan_ids(self) -> dict[str, frozenset[str]]:
+        """id строк-сирот по таблицам - для исключения их из переноса."""
+        ids: dict[str, set[str]] = {}
+        for orphan in self.orphans:
+            ids.setdefault(orphan.table, set()).add(orphan.id)
+        return {table: frozenset(table_ids) for table, table_ids in ids.items()}
+
+    def write(self, path: str) -> None:
+        """Сохраняет отчёт в JSON."""
+        with open(path, 'w') as f:
+            json.dump({
+                'parents': self.parents,
+                'checked': self.checked,
+                'orphans': [orphan.__dict__ for orphan in self.orphans],
+            }, f, indent=2)
+
+
+class ParentIdIndex:
+    """
+    Множества id родительских таблиц в виде 16-байтовых ключей.
+
+    Проверка ссылки - поиск в хеш-множестве за O(1); 16-байтовые ключи вдвое
+    компактнее строк UUID, так что множества для миллионов записей помещаются в памяти.
+    """
+
+    def __init__(self) -> None:
+        self.ids: dict[str, set[bytes]] = {table: set() for table in PARENT_TABLES}
+
+    def add_rows(self, table_name: str, rows: Iterable[tuple]) -> None:
+        """Добавляет id строк (первый столбец) родительской таблицы."""
+        ids = self.ids[table_name]
+        for row in rows:
+            key = uuid_key(row[0])
+            if key is not None:
+                ids.add(key)
+
+    def load(self, connection: sqlite3.Connection) -> None:
+        """Читает id всех родительских таблиц из SQLite (только столбец id, без преобразования строк)."""
+        for table_name in PARENT_TABLES:
+            cursor = connection.execute(f'SELECT id FROM {table_name}')
+            while rows := cursor.fetchmany(FETCH_SIZE):
+                self.add_rows(table_name, rows)
+
+    def check_links(self, table_name: str, rows: Iterable[tuple], columns: list[str]) -> list[Orphan]:
+        """
+        Проверяет строки таблицы связей.
+
+        :param table_name: Имя таблицы связей.
+        :param rows: Строки (id, значения столбцов columns).
+        :param columns: Проверяемые столбцы-ссылки.
+        :return: Найденные строки-сироты.
+        """
+        references = [(column, self.ids[LINK_REFERENCES[table_name][column]]) for column in columns]
+        orphans = []
+        for row in rows:
+            for (column, parent_ids), value in zip(references, row[1:]):
+                key = uuid_key(value)
+                if key is None:
+                    orphans.append(Orphan(table_name, row[0], column, value, 'invalid UUID'))
+                elif key not in parent_ids:
+                    parent = LINK_REFERENCES[table_name][column]
+                    orphans.append(Orphan(table_name, row[0], column, value, f'missing in {parent}'))
+                else:
+                    continue
+                # Одной причины на строку достаточно
+                break
+        return orphans
+
+
+def check_integrity(connection: sqlite3.Connection) -> IntegrityReport:
+    """
+    Предварительная проверка: все ли строки таблиц связей ссылаются на существующие записи.
+
+    :param connection: Соединение с SQLite.
+    :return: Отчёт со строками-сиротами.
+    """
+    index = ParentIdIndex()
+    index.load(connection)
+
+    report = IntegrityReport(parents={table: len(ids) for table, ids in index.ids.items()})
+    for table_name, references in LINK_REFERENCES.items():
+        columns = list(references)
+        cursor = connection.execute(f"SELECT id, {', '.join(columns)} FROM {table_name}")
+        checked = 0
+        while rows := cursor.fetchmany(FETCH_SIZE):
+            checked += len(rows)
+            report.orphans += index.check_links(table_name, rows, columns)
+        report.checked[table_name] = checked
+
+    if report.ok:
+        logger.info(f"Integrity check passed: {report.checked}")
+    else:
+        by_table = {table: len(ids) for table, ids in report.orphan_ids().items()}
+        logger.warning(f"Integrity check found orphan rows: {by_table}; first: {report.orphans[0]}")
+    return report
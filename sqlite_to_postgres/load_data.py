@@ -1,13 +1,32 @@
-import sqlite3
+import asyncio
 import psycopg
 import os
 import logging
+from dataclasses import dataclass, field, replace
+from contextlib import nullcontext
+from functools import partial
+from typing import Optional, Union
 from psycopg import ClientCursor, connection as _connection
-from contextlib import contextmanager
 from psycopg.rows import dict_row
-from postgres_saver import PostgresSaver
+from admin_cache import clear_admin_cache
+from async_pipeline import AsyncMigrationPipeline
+from batch_sizer import AdaptiveBatchSizer
+from bulk_mode import BulkLoadMode
+from checkpoint import CheckpointStore, WatermarkStore
+from dead_letter import JsonlDeadLetter, TableDeadLetter
+from delta_sync import sync_table
+from film_summary import refresh_film_summary
+from integrity import check_integrity
+from metrics import TableMetrics, metrics_path
+from postgres_saver import CommitPolicy, PostgresSaver
+from profiling import TableProfiler
+from scheduler import TableScheduler
+from sharding import ShardedMigrator, split_rowid_ranges
 from sqlite_loader import SQLiteLoader
+from sqlite_source import SQLiteSource
+from staging import STAGING_SCHEMA, StagingArea
 from test_transfer import TestTransfer
+from verification import TransferVerifier
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,26 +34,229 @@ load_dotenv()
 # Логирование
 logging.basicConfig(level=logging.INFO)
 
-# Контекстный менеджер для SQLite
-@contextmanager
-def open_db(file_name: str):
-    conn = sqlite3.connect(file_name)
-    try:
-        logging.info("Creating SQLite connection")
-        yield conn.cursor()  # Возвращаем курсор
-    finally:
-        logging.info("Closing SQLite connection")
-        conn.commit()
-        conn.close()
-
-def load_from_sqlite(cursor: ClientCursor, pg_conn: _connection, table_name: str):
+TABLES = ['film_work', 'genre', 'genre_film_work', 'person', 'person_film_work']
+
+
+@dataclass(frozen=True)
+class MigrationConfig:
+    """Параметры переноса, передаваемые в процессы-исполнители."""
+    sqlite_db: str
+    dsl: dict
+    # Считать файл SQLite неизменяемым (без блокировок); только если в него никто не пишет во время переноса
+    sqlite_immutable: bool = True
+    sqlite_mmap_mb: int = 256
+    sqlite_cache_mb: int = 64
+    write_mode: str = 'insert'
+    # Таблицы, которые переносятся параллельно по диапазонам rowid
+    sharded_tables: frozenset[str] = field(default_factory=frozenset)
+    shard_workers: int = 1
+    # Фиксировать каждую партию вместе с контрольной точкой в content.migration_state
+    # (контрольные точки удаляются после успешного переноса всех таблиц)
+    resumable: bool = False
+    # full - полный перенос, delta - инкрементальная синхронизация по updated_at и журналу изменений SQLite
+    sync_mode: str = 'full'
+    # Передавать строки из SQLite в PostgreSQL кортежами, без создания объектов dataclass
+    raw_rows: bool = False
+    # Проверять партии по столбцам средствами NumPy (включает raw_rows)
+    columnar: bool = False
+    batch_size: int = 100
+    # Подбирать размер партии каждой таблицы по времени обработки партии и памяти (batch_size - начальный размер)
+    adaptive_batch: bool = False
+    batch_target_seconds: float = 0.5
+    batch_memory_limit_mb: int = 64
+    # sync - последовательная цепочка генераторов, async - асинхронный конвейер с одновременными стадиями
+    pipeline: str = 'sync'
+    async_writers: int = 2
+    # Каталог для снимков метрик (по файлу на таблицу или шард); None - только сводки в логе
+    metrics_dir: Optional[str] = None
+    metrics_format: str = 'prometheus'
+    # off | cpu | memory | all - профилирование каждой таблицы (шарда) в процессе, который её переносит
+    profile: str = 'off'
+    profile_dir: str = 'profiles'
+    # Схема, в которую пишутся данные: content или схема промежуточных таблиц (STAGING=1)
+    schema: str = 'content'
+    # id строк, исключённых из переноса (строки-сироты при INTEGRITY_POLICY=skip), по таблицам
+    excluded_ids: dict[str, frozenset[str]] = field(default_factory=dict)
+    # off | jsonl | table - куда откладывать строки, отвергнутые PostgreSQL, вместо остановки переноса
+    dead_letter: str = 'off'
+    dead_letter_path: str = 'dead_letter.jsonl'
+    # Фиксировать транзакцию записи каждые N строк и/или T секунд; без них - после каждой партии
+    # (RESUMABLE=1) или один раз в конце таблицы
+    commit_every_rows: Optional[int] = None
+    commit_every_seconds: Optional[float] = None
+
+    def validate(self) -> None:
+        """
+        Проверяет, что выбранные настройки можно выполнить вместе.
+
+        Асинхронный конвейер (async_pipeline.py) пишет партии executemany с фиксацией каждой партии
+        и не поддерживает остальные режимы записи, контрольные точки, dead letter, столбцовую проверку,
+        шарды, подбор размера партии, снимки метрик и инкрементальную синхронизацию; инкрементальная
+        синхронизация (delta_sync.py) не поддерживает dead letter. Вместо того чтобы
+        молча выполнить другой перенос, чем настроен, такие сочетания отвергаются.
+
+        :raises ValueError: Если настройки несовместимы.
+        """
+        if self.pipeline not in ('sync', 'async'):
+            raise ValueError(f"Invalid pipeline: {self.pipeline}. Expected 'sync' or 'async'.")
+        if self.dead_letter != 'off' and self.sync_mode == 'delta':
+            raise ValueError("DEAD_LETTER is supported only with SYNC_MODE=full")
+        if self.pipeline != 'async':
+            return
+        conflicts = [setting for setting, enabled in (
+            (f'SYNC_MODE={self.sync_mode}', self.sync_mode != 'full'),
+            (f'PG_WRITE_MODE={self.write_mode}', self.write_mode != 'insert'),
+            ('RESUMABLE=1', self.resumable),
+            (f'DEAD_LETTER={self.dead_letter}', self.dead_letter != 'off'),
+            ('COLUMNAR=1', self.columnar),
+            ('SHARDED_TABLES', bool(self.sharded_tables)),
+            ('ADAPTIVE_BATCH=1', self.adaptive_batch),
+            ('METRICS_DIR', self.metrics_dir is not None),
+            ('COMMIT_EVERY_ROWS/COMMIT_EVERY_SECONDS', self.commit_policy is not None),
+        ) if enabled]
+        if conflicts:
+            raise ValueError(f"PIPELINE=async does not support {', '.join(conflicts)}; "
+                             f"use PIPELINE=sync or turn these settings off")
+
+    @property
+    def sqlite_source(self) -> SQLiteSource:
+        """Источник SQLite: каждый исполнитель открывает через него собственное соединение только для чтения."""
+        return SQLiteSource(self.sqlite_db, immutable=self.sqlite_immutable, mmap_size_mb=self.sqlite_mmap_mb,
+                            cache_size_mb=self.sqlite_cache_mb)
+
+    @property
+    def commit_policy(self) -> Optional[CommitPolicy]:
+        if self.commit_every_rows is None and self.commit_every_seconds is None:
+            return None
+        return CommitPolicy(self.commit_every_rows, self.commit_every_seconds)
+
+
+def read_batches(sqlite_loader: SQLiteLoader, raw_rows: bool = False, columnar: bool = False):
+    """Выбирает способ чтения: объекты dataclass, проверенные кортежи или столбцы NumPy."""
+    if columnar:
+        return sqlite_loader.load_columns()
+    if raw_rows:
+        return sqlite_loader.load_rows()
+    return sqlite_loader.load_movies()
+
+
+def load_from_sqlite(cursor: ClientCursor, pg_conn: _connection, table_name: str, write_mode: str = 'insert',
+                     rowid_range: Optional[tuple[int, int]] = None, resumable: bool = False, raw_rows: bool = False,
+                     columnar: bool = False, batch_size: int = 100, metrics_dir: Optional[str] = None,
+                     metrics_format: str = 'prometheus', profiler: Optional[TableProfiler] = None,
+                     schema: str = 'content', exclude_ids: frozenset[str] = frozenset(),
+                     dead_letter: Optional[Union[JsonlDeadLetter, TableDeadLetter]] = None,
+                     commit_policy: Optional[CommitPolicy] = None,
+                     batch_sizer: Optional[AdaptiveBatchSizer] = None):
     """Основной метод загрузки данных из SQLite в Postgres"""
-    postgres_saver = PostgresSaver(pg_conn, table_name)
-    sqlite_loader = SQLiteLoader(cursor, table_name)
+    metrics = TableMetrics(
+        table_name,
+        shard='all' if rowid_range is None else f'{rowid_range[0]}-{rowid_range[1]}',
+        output=metrics_path(metrics_dir, table_name, rowid_range, metrics_format) if metrics_dir else None,
+        output_format=metrics_format,
+    )
+    # Профилировщик памяти получает уведомления о стадиях, чтобы замерить пик каждой из них
+    metrics.stage_listener = profiler
+    postgres_saver = PostgresSaver(pg_conn, table_name, batch=batch_size, mode=write_mode, raw=raw_rows or columnar,
+                                   metrics=metrics, schema=schema, dead_letter=dead_letter,
+                                   commit_policy=commit_policy)
+
+    if not resumable:
+        sqlite_loader = SQLiteLoader(cursor, table_name, batch=batch_size, rowid_range=rowid_range, metrics=metrics,
+                                     exclude_ids=exclude_ids, batch_sizer=batch_sizer)
+        metrics.total_rows = sqlite_loader.count_rows()
+        return postgres_saver.save_all_data(read_batches(sqlite_loader, raw_rows, columnar))
+
+    # Продолжаем с последней зафиксированной партии
+    checkpoints = CheckpointStore(pg_conn)
+    task = CheckpointStore.task_name(table_name, rowid_range)
+    start_key = checkpoints.get(task)
+    if start_key is not None:
+        logging.info(f"Resuming '{task}' after rowid {start_key}")
+    sqlite_loader = SQLiteLoader(cursor, table_name, batch=batch_size, rowid_range=rowid_range, start_key=start_key,
+                                 metrics=metrics, exclude_ids=exclude_ids, batch_sizer=batch_sizer)
+    # Оставшееся число строк - для расчёта скорости и времени до окончания
+    metrics.total_rows = sqlite_loader.count_rows()
+
+    data = read_batches(sqlite_loader, raw_rows, columnar)
+
+    return postgres_saver.save_all_data(
+        data, checkpoint=lambda pg_cursor, rows: checkpoints.save(pg_cursor, task, sqlite_loader.last_key, rows)
+    )
+
+
+def make_dead_letter(config: MigrationConfig) -> Optional[Union[JsonlDeadLetter, TableDeadLetter]]:
+    """Хранилище отвергнутых строк по настройке dead_letter или None, если ошибка должна останавливать перенос."""
+    if config.dead_letter == 'jsonl':
+        return JsonlDeadLetter(config.dead_letter_path)
+    if config.dead_letter == 'table':
+        return TableDeadLetter()
+    return None
+
+
+def make_batch_sizer(config: MigrationConfig, table_name: str) -> Optional[AdaptiveBatchSizer]:
+    """Подбор размера партии таблицы или None, если размер партии постоянный."""
+    if not config.adaptive_batch:
+        return None
+    return AdaptiveBatchSizer(table_name, initial=config.batch_size, target_seconds=config.batch_target_seconds,
+                              memory_limit=config.batch_memory_limit_mb * 2 ** 20)
+
+
+def profiled(config: MigrationConfig, table_name: str, rowid_range: Optional[tuple[int, int]] = None):
+    """Профилировщик таблицы (шарда) или пустой контекст, если профилирование выключено."""
+    if config.profile == 'off':
+        return nullcontext()
+    return TableProfiler(CheckpointStore.task_name(table_name, rowid_range), config.profile, config.profile_dir)
+
+
+def migrate_shard(config: MigrationConfig, table_name: str, rowid_range: Optional[tuple[int, int]] = None) -> int:
+    """
+    Переносит таблицу (или один её диапазон rowid) на собственных соединениях с SQLite и PostgreSQL.
 
-    data = sqlite_loader.load_movies()
+    :return: Количество записанных строк.
+    """
+    with (
+        profiled(config, table_name, rowid_range) as profiler,
+        config.sqlite_source.cursor() as sqlite_cursor,
+        psycopg.connect(**config.dsl, row_factory=dict_row, cursor_factory=ClientCursor) as pg_conn,
+    ):
+        return load_from_sqlite(
+            sqlite_cursor, pg_conn, table_name, config.write_mode, rowid_range, config.resumable, config.raw_rows,
+            config.columnar, config.batch_size, config.metrics_dir, config.metrics_format, profiler, config.schema,
+            config.excluded_ids.get(table_name, frozenset()), make_dead_letter(config), config.commit_policy,
+            make_batch_sizer(config, table_name),
+        )
 
-    postgres_saver.save_all_data(data)
+
+def migrate_table(config: MigrationConfig, table_name: str) -> int:
+    """
+    Переносит одну таблицу. Вызывается планировщиком в отдельном процессе или потоке.
+
+    Таблицы из config.sharded_tables делятся на диапазоны rowid и переносятся несколькими процессами.
+
+    :return: Количество записанных строк.
+    """
+    if config.sync_mode == 'delta':
+        with profiled(config, table_name), config.sqlite_source.cursor() as sqlite_cursor, psycopg.connect(
+                **config.dsl, row_factory=dict_row, cursor_factory=ClientCursor
+        ) as pg_conn:
+            return sync_table(sqlite_cursor, pg_conn, table_name, config.write_mode, config.batch_size)
+
+    if config.pipeline == 'async':
+        with profiled(config, table_name):
+            return asyncio.run(AsyncMigrationPipeline(
+                config.sqlite_source, config.dsl, table_name, batch=config.batch_size, writers=config.async_writers,
+                schema=config.schema, exclude_ids=config.excluded_ids.get(table_name, frozenset()),
+            ).run())
+
+    if table_name not in config.sharded_tables:
+        return migrate_shard(config, table_name)
+
+    with config.sqlite_source.cursor() as sqlite_cursor:
+        ranges = split_rowid_ranges(sqlite_cursor, table_name, config.shard_workers)
+
+    report = ShardedMigrator(partial(migrate_shard, config, table_name), config.shard_workers).run(table_name, ranges)
+    return report.rows
 
 
 if __name__ == '__main__':
@@ -46,15 +268,171 @@ if __name__ == '__main__':
         'port': os.getenv('DB_PORT')
 
     }
-    # Использование контекстного менеджера для SQLite и PostgreSQL
-    with open_db(file_name=os.getenv('SQLITE_DB')) as sqlite_cursor, psycopg.connect(
-            **dsl, row_factory=dict_row, cursor_factory=ClientCursor
-    ) as pg_conn:
-        # Перенос данных из SQLite в PostgreSQL
-        for table_name in ['film_work', 'genre', 'genre_film_work', 'person', 'person_film_work']:
-            load_from_sqlite(sqlite_cursor, pg_conn, table_name)
-
-        # Тестирование переноса данных
-        for table_name in ['film_work', 'genre', 'genre_film_work', 'person', 'person_film_work']:
-            TestTransfer(sqlite_cursor, pg_conn, table_name).test_transfer()
-            logging.info(f'Table {table_name} was successfully transferred to PostgreSQL.')
+    # Режим записи в PostgreSQL: insert (executemany), insert_pipeline (executemany в конвейерном режиме psycopg),
+    # copy или copy_binary.
+    # SHARDED_TABLES - таблицы через запятую, которые переносятся SHARD_WORKERS процессами по диапазонам rowid
+    config = MigrationConfig(
+        sqlite_db=os.getenv('SQLITE_DB'),
+        dsl=dsl,
+        # Живую базу при инкрементальной синхронизации открываем без immutable
+        sqlite_immutable=os.getenv('SQLITE_IMMUTABLE', '1' if os.getenv('SYNC_MODE', 'full') == 'full' else '0') == '1',
+        sqlite_mmap_mb=int(os.getenv('SQLITE_MMAP_MB', 256)),
+        sqlite_cache_mb=int(os.getenv('SQLITE_CACHE_MB', 64)),
+        write_mode=os.getenv('PG_WRITE_MODE', 'insert'),
+        sharded_tables=frozenset(filter(None, os.getenv('SHARDED_TABLES', '').split(','))),
+        shard_workers=int(os.getenv('SHARD_WORKERS', os.cpu_count() or 1)),
+        resumable=os.getenv('RESUMABLE', '0') == '1',
+        sync_mode=os.getenv('SYNC_MODE', 'full'),
+        raw_rows=os.getenv('RAW_ROWS', '0') == '1',
+        columnar=os.getenv('COLUMNAR', '0') == '1',
+        batch_size=int(os.getenv('BATCH_SIZE', 100)),
+        adaptive_batch=os.getenv('ADAPTIVE_BATCH', '0') == '1',
+        batch_target_seconds=float(os.getenv('BATCH_TARGET_SECONDS', 0.5)),
+        batch_memory_limit_mb=int(os.getenv('BATCH_MEMORY_LIMIT_MB', 64)),
+        pipeline=os.getenv('PIPELINE', 'sync'),
+        async_writers=int(os.getenv('ASYNC_WRITERS', 2)),
+        metrics_dir=os.getenv('METRICS_DIR') or None,
+        metrics_format=os.getenv('METRICS_FORMAT', 'prometheus'),
+        profile=os.getenv('PROFILE', 'off'),
+        profile_dir=os.getenv('PROFILE_DIR', 'profiles'),
+        dead_letter=os.getenv('DEAD_LETTER', 'off'),
+        dead_letter_path=os.getenv('DEAD_LETTER_PATH', 'dead_letter.jsonl'),
+        commit_every_rows=int(os.getenv('COMMIT_EVERY_ROWS')) if os.getenv('COMMIT_EVERY_ROWS') else None,
+        commit_every_seconds=float(os.getenv('COMMIT_EVERY_SECONDS')) if os.getenv('COMMIT_EVERY_SECONDS') else None,
+    )
+    config.validate()
+
+    # Число таблиц, переносимых одновременно, и способ их запуска (process или thread)
+    workers = int(os.getenv('MIGRATION_WORKERS', min(len(TABLES), os.cpu_count() or 1)))
+    executor = os.getenv('MIGRATION_EXECUTOR', 'process')
+
+    if config.metrics_dir:
+        os.makedirs(config.metrics_dir, exist_ok=True)
+
+    # STAGING=1: загрузка в UNLOGGED-таблицы схемы content_staging, проверка и атомарная подмена таблиц content
+    staging = None
+    if os.getenv('STAGING') == '1':
+        if config.sync_mode != 'full':
+            raise ValueError("STAGING=1 is supported only with SYNC_MODE=full")
+        staging = StagingArea(dsl, TABLES, lock_timeout=os.getenv('STAGING_LOCK_TIMEOUT', '10s'))
+        config = replace(config, schema=STAGING_SCHEMA)
+
+    # Предварительная проверка ссылок таблиц связей до записи в PostgreSQL:
+    # fail - остановиться с отчётом, skip - перенести всё, кроме строк-сирот, off - не проверять
+    integrity_policy = os.getenv('INTEGRITY_POLICY', 'fail')
+    if integrity_policy != 'off' and config.sync_mode == 'full':
+        with config.sqlite_source.cursor() as sqlite_cursor:
+            integrity = check_integrity(sqlite_cursor.connection)
+        if not integrity.ok:
+            report_path = os.getenv('INTEGRITY_REPORT', 'integrity_report.json')
+            integrity.write(report_path)
+            if integrity_policy == 'fail':
+                raise RuntimeError(f"{len(integrity.orphans)} rows reference missing records, see {report_path}")
+            config = replace(config, excluded_ids=integrity.orphan_ids())
+
+    # Таблицы состояния создаются до запуска исполнителей; RESET_CHECKPOINTS=1 начинает перенос заново
+    with psycopg.connect(**dsl, row_factory=dict_row) as pg_conn:
+        if config.dead_letter == 'table':
+            TableDeadLetter.create_table(pg_conn)
+        if config.sync_mode == 'delta':
+            WatermarkStore.create_table(pg_conn)
+        elif config.resumable:
+            CheckpointStore.create_table(pg_conn)
+            # Новые промежуточные таблицы пусты: контрольные точки прежних загрузок к ним не относятся
+            fresh_staging = staging is not None and staging.prepare(resume=os.getenv('RESET_CHECKPOINTS') != '1')
+            if os.getenv('RESET_CHECKPOINTS') == '1' or fresh_staging:
+                CheckpointStore(pg_conn).reset()
+        elif staging is not None:
+            staging.prepare(resume=False)
+
+        # Отложенные строки относятся к переносу целиком: при продолжении по контрольным точкам
+        # они сохраняются (их партии уже зафиксированы), новый перенос начинается с пустого dead letter
+        dead_letter = make_dead_letter(config)
+        resuming = config.resumable and config.sync_mode == 'full' and CheckpointStore(pg_conn).exists()
+        if dead_letter is not None and not resuming:
+            dead_letter.clear(pg_conn)
+
+    # BULK_MODE=1: первичная загрузка в пустые таблицы без вторичных индексов и ограничений,
+    # которые восстанавливаются после загрузки (при сбое - при следующем запуске)
+    # (промежуточные таблицы и так получают вторичные индексы только после загрузки)
+    bulk_mode = None
+    if os.getenv('BULK_MODE') == '1' and config.sync_mode == 'full' and staging is None:
+        bulk_mode = BulkLoadMode(
+            dsl, TABLES,
+            state_file=os.getenv('BULK_STATE_FILE', 'bulk_mode_state.json'),
+            maintenance_work_mem=os.getenv('BULK_MAINTENANCE_WORK_MEM', '1GB'),
+            workers=int(os.getenv('BULK_INDEX_WORKERS', 4)),
+        )
+        bulk_mode.disable()
+
+    # Перенос данных из SQLite в PostgreSQL с учётом зависимостей между таблицами
+    scheduler = TableScheduler(partial(migrate_table, config), workers=workers, executor=executor)
+    scheduler.run(TABLES)
+
+    # Все таблицы перенесены: следующий запуск - новый перенос, а не продолжение этого
+    if config.resumable and config.sync_mode == 'full':
+        with psycopg.connect(**dsl) as pg_conn:
+            CheckpointStore(pg_conn).reset()
+
+    if bulk_mode is not None:
+        bulk_mode.restore()
+
+    # Отложенные строки не переносились намеренно: проверка не должна считать их потерянными
+    if dead_letter is not None:
+        if staging is not None:
+            # У промежуточных таблиц нет внешних ключей: строки, ссылающиеся на отложенные,
+            # откладываются здесь, как их отвергли бы внешние ключи при записи в content
+            staging.reject_orphans(dead_letter)
+        with psycopg.connect(**dsl) as pg_conn:
+            rejected = dead_letter.rejected_ids(pg_conn)
+        if rejected:
+            logging.warning(f"Rows set aside in the dead letter: {({table: len(ids) for table, ids in rejected.items()})}")
+            config = replace(config, excluded_ids={
+                table: config.excluded_ids.get(table, frozenset()) | rejected.get(table, frozenset())
+                for table in TABLES
+            })
+
+    if staging is not None:
+        staging.build_indexes()
+        with config.sqlite_source.cursor() as sqlite_cursor:
+            problems = staging.verify(sqlite_cursor.connection, config.excluded_ids)
+        if problems:
+            raise RuntimeError(f"Staging tables were not published: {'; '.join(problems)}")
+        staging.publish()
+
+    # Представление film_work_summary строится по перенесённым данным; после публикации промежуточных
+    # таблиц оно уже построено заново вместе с ними. REFRESH_SUMMARY=0 - обновлять только по расписанию
+    if os.getenv('REFRESH_SUMMARY', '1') == '1' and staging is None:
+        refresh_film_summary(dsl)
+
+    # Счётчики фильтров и ответы автодополнения админки построены по прежним данным
+    clear_admin_cache(dsl, os.getenv('ADMIN_CACHE_TABLE', 'django_cache'))
+
+    # Проверка переноса: digest - сверка контрольных сумм диапазонов id, sample - выборочная сверка,
+    # rows - построчная проверка TestTransfer, off - без проверки. После инкрементальной синхронизации
+    # по умолчанию выполняется только выборочная сверка.
+    # Промежуточные таблицы уже проверены перед публикацией.
+    verify_mode = os.getenv('VERIFY_MODE', 'digest' if config.sync_mode == 'full' else 'sample')
+    if staging is not None:
+        verify_mode = 'off'
+    if verify_mode != 'off':
+        # Использование контекстного менеджера для SQLite и PostgreSQL
+        with config.sqlite_source.cursor() as sqlite_cursor, psycopg.connect(
+                **dsl, row_factory=dict_row, cursor_factory=ClientCursor
+        ) as pg_conn:
+            failed = []
+            # Тестирование переноса данных
+            for table_name in TABLES:
+                if verify_mode == 'rows':
+                    TestTransfer(sqlite_cursor.connection, pg_conn, table_name).test_transfer()
+                else:
+                    verifier = TransferVerifier(sqlite_cursor.connection, pg_conn, table_name,
+                                                exclude_ids=config.excluded_ids.get(table_name, frozenset()))
+                    report = verifier.verify() if verify_mode == 'digest' else verifier.quick_check()
+                    if not report.ok:
+                        failed.append(table_name)
+                        continue
+                logging.info(f'Table {table_name} was successfully transferred to PostgreSQL.')
+
+            if failed:
+                raise RuntimeError(f"Data mismatch in tables: {', '.join(failed)}")
@@ -0,0 +1,265 @@
+import json
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+# Стадии обработки партии: чтение из SQLite, проверка и приведение, сборка кортежей для записи,
+# запись в PostgreSQL, фиксация
+STAGES = ('fetch', 'convert', 'prepare', 'insert', 'commit')
+
+# Верхние границы корзин гистограммы времени стадии, секунды
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+OUTPUT_FORMATS = ('prometheus', 'json')
+
+# Как часто (в секундах) выводить сводку о ходе переноса таблицы
+LOG_INTERVAL = 10.0
+
+
+class StageListener(Protocol):
+    """Получает уведомления о начале и конце каждой стадии (например, для замера памяти по стадиям)."""
+
+    def stage_started(self, stage: str) -> None: ...
+
+    def stage_finished(self, stage: str) -> None: ...
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами в духе Prometheus: число наблюдений, сумма и счётчики корзин."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self) -> list[int]:
+        """Накопленные счётчики: число наблюдений не больше каждой границы."""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'buckets': {_format_bound(bound): count for bound, count in zip(BUCKETS, self.cumulative())},
+        }
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == math.inf else repr(bound)
+
+
+class TableMetrics:
+    """
+    Метрики переноса одной таблицы (или одного её шарда) в одном процессе.
+
+    Хранит счётчики строк, партий и ошибок, гистограммы времени стадий, считает скорость
+    и оставшееся время по заранее подсчитанному числу строк. Сводка о ходе переноса
+    выводится в лог не чаще раза в log_interval секунд и тогда же записывается в файл.
+    """
+
+    def __init__(self, table_name: str, shard: str = 'all', total_rows: Optional[int] = None,
+                 output: Optional[str] = None, output_format: str = 'prometheus',
+                 log_interval: float = LOG_INTERVAL) -> None:
+        """
+        Инициализирует объект TableMetrics.
+
+        :param table_name: Имя таблицы.
+        :param shard: Метка шарда (диапазон rowid) или 'all' для всей таблицы.
+        :param total_rows: Число строк, которые предстоит перенести (для расчёта оставшегося времени).
+        :param output: Файл для снимков метрик; None - снимки не записываются.
+        :param output_format: 'prometheus' (textfile collector) или 'json'.
+        :param log_interval: Минимальный интервал между сводками в логе, секунды.
+        :raises ValueError: Если формат вывода не поддерживается.
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Invalid metrics format: {output_format}. Choose one of {OUTPUT_FORMATS}.")
+
+        self.table_name = table_name
+        self.shard = shard
+        self.total_rows = total_rows
+        self.output = output
+        self.output_format = output_format
+        self.log_interval = log_interval
+
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.rejected = 0
+        # Текущий размер партии (меняется при подборе, см. batch_sizer.py)
+        self.batch_size: Optional[int] = None
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.started_at = time.monotonic()
+        self._reported_at = self.started_at
+        # Подключается только при профилировании; без него time() не делает лишних вызовов
+        self.stage_listener: Optional[StageListener] = None
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Измеряет время блока и добавляет его в гистограмму стадии."""
+        listener = self.stage_listener
+        if listener is not None:
+            listener.stage_started(stage)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage].observe(time.perf_counter() - started)
+            if listener is not None:
+                listener.stage_finished(stage)
+
+    def add_batch(self, rows: int, rejected: int = 0) -> None:
+        """Учитывает записанную партию (и отвергнутые строки) и при необходимости выводит сводку."""
+        self.rows += rows
+        self.rejected += rejected
+        self.batches += 1
+        self.report()
+
+    def add_error(self) -> None:
+        self.errors += 1
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Оставшееся время при текущей средней скорости; None, если число строк неизвестно."""
+        if self.total_rows is None or not self.rows:
+            return None
+        return max(self.total_rows - self.rows, 0) / self.rows_per_second
+
+    def summary(self) -> str:
+        """Строка о ходе переноса для лога."""
+        progress = f'{self.rows}'
+        if self.total_rows:
+            progress += f'/{self.total_rows} rows ({self.rows / self.total_rows:.1%})'
+        else:
+            progress += ' rows'
+        text = f"Table '{self.table_name}'"
+        if self.shard != 'all':
+            text += f" [{self.shard}]"
+        text += f": {progress}, {self.batches} batches, {self.rows_per_second:,.0f} rows/s"
+        if self.rejected:
+            text += f", {self.rejected} rejected"
+        if self.eta_seconds is not None:
+            text += f", ETA {self.eta_seconds:,.0f}s"
+        stage_times = ', '.join(
+            f'{stage} {histogram.sum / histogram.count * 1000:.1f}ms'
+            for stage, histogram in self.stages.items() if histogram.count
+        )
+        if stage_times:
+            text += f" (avg per batch: {stage_times})"
+        return text
+
+    def report(self, force: bool = False) -> None:
+        """
+        Выводит сводку и записывает снимок метрик, если с прошлой сводки прошло не меньше log_interval.
+
+        :param force: Вывести сводку независимо от интервала (в конце переноса).
+        """
+        now = time.monotonic()
+        if not force and now - self._reported_at < self.log_interval:
+            return
+        self._reported_at = now
+        logger.info(self.summary())
+        if self.output:
+            self.write(self.output)
+
+    def to_dict(self) -> dict:
+        return {
+            'table': self.table_name,
+            'shard': self.shard,
+            'rows': self.rows,
+            'total_rows': self.total_rows,
+            'batches': self.batches,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'batch_size': self.batch_size,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'eta_seconds': None if self.eta_seconds is None else round(self.eta_seconds, 1),
+            'stages': {stage: histogram.to_dict() for stage, histogram in self.stages.items()},
+        }
+
+    def to_prometheus(self) -> str:
+        """Снимок метрик в текстовом формате Prometheus (для node_exporter textfile collector)."""
+        labels = f'table="{self.table_name}",shard="{self.shard}"'
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, value: float) -> None:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name}{{{labels}}} {value}')
+
+        metric('migration_rows_total', 'counter', 'Rows written to PostgreSQL.', self.rows)
+        metric('migration_batches_total', 'counter', 'Batches written to PostgreSQL.', self.batches)
+        metric('migration_errors_total', 'counter', 'Batches that failed.', self.errors)
+        metric('migration_rejected_rows_total', 'counter', 'Rows sent to the dead letter sink.', self.rejected)
+        if self.batch_size is not None:
+            metric('migration_batch_size', 'gauge', 'Rows per batch read from SQLite.', self.batch_size)
+        if self.total_rows is not None:
+            metric('migration_rows_expected', 'gauge', 'Rows to transfer counted before the run.', self.total_rows)
+        metric('migration_rows_per_second', 'gauge', 'Average transfer rate.', round(self.rows_per_second, 1))
+        if self.eta_seconds is not None:
+            metric('migration_eta_seconds', 'gauge', 'Estimated time left.', round(self.eta_seconds, 1))
+
+        lines.append('# HELP migration_stage_seconds Time spent per batch in each stage.')
+        lines.append('# TYPE migration_stage_seconds histogram')
+        for stage, histogram in self.stages.items():
+            stage_labels = f'{labels},stage="{stage}"'
+            for bound, count in zip(BUCKETS, histogram.cumulative()):
+                lines.append(f'migration_stage_seconds_bucket{{{stage_labels},le="{_format_bound(bound)}"}} {count}')
+            lines.append(f'migration_stage_seconds_sum{{{stage_labels}}} {histogram.sum:.6f}')
+            lines.append(f'migration_stage_seconds_count{{{stage_labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """Атомарно записывает снимок метрик: сборщик никогда не увидит недописанный файл."""
+        content = self.to_prometheus() if self.output_format == 'prometheus' else json.dumps(self.to_dict(), indent=2)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'w') as f:
+                f.write(content)
+            os.replace(temporary, path)
+        except OSError as e:
+            # Метрики не должны останавливать перенос
+            logger.warning(f"Failed to write metrics to {path}: {e}")
+
+
+def metrics_path(directory: str, table_name: str, rowid_range: Optional[tuple[int, int]] = None,
+                 output_format: str = 'prometheus') -> str:
+    """
+    Путь к файлу метрик таблицы (или шарда) в каталоге вывода.
+
+    :param directory: Каталог для файлов метрик.
+    :param table_name: Имя таблицы.
+    :param rowid_range: Диапазон rowid шарда.
+    :param output_format: 'prometheus' (.prom) или 'json' (.json).
+    :return: Путь к файлу.
+    """
+    name = f'migration_{table_name}'
+    if rowid_range is not None:
+        name += f'_{rowid_range[0]}_{rowid_range[1]}'
+    return os.path.join(directory, f"{name}.{'prom' if output_format == 'prometheus' else 'json'}")
@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from uuid import UUID
 from dataclasses_post_init_mixin import DataclassesPostInitMixin
 
-@dataclass
+@dataclass(slots=True)
 class PersonFilmWork(DataclassesPostInitMixin):
     id: UUID
     person_id: UUID
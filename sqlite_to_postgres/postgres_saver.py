@@ -1,15 +1,61 @@
-from dataclasses import astuple, dataclass
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, fields as dataclass_fields
+from datetime import date
+from decimal import Decimal
+from operator import attrgetter
+from typing import Callable, Optional, Union
+from uuid import UUID
 import psycopg
 from psycopg.errors import DatabaseError
 import logging
+from dead_letter import JsonlDeadLetter, TableDeadLetter
 from film_work_dataclass import FilmWork
 from genre_dataclass import Genre
 from genre_film_work_dataclass import GenreFilmWork
+from metrics import TableMetrics
 from person_dataclass import Person
 from person_film_work_dataclass import PersonFilmWork
 
 logger = logging.getLogger(__name__)
 
+# Режимы записи: построчный executemany, executemany в конвейерном режиме psycopg (без ожидания ответа
+# на каждый оператор, ожидание только при фиксации) и потоковый COPY (текстовый и бинарный)
+WRITE_MODES = ('insert', 'insert_pipeline', 'copy', 'copy_binary')
+
+# Поведение при конфликте по первичному ключу: пропустить строку или обновить её (инкрементальная синхронизация)
+CONFLICT_ACTIONS = ('nothing', 'update')
+
+# Приведение значений к типам, которые ожидает бинарный COPY
+BINARY_COPY_ADAPTERS = {
+    'uuid': lambda value: value if isinstance(value, UUID) else UUID(value),
+    'date': lambda value: value if isinstance(value, date) else date.fromisoformat(value),
+    'numeric': lambda value: Decimal(str(value)),
+}
+
+
+@dataclass(frozen=True)
+class CommitPolicy:
+    """
+    Когда фиксировать транзакцию записи: после every_rows строк или через every_seconds секунд
+    после предыдущей фиксации, смотря что наступит раньше. Без ограничений фиксируется каждая партия.
+    """
+    every_rows: Optional[int] = None
+    every_seconds: Optional[float] = None
+
+    def due(self, rows: int, elapsed: float) -> bool:
+        """
+        Пора ли фиксировать транзакцию.
+
+        :param rows: Строк записано с последней фиксации.
+        :param elapsed: Секунд прошло с последней фиксации.
+        """
+        if self.every_rows is None and self.every_seconds is None:
+            return True
+        if self.every_rows is not None and rows >= self.every_rows:
+            return True
+        return self.every_seconds is not None and elapsed >= self.every_seconds
+
 
 class PostgresSaver:
     """
@@ -21,61 +67,123 @@ class PostgresSaver:
                 'dataclass': FilmWork,
                 'fields': ['id', 'title', 'description', 'creation_date', 'file_path', 'rating', 'type', 'created_at',
                            'updated_at'],
+                'pg_types': ['uuid', 'text', 'text', 'date', 'text', 'numeric', 'varchar', 'timestamp', 'timestamp'],
             },
         'genre':
             {
                 'dataclass': Genre,
                 'fields': ['id', 'name', 'description', 'created_at', 'updated_at'],
+                'pg_types': ['uuid', 'varchar', 'text', 'timestamp', 'timestamp'],
 
             },
         'person':
             {
                 'dataclass': Person,
-                'fields': ['id', 'full_name', 'created_at', 'updated_at', ]
+                'fields': ['id', 'full_name', 'created_at', 'updated_at', ],
+                'pg_types': ['uuid', 'varchar', 'timestamp', 'timestamp'],
 
             },
         'person_film_work':
             {
                 'dataclass': PersonFilmWork,
-                'fields': ['id', 'film_work_id', 'person_id', 'role', 'created_at']
+                'fields': ['id', 'film_work_id', 'person_id', 'role', 'created_at'],
+                'pg_types': ['uuid', 'uuid', 'uuid', 'varchar', 'timestamp'],
 
             },
         'genre_film_work':
             {
                 'dataclass': GenreFilmWork,
-                'fields': ['id', 'film_work_id', 'genre_id', 'created_at', ]
+                'fields': ['id', 'film_work_id', 'genre_id', 'created_at', ],
+                'pg_types': ['uuid', 'uuid', 'uuid', 'timestamp'],
             },
 
     }
 
-    def __init__(self, connection: psycopg.Connection, table_name: str, batch: int = 100):
+    def __init__(self, connection: psycopg.Connection, table_name: str, batch: int = 100,
+                 mode: str = 'insert', on_conflict: str = 'nothing', raw: bool = False,
+                 metrics: Optional[TableMetrics] = None, schema: str = 'content',
+                 dead_letter: Optional[Union[JsonlDeadLetter, TableDeadLetter]] = None,
+                 commit_policy: Optional[CommitPolicy] = None) -> None:
         """
         Инициализирует объект PostgresSaver.
 
         :param connection: Объект подключения к PostgreSQL.
         :param table_name: Имя таблицы для сохранения данных.
         :param batch: Размер партии данных для вставки (по умолчанию 100).
+        :param mode: Режим записи: 'insert' (executemany), 'insert_pipeline' (executemany в конвейерном режиме),
+            'copy' или 'copy_binary' (COPY через временную таблицу).
+        :param on_conflict: 'nothing' (ON CONFLICT DO NOTHING) или 'update' (ON CONFLICT (id) DO UPDATE).
+        :param raw: Партии уже состоят из проверенных кортежей (SQLiteLoader.load_rows) или столбцов
+            (SQLiteLoader.load_columns), а не из объектов dataclass.
+        :param metrics: Метрики таблицы: время записи и фиксации партий, счётчики строк и сводки о ходе переноса.
+        :param schema: Схема целевой таблицы (content или схема промежуточных таблиц, см. staging.py).
+        :param dead_letter: Куда откладывать строки, отвергнутые PostgreSQL. Если задано, партия пишется
+            внутри SAVEPOINT, а при ошибке делится пополам, пока не останутся отдельные плохие строки;
+            остальные строки записываются, перенос продолжается. Если не задано, ошибка останавливает перенос.
+        :param commit_policy: Как часто save_all_data фиксирует транзакцию. Если не задано, фиксация
+            выполняется после каждой партии при записи с контрольными точками, а без них не выполняется вовсе
+            (транзакцию завершает вызывающий код).
         """
         self._validate_connection(connection)
         self._validate_table_name(table_name)
+        self._validate_mode(mode)
+        self._validate_conflict_action(on_conflict)
 
         self.connection = connection
         self.table_name = table_name
         self.batch = batch
+        self.mode = mode
+        self.on_conflict = on_conflict
+        self.raw = raw
+        self.metrics = metrics or TableMetrics(table_name)
+        self.schema = schema
+        self.target_table = f'{schema}.{table_name}'
+        self.dead_letter = dead_letter
+        self.commit_policy = commit_policy
 
         self.dataclass = self.TABLE_TO_DATACLASS[table_name]['dataclass']
         self.fields = self.TABLE_TO_DATACLASS[table_name]['fields']
+        self.pg_types = self.TABLE_TO_DATACLASS[table_name]['pg_types']
         self.insert_query = self._build_insert_query()
+        # Неглубокая замена astuple: значения полей плоские и неизменяемые, копировать их не нужно
+        self._as_record = attrgetter(*(field.name for field in dataclass_fields(self.dataclass)))
+
+        # Временная таблица для COPY создаётся лениво, один раз на соединение
+        self.staging_table = f'tmp_{table_name}'
+        self._staging_ready = False
+        # Конвейер psycopg на время save_all_data в режиме insert_pipeline без dead_letter
+        self._pipeline: Optional[psycopg.Pipeline] = None
+
+    def _build_conflict_clause(self) -> str:
+        """Формирует ON CONFLICT: пропуск существующих строк или их обновление по id."""
+        if self.on_conflict == 'nothing':
+            return 'ON CONFLICT DO NOTHING'
+        assignments = ', '.join(f'{field} = EXCLUDED.{field}' for field in self.fields if field != 'id')
+        return f'ON CONFLICT (id) DO UPDATE SET {assignments}'
 
     def _build_insert_query(self) -> str:
         placeholders = ', '.join(['%s'] * len(self.fields))
         query = f"""
-            INSERT INTO content.{self.table_name} ({', '.join(self.fields)})
+            INSERT INTO {self.target_table} ({', '.join(self.fields)})
             VALUES ({placeholders})
-            ON CONFLICT DO NOTHING;
+            {self._build_conflict_clause()};
         """
         return query
 
+    def _build_copy_query(self) -> str:
+        """Формирует запрос COPY во временную таблицу."""
+        binary = ' (FORMAT BINARY)' if self.mode == 'copy_binary' else ''
+        return f"COPY {self.staging_table} ({', '.join(self.fields)}) FROM STDIN{binary}"
+
+    def _build_merge_query(self) -> str:
+        """Формирует запрос переноса строк из временной таблицы с тем же поведением ON CONFLICT."""
+        columns = ', '.join(self.fields)
+        return f"""
+            INSERT INTO {self.target_table} ({columns})
+            SELECT {columns} FROM {self.staging_table}
+            {self._build_conflict_clause()};
+        """
+
     def _validate_connection(self, connection: psycopg.Connection) -> None:
         """Проверяет валидность подключения."""
         if not hasattr(connection, 'cursor'):
@@ -86,34 +194,244 @@ class PostgresSaver:
         if table_name not in self.TABLE_TO_DATACLASS:
             raise ValueError(f"Invalid table name: {table_name}")
 
-    def save_all_data(self, data: list[list[dataclass]]) -> None:
+    def _validate_mode(self, mode: str) -> None:
+        """Проверяет, что режим записи поддерживается."""
+        if mode not in WRITE_MODES:
+            raise ValueError(f"Invalid write mode: {mode}. Expected one of {WRITE_MODES}.")
+
+    def _validate_conflict_action(self, on_conflict: str) -> None:
+        """Проверяет, что поведение при конфликте поддерживается."""
+        if on_conflict not in CONFLICT_ACTIONS:
+            raise ValueError(f"Invalid conflict action: {on_conflict}. Expected one of {CONFLICT_ACTIONS}.")
+
+    def _prepare_staging_table(self, cursor: psycopg.Cursor) -> None:
+        """Создаёт временную таблицу той же структуры, что и целевая."""
+        if self._staging_ready:
+            return
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {self.staging_table} "
+            f"(LIKE {self.target_table} INCLUDING DEFAULTS)"
+        )
+        self._staging_ready = True
+
+    def _adapt_for_binary_copy(self, records: list[tuple]) -> list[tuple]:
+        """Приводит строковые значения к Python-типам, которые требует бинарный формат COPY."""
+        adapters = [BINARY_COPY_ADAPTERS.get(pg_type) for pg_type in self.pg_types]
+        return [
+            tuple(
+                adapter(value) if adapter is not None and value is not None else value
+                for adapter, value in zip(adapters, record)
+            )
+            for record in records
+        ]
+
+    def _insert_batch(self, cursor: psycopg.Cursor, records: list[tuple]) -> None:
+        """Вставляет партию построчно через executemany."""
+        cursor.executemany(self.insert_query, records)
+
+    def _copy_batch(self, cursor: psycopg.Cursor, records: list[tuple]) -> None:
+        """Загружает партию через COPY во временную таблицу и переносит её в целевую."""
+        self._prepare_staging_table(cursor)
+        cursor.execute(f"TRUNCATE {self.staging_table}")
+
+        if self.mode == 'copy_binary':
+            records = self._adapt_for_binary_copy(records)
+
+        with cursor.copy(self._build_copy_query()) as copy:
+            if self.mode == 'copy_binary':
+                copy.set_types(self.pg_types)
+            for record in records:
+                copy.write_row(record)
+
+        cursor.execute(self._build_merge_query())
+
+    def _write_batch(self, cursor: psycopg.Cursor, records: list[tuple]) -> None:
+        """Записывает партию выбранным способом."""
+        if self.mode in ('insert', 'insert_pipeline'):
+            self._insert_batch(cursor, records)
+        else:
+            self._copy_batch(cursor, records)
+
+    def _write_in_savepoint(self, cursor: psycopg.Cursor, records: list[tuple]) -> Optional[DatabaseError]:
+        """Записывает строки внутри точки сохранения; при ошибке откатывается к ней и возвращает ошибку."""
+        cursor.execute('SAVEPOINT saver_batch')
+        # В конвейерном режиме ошибка приходит с ответом сервера, а до синхронизации прерывает все
+        # следующие операторы конвейера. Поэтому конвейер открывается только на запись строк и закрывается
+        # (с ожиданием ответов) внутри точки сохранения; откат к ней выполняется уже вне конвейера
+        try:
+            if self.mode == 'insert_pipeline':
+                with self.connection.pipeline() as pipeline:
+                    try:
+                        self._write_batch(cursor, records)
+                    finally:
+                        # Ответы дочитываются до выхода из конвейера: иначе выход с ошибкой
+                        # повторно синхронизирует прерванный конвейер
+                        pipeline.sync()
+            else:
+                self._write_batch(cursor, records)
+        except DatabaseError as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT saver_batch')
+            # Временная таблица COPY могла быть создана внутри откатанной точки сохранения
+            self._staging_ready = False
+            return e
+        cursor.execute('RELEASE SAVEPOINT saver_batch')
+        return None
+
+    def _write_bisecting(self, cursor: psycopg.Cursor, records: list[tuple]) -> int:
         """
-        Сохраняет данные в таблицу PostgreSQL партиями.
+        Записывает строки, деля отвергнутую часть пополам, пока ошибка не сведётся к отдельным строкам.
 
-        :param pg_cursor: Курсор PostgreSQL для выполнения запросов.
-        :param data: Список партий данных, каждая из которых представляет собой список объектов dataclass.
+        :return: Количество строк, отправленных в dead_letter.
         """
-        total_inserted = 0
-        for batch in data:
-            try:
-                # Проверяем, что все элементы в партии соответствуют dataclass
-                if not all(isinstance(item, self.dataclass) for item in batch):
-                    raise ValueError(
-                        f"Batch contains invalid elements. All elements must be instances of {self.dataclass}.")
+        error = self._write_in_savepoint(cursor, records)
+        if error is None:
+            return 0
+        if len(records) == 1:
+            record = dict(zip(self.fields, records[0]))
+            self.dead_letter.write(cursor, self.table_name, record, str(error).strip())
+            logger.warning(f"Rejected row {record.get('id')} of table '{self.table_name}': {str(error).strip()}")
+            return 1
+        middle = len(records) // 2
+        return self._write_bisecting(cursor, records[:middle]) + self._write_bisecting(cursor, records[middle:])
 
-                # Преобразуем объекты dataclass в кортежи
-                records = [astuple(item) for item in batch]
+    def prepare_records(self, batch: list) -> list[tuple]:
+        """Превращает партию в список кортежей для записи."""
+        if self.raw:
+            # Столбцовая партия (SQLiteLoader.load_columns): берём только прошедшие проверку строки
+            # (отбракованные строки уже обработаны в _reject_invalid)
+            if hasattr(batch, 'to_records'):
+                batch = batch.to_records()
+            # Кортежи уже проверены загрузчиком, сверяем только ширину строк
+            if batch and len(batch[0]) != len(self.fields):
+                raise ValueError(f"Batch rows must have {len(self.fields)} columns for table '{self.table_name}'.")
+            return batch
 
-                # Вставляем данные с помощью executemany
+        # Проверяем, что все элементы в партии соответствуют dataclass
+        if not all(isinstance(item, self.dataclass) for item in batch):
+            raise ValueError(
+                f"Batch contains invalid elements. All elements must be instances of {self.dataclass}.")
 
-                self.connection.cursor().executemany(self.insert_query, records)
-                total_inserted += len(records)
+        # Преобразуем объекты dataclass в кортежи
+        return [self._as_record(item) for item in batch]
 
-                logger.info(f"Inserted batch of {len(records)} records into table '{self.table_name}'.")
+    def save_all_data(self, data: list[list[dataclass]],
+                      checkpoint: Optional[Callable[[psycopg.Cursor, int], None]] = None) -> int:
+        """
+        Сохраняет данные в таблицу PostgreSQL партиями.
 
+        :param data: Список партий данных, каждая из которых представляет собой список объектов dataclass
+            (или кортежей, если saver создан с raw=True).
+        :param checkpoint: Функция записи контрольной точки, принимающая курсор и число строк с прошлой
+            фиксации. Вызывается в фиксируемой транзакции непосредственно перед фиксацией (по commit_policy,
+            по умолчанию после каждой партии), так что при ошибке теряются только незафиксированные партии.
+        :return: Количество записанных строк.
+        """
+        policy = self.commit_policy
+        if policy is None and checkpoint is not None:
+            policy = CommitPolicy()
+
+        total_inserted = 0
+        # Строки и партии, записанные с последней фиксации
+        pending_rows = pending_batches = 0
+        last_commit = time.monotonic()
+        cursor = self.connection.cursor()
+        # С dead_letter конвейер открывается на каждую запись внутри точки сохранения (_write_in_savepoint)
+        long_pipeline = self.mode == 'insert_pipeline' and self.dead_letter is None
+        pipeline = self.connection.pipeline() if long_pipeline else nullcontext()
+        with pipeline as self._pipeline:
+            try:
+                for batch in data:
+                    written, rejected = self._save_batch(cursor, batch)
+                    total_inserted += written
+                    pending_rows += written
+                    pending_batches += 1
+                    if policy is not None and policy.due(pending_rows, time.monotonic() - last_commit):
+                        self._commit(cursor, checkpoint, pending_rows)
+                        pending_rows = pending_batches = 0
+                        last_commit = time.monotonic()
+
+                    # Вместо строки в логе на каждую партию - сводка не чаще раза в metrics.log_interval
+                    self.metrics.add_batch(written, rejected)
+
+                if policy is not None and pending_batches:
+                    self._commit(cursor, checkpoint, pending_rows)
+                elif self._pipeline is not None:
+                    # Ошибки отложенных операторов должны проявиться здесь, а не при выходе из конвейера
+                    self._pipeline.sync()
             except (DatabaseError, ValueError) as e:
+                self.metrics.add_error()
                 logger.error(f"Failed to insert batch into PostgreSQL: {e}")
                 self.connection.rollback()
+                # Временная таблица исчезает вместе с откатанной транзакцией
+                self._staging_ready = False
                 raise
+            finally:
+                self._pipeline = None
 
+        self.metrics.report(force=True)
         logger.info(f"Total records inserted into '{self.table_name}': {total_inserted}")
+        return total_inserted
+
+    def _commit(self, cursor: psycopg.Cursor, checkpoint: Optional[Callable[[psycopg.Cursor, int], None]],
+                rows: int) -> None:
+        """Записывает контрольную точку (если задана) и фиксирует транзакцию."""
+        with self.metrics.time('commit'):
+            if checkpoint is not None:
+                checkpoint(cursor, rows)
+            self.connection.commit()
+
+    def _save_batch(self, cursor: psycopg.Cursor, batch: list) -> tuple[int, int]:
+        """
+        Записывает одну партию в текущей транзакции.
+
+        :return: Количество записанных и отправленных в dead_letter строк.
+        """
+        with self.metrics.time('prepare'):
+            invalid = self._reject_invalid(cursor, batch)
+            records = self.prepare_records(batch)
+
+        # Записываем партию выбранным способом (executemany или COPY)
+        with self.metrics.time('insert'):
+            if self.dead_letter is None:
+                self._write_batch(cursor, records)
+                return len(records), 0
+            rejected = self._write_bisecting(cursor, records)
+        return len(records) - rejected, rejected + invalid
+
+    def _reject_invalid(self, cursor: psycopg.Cursor, batch: list) -> int:
+        """
+        Обрабатывает строки, отбракованные столбцовой проверкой (ColumnarBatch.bad_rows), так же,
+        как строки, отвергнутые PostgreSQL: откладывает их в dead_letter, а без него останавливает перенос.
+
+        :return: Количество отложенных строк.
+        :raises ValueError: Если в партии есть отбракованные строки, а dead_letter не задан.
+        """
+        rejected = batch.rejected_records() if hasattr(batch, 'rejected_records') else []
+        if not rejected:
+            return 0
+        if self.dead_letter is None:
+            raise ValueError(f"{len(rejected)} invalid rows in table '{self.table_name}', "
+                             f"first: {rejected[0][0].get('id')}: {rejected[0][1]}")
+        for record, reason in rejected:
+            self.dead_letter.write(cursor, self.table_name, record, reason)
+            logger.warning(f"Rejected row {record.get('id')} of table '{self.table_name}': {reason}")
+        return len(rejected)
+
+    def delete_ids(self, ids: list[str]) -> int:
+        """
+        Удаляет строки по id (применение удалений, зафиксированных в журнале изменений SQLite).
+
+        :param ids: Список id удалённых в источнике строк.
+        :return: Количество удалённых строк.
+        """
+        if not ids:
+            return 0
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f"DELETE FROM {self.target_table} WHERE id = ANY(%s::uuid[])", [ids])
+        except DatabaseError as e:
+            logger.error(f"Failed to delete rows from PostgreSQL: {e}")
+            self.connection.rollback()
+            raise
+        logger.info(f"Deleted {cursor.rowcount} records from table '{self.table_name}'.")
+        return cursor.rowcount
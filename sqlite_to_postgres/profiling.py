@@ -0,0 +1,144 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import tracemalloc
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# off - без профилирования, cpu - cProfile, memory - tracemalloc, all - оба
+PROFILE_MODES = ('off', 'cpu', 'memory', 'all')
+
+# Глубина стека, сохраняемая tracemalloc для каждого выделения памяти
+TRACEMALLOC_FRAMES = 10
+TOP_ALLOCATIONS = 25
+TOP_FUNCTIONS = 40
+
+
+class TableProfiler:
+    """
+    Профилирует перенос одной таблицы (или шарда) в текущем процессе.
+
+    В режиме cpu сохраняет статистику cProfile в <name>.pstats (её читают snakeviz, gprof2dot
+    и flameprof для построения flame graph) и текстовую сводку по самым затратным функциям.
+    В режиме memory сохраняет самые крупные места выделения памяти и пиковую память каждой
+    стадии обработки партии. Пик стадии считается как прирост памяти над уровнем на её входе,
+    поэтому объект нужно подключить к TableMetrics через stage_listener.
+    """
+
+    def __init__(self, name: str, mode: str = 'all', output_dir: str = 'profiles') -> None:
+        """
+        Инициализирует объект TableProfiler.
+
+        :param name: Имя профиля (таблица или таблица с диапазоном rowid), используется в именах файлов.
+        :param mode: 'cpu', 'memory' или 'all'.
+        :param output_dir: Каталог для результатов.
+        :raises ValueError: Если режим не поддерживается.
+        """
+        if mode not in PROFILE_MODES or mode == 'off':
+            raise ValueError(f"Invalid profile mode: {mode}. Expected one of {PROFILE_MODES[1:]}.")
+
+        self.name = name
+        self.cpu = mode in ('cpu', 'all')
+        self.memory = mode in ('memory', 'all')
+        self.output_dir = output_dir
+
+        self._profiler: Optional[cProfile.Profile] = None
+        # tracemalloc общий для процесса: останавливаем его, только если сами запускали
+        self._started_tracing = False
+        self._stage_base: dict[str, int] = {}
+        self.stage_peaks: dict[str, int] = {}
+        self.peak_memory = 0
+
+    # --- Уведомления о стадиях (metrics.StageListener) ---
+
+    def stage_started(self, stage: str) -> None:
+        if not self.memory:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        # Пик до входа в стадию сохраняем: reset_peak() его сотрёт
+        self.peak_memory = max(self.peak_memory, peak)
+        self._stage_base[stage] = current
+        tracemalloc.reset_peak()
+
+    def stage_finished(self, stage: str) -> None:
+        if not self.memory:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak_memory = max(self.peak_memory, peak)
+        growth = peak - self._stage_base.pop(stage, 0)
+        if growth > self.stage_peaks.get(stage, 0):
+            self.stage_peaks[stage] = growth
+
+    # --- Профилирование ---
+
+    def __enter__(self) -> 'TableProfiler':
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracing = True
+        if self.cpu:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+
+        snapshot = None
+        if self.memory and tracemalloc.is_tracing():
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+            snapshot = tracemalloc.take_snapshot()
+            if self._started_tracing:
+                tracemalloc.stop()
+
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if self._profiler is not None:
+                self._write_cpu_profile()
+            if snapshot is not None:
+                self._write_memory_profile(snapshot)
+        except OSError as e:
+            # Ошибка записи профиля не должна скрывать результат переноса
+            logger.warning(f"Failed to write profile '{self.name}': {e}")
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.output_dir, f"{self.name.replace(':', '_')}{suffix}")
+
+    def _write_cpu_profile(self) -> None:
+        path = self._path('.pstats')
+        self._profiler.dump_stats(path)
+
+        summary = io.StringIO()
+        pstats.Stats(self._profiler, stream=summary).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        with open(self._path('.cpu.txt'), 'w') as f:
+            f.write(summary.getvalue())
+        logger.info(f"CPU profile of '{self.name}' written to {path}")
+
+    def _write_memory_profile(self, snapshot: tracemalloc.Snapshot) -> None:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+        lines = [f"Peak traced memory: {_format_size(self.peak_memory)}", '', 'Peak memory per stage (above stage entry):']
+        lines += [f'  {stage:<10} {_format_size(peak)}' for stage, peak in self.stage_peaks.items()]
+        lines += ['', f'Top {TOP_ALLOCATIONS} allocation sites still held at the end:']
+        for index, stat in enumerate(snapshot.statistics('traceback')[:TOP_ALLOCATIONS], 1):
+            lines.append(f'#{index}: {_format_size(stat.size)} in {stat.count} blocks')
+            lines += [f'    {line}' for line in stat.traceback.format(limit=TRACEMALLOC_FRAMES)]
+
+        path = self._path('.memory.txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+        stages = ', '.join(f'{stage} {_format_size(peak)}' for stage, peak in self.stage_peaks.items())
+        logger.info(f"Memory profile of '{self.name}' written to {path}: peak {_format_size(self.peak_memory)}"
+                    + (f" ({stages})" if stages else ''))
+
+
+def _format_size(size: int) -> str:
+    if size < 2 ** 20:
+        return f'{size / 2 ** 10:.1f} KiB'
+    return f'{size / 2 ** 20:.1f} MiB'
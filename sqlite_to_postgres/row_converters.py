@@ -0,0 +1,188 @@
+import re
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Callable
+from uuid import UUID
+
+# Формат отметок времени в SQLite-источнике
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f+00'
+
+# Поля, которые приводятся к нужному типу при создании объекта
+FLOAT_FIELDS = ('rating',)
+TIMESTAMP_FIELDS = ('created_at', 'updated_at')
+
+_CANONICAL_UUID = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+_CONVERTERS: dict[type, Callable[[tuple], Any]] = {}
+_POST_INITS: dict[type, Callable[[Any], None]] = {}
+
+
+def validate_uuid(value: Any) -> None:
+    """
+    Проверяет корректность значения UUID.
+
+    Каноническая запись проверяется регулярным выражением, остальные формы - конструктором UUID.
+
+    :param value: Значение, которое нужно проверить (строка или UUID).
+    :raises ValueError: Если значение пустое или имеет некорректный формат.
+    """
+    if not value:
+        raise ValueError("id cannot be null or empty")
+    if isinstance(value, str) and not _CANONICAL_UUID.fullmatch(value):
+        try:
+            UUID(value)
+        except ValueError:
+            raise ValueError(f"Invalid UUID format for id: {value}")
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Разбирает отметку времени вида 'YYYY-MM-DD HH:MM:SS.ffffff+00'.
+
+    Для ожидаемого формата используется datetime.fromisoformat, всё остальное
+    (и сообщения об ошибках) отдаётся datetime.strptime.
+
+    :param value: Строка с отметкой времени.
+    :return: Объект datetime без часового пояса.
+    :raises ValueError: Если строка не соответствует формату.
+    """
+    if len(value) > 22 and value[10] == ' ' and value[19] == '.' and value.endswith('+00'):
+        try:
+            return datetime.fromisoformat(value[:-3])
+        except ValueError:
+            pass
+    return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+def _field_plan(cls: type) -> list[tuple[str, str]]:
+    """Возвращает пары (имя поля, вид преобразования) в порядке полей датакласса."""
+    plan = []
+    for field in fields(cls):
+        if field.type == UUID:
+            kind = 'uuid'
+        elif field.name in FLOAT_FIELDS:
+            kind = 'float'
+        elif field.name in TIMESTAMP_FIELDS:
+            kind = 'timestamp'
+        else:
+            kind = ''
+        plan.append((field.name, kind))
+    return plan
+
+
+def _conversion_lines(plan: list[tuple[str, str]], indent: str = '    ') -> list[str]:
+    """Строки кода, приводящие локальные переменные с именами полей к нужным типам."""
+    lines = []
+    for name, kind in plan:
+        if kind == 'uuid':
+            lines.append(f'{indent}_validate_uuid({name})')
+        elif kind == 'float':
+            lines.append(f'{indent}if {name} is not None and not isinstance({name}, float):')
+            lines.append(f'{indent}    {name} = float({name})')
+        elif kind == 'timestamp':
+            lines.append(f'{indent}if {name} is not None and not isinstance({name}, datetime):')
+            lines.append(f'{indent}    {name} = _parse_timestamp({name})')
+    return lines
+
+
+def _compile(source: str, name: str, cls: type) -> Callable:
+    namespace = {
+        '_cls': cls,
+        '_new': object.__new__,
+        '_validate_uuid': validate_uuid,
+        '_parse_timestamp': parse_timestamp,
+        'datetime': datetime,
+    }
+    exec(compile(source, f'<{name} {cls.__name__}>', 'exec'), namespace)
+    return namespace[name]
+
+
+def get_converter(cls: type) -> Callable[[tuple], Any]:
+    """
+    Возвращает функцию, превращающую строку SQLite (кортеж значений) в объект датакласса.
+
+    Функция генерируется один раз на класс: поля распаковываются в локальные переменные,
+    проверяются и приводятся без обхода __dataclass_fields__, объект создаётся без вызова
+    __init__ и __post_init__.
+
+    :param cls: Датакласс.
+    :return: Функция преобразования строки.
+    """
+    converter = _CONVERTERS.get(cls)
+    if converter is None:
+        plan = _field_plan(cls)
+        names = [name for name, _ in plan]
+        lines = [
+            'def convert(row):',
+            f"    {', '.join(names)}, = row",
+            *_conversion_lines(plan),
+            '    obj = _new(_cls)',
+            *(f'    obj.{name} = {name}' for name in names),
+            '    return obj',
+        ]
+        converter = _CONVERTERS[cls] = _compile('\n'.join(lines), 'convert', cls)
+    return converter
+
+
+def get_post_init(cls: type) -> Callable[[Any], None]:
+    """
+    Возвращает сгенерированную для класса функцию пост-обработки уже созданного объекта.
+
+    :param cls: Датакласс.
+    :return: Функция, проверяющая и приводящая поля объекта на месте.
+    """
+    post_init = _POST_INITS.get(cls)
+    if post_init is None:
+        plan = [(name, kind) for name, kind in _field_plan(cls) if kind]
+        lines = ['def post_init(self):']
+        lines += [f'    {name} = self.{name}' for name, _ in plan]
+        lines += _conversion_lines(plan)
+        lines += [f'    self.{name} = {name}' for name, kind in plan if kind != 'uuid']
+        lines.append('    return None')
+        post_init = _POST_INITS[cls] = _compile('\n'.join(lines), 'post_init', cls)
+    return post_init
+
+
+def _validate_uuid_column(column: tuple) -> None:
+    """Проверяет столбец UUID целиком; построчная проверка нужна только при ошибке или нестандартной записи."""
+    try:
+        if all(map(_CANONICAL_UUID.fullmatch, column)):
+            return
+    except TypeError:
+        pass
+    for value in column:
+        validate_uuid(value)
+
+
+def get_batch_converter(cls: type) -> Callable[[list[tuple]], list[tuple]]:
+    """
+    Возвращает функцию, проверяющую и приводящую партию строк SQLite целиком, без создания объектов.
+
+    Партия разворачивается в столбцы, каждый столбец обрабатывается одним проходом,
+    и результат собирается обратно в кортежи в порядке полей датакласса.
+
+    :param cls: Датакласс, описывающий строки.
+    :return: Функция преобразования партии.
+    """
+    plan = _field_plan(cls)
+    width = len(plan)
+    typed_columns = [(index, kind) for index, (_, kind) in enumerate(plan) if kind]
+
+    def convert_batch(rows: list[tuple]) -> list[tuple]:
+        if not rows:
+            return rows
+        if len(rows[0]) != width:
+            raise TypeError(f"{cls.__name__} expects {width} columns, got {len(rows[0])}")
+
+        columns = list(zip(*rows))
+        for index, kind in typed_columns:
+            column = columns[index]
+            if kind == 'uuid':
+                _validate_uuid_column(column)
+            elif kind == 'float':
+                columns[index] = [v if v is None or isinstance(v, float) else float(v) for v in column]
+            elif kind == 'timestamp':
+                columns[index] = [v if v is None or isinstance(v, datetime) else parse_timestamp(v) for v in column]
+        return list(zip(*columns))
+
+    return convert_batch
@@ -0,0 +1,104 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Граф внешних ключей из schema_design/movies_database.ddl: таблица -> таблицы, на которые она ссылается.
+# Намеренно статическая копия: перенос не читает DDL во время работы (файл может не поставляться вместе
+# с sqlite_to_postgres), а расхождение с DDL ловит tests/test_scheduler.py
+TABLE_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    'film_work': (),
+    'genre': (),
+    'person': (),
+    'genre_film_work': ('genre', 'film_work'),
+    'person_film_work': ('person', 'film_work'),
+}
+
+EXECUTORS = ('process', 'thread')
+
+
+class TableScheduler:
+    """
+    Планировщик переноса таблиц с учётом зависимостей по внешним ключам.
+
+    Независимые таблицы переносятся одновременно, таблицы-связки запускаются,
+    как только завершены все таблицы, на которые они ссылаются.
+    """
+
+    def __init__(self, task: Callable[[str], Any], workers: int = 1, executor: str = 'process',
+                 dependencies: dict[str, tuple[str, ...]] = TABLE_DEPENDENCIES) -> None:
+        """
+        Инициализирует объект TableScheduler.
+
+        :param task: Функция переноса одной таблицы. Должна сама открывать свои соединения
+            и быть сериализуемой pickle, если используются процессы.
+        :param workers: Максимальное число таблиц, переносимых одновременно.
+        :param executor: 'process' (отдельный процесс на таблицу) или 'thread'.
+        :param dependencies: Граф зависимостей таблиц.
+        :raises ValueError: Если переданы некорректные параметры.
+        """
+        if not isinstance(workers, int) or workers <= 0:
+            raise ValueError("Number of workers must be a positive integer.")
+        if executor not in EXECUTORS:
+            raise ValueError(f"Invalid executor: {executor}. Expected one of {EXECUTORS}.")
+
+        self.task = task
+        self.workers = workers
+        self.executor = executor
+        self.dependencies = dependencies
+
+    def _create_executor(self) -> Executor:
+        if self.executor == 'process':
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def _validate_tables(self, tables: list[str]) -> None:
+        """Проверяет, что все таблицы известны и их зависимости тоже переносятся."""
+        for table_name in tables:
+            if table_name not in self.dependencies:
+                raise ValueError(f"Invalid table name: {table_name}")
+            missing = [parent for parent in self.dependencies[table_name] if parent not in tables]
+            if missing:
+                raise ValueError(f"Table {table_name} depends on tables that are not scheduled: {missing}")
+
+    def run(self, tables: list[str]) -> dict[str, Any]:
+        """
+        Переносит таблицы, соблюдая порядок зависимостей.
+
+        :param tables: Список таблиц для переноса.
+        :return: Словарь результатов задачи по именам таблиц.
+        :raises RuntimeError: Если перенос одной из таблиц завершился ошибкой.
+        """
+        self._validate_tables(tables)
+
+        pending: list[str] = list(tables)
+        done: set[str] = set()
+        results: dict[str, Any] = {}
+        running: dict[Future, str] = {}
+
+        with self._create_executor() as executor:
+            while pending or running:
+                # Запускаем все таблицы, зависимости которых уже перенесены
+                for table_name in [t for t in pending if set(self.dependencies[t]) <= done]:
+                    logger.info(f"Scheduling table '{table_name}'")
+                    running[executor.submit(self.task, table_name)] = table_name
+                    pending.remove(table_name)
+
+                if not running:
+                    raise RuntimeError(f"Circular table dependencies: {pending}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    table_name = running.pop(future)
+                    try:
+                        results[table_name] = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to transfer table {table_name}: {e}")
+                        for other in running:
+                            other.cancel()
+                        raise RuntimeError(f"Failed to transfer table {table_name}: {e}")
+                    done.add(table_name)
+                    logger.info(f"Table '{table_name}' finished")
+
+        return results
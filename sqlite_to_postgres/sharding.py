@@ -0,0 +1,120 @@
+import logging
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ShardResult:
+    """Результат переноса одного диапазона rowid."""
+    rowid_range: tuple[int, int]
+    rows: int
+    seconds: float
+
+
+@dataclass
+class ShardReport:
+    """Сводный отчёт по всем шардам одной таблицы."""
+    table_name: str
+    shards: list[ShardResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(shard.rows for shard in self.shards)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def split_rowid_ranges(cursor: sqlite3.Cursor, table_name: str, shards: int) -> list[tuple[int, int]]:
+    """
+    Делит таблицу на непересекающиеся диапазоны rowid примерно одинакового размера.
+
+    :param cursor: Курсор SQLite.
+    :param table_name: Имя таблицы.
+    :param shards: Желаемое число диапазонов.
+    :return: Список диапазонов (нижняя и верхняя граница включительно). Пустой, если таблица пуста.
+    :raises ValueError: Если число шардов некорректно.
+    """
+    if not isinstance(shards, int) or shards <= 0:
+        raise ValueError("Number of shards must be a positive integer.")
+
+    cursor.execute(f'SELECT MIN(rowid), MAX(rowid) FROM {table_name};')
+    low, high = cursor.fetchone()
+    if low is None:
+        return []
+
+    step = max(1, -(-(high - low + 1) // shards))
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+
+def _run_shard(task: Callable[[tuple[int, int]], int], rowid_range: tuple[int, int]) -> ShardResult:
+    """Выполняет перенос одного шарда и замеряет его время."""
+    started = time.perf_counter()
+    rows = task(rowid_range)
+    return ShardResult(rowid_range, rows, time.perf_counter() - started)
+
+
+class ShardedMigrator:
+    """
+    Переносит одну большую таблицу параллельно по диапазонам rowid.
+
+    Каждый диапазон обрабатывается в отдельном процессе собственной парой SQLiteLoader/PostgresSaver.
+    """
+
+    def __init__(self, task: Callable[[tuple[int, int]], int], workers: int) -> None:
+        """
+        Инициализирует объект ShardedMigrator.
+
+        :param task: Функция переноса одного диапазона rowid, возвращающая число записанных строк.
+            Должна быть сериализуемой pickle.
+        :param workers: Число процессов.
+        :raises ValueError: Если число процессов некорректно.
+        """
+        if not isinstance(workers, int) or workers <= 0:
+            raise ValueError("Number of workers must be a positive integer.")
+
+        self.task = task
+        self.workers = workers
+
+    def run(self, table_name: str, ranges: list[tuple[int, int]]) -> ShardReport:
+        """
+        Переносит все шарды таблицы и собирает их прогресс в единый отчёт.
+
+        :param table_name: Имя таблицы (для отчёта и логов).
+        :param ranges: Диапазоны rowid, полученные из split_rowid_ranges.
+        :return: Сводный отчёт по таблице.
+        :raises RuntimeError: Если перенос одного из шардов завершился ошибкой.
+        """
+        report = ShardReport(table_name)
+        started = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(_run_shard, self.task, rowid_range): rowid_range for rowid_range in ranges}
+            for future in as_completed(futures):
+                try:
+                    shard = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to transfer shard {futures[future]} of table {table_name}: {e}")
+                    for other in futures:
+                        other.cancel()
+                    raise RuntimeError(f"Failed to transfer shard {futures[future]} of table {table_name}: {e}")
+
+                report.shards.append(shard)
+                logger.info(
+                    f"Table '{table_name}': shard {shard.rowid_range} done, "
+                    f"{len(report.shards)}/{len(ranges)} shards, {report.rows} rows so far"
+                )
+
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"Table '{table_name}': {report.rows} rows in {len(ranges)} shards, "
+            f"{report.seconds:.1f}s, {report.rows_per_second:.0f} rows/s"
+        )
+        return report
@@ -1,14 +1,24 @@
 import sqlite3
-from typing import Generator, Type, Union
+import time
+from typing import Generator, Optional, Type, Union
 import logging
+from batch_sizer import AdaptiveBatchSizer, estimate_row_bytes
 from film_work_dataclass import FilmWork
 from genre_dataclass import Genre
 from genre_film_work_dataclass import GenreFilmWork
+from metrics import TableMetrics
 from person_dataclass import Person
 from person_film_work_dataclass import PersonFilmWork
+from row_converters import get_batch_converter, get_converter
 
 logger = logging.getLogger(__name__)
 
+# Наименьшее возможное значение rowid в SQLite
+MIN_ROWID = -2 ** 63
+
+# Таблицы с полем updated_at, для которых возможна инкрементальная выборка по отметке времени
+TABLES_WITH_UPDATED_AT = ('film_work', 'genre', 'person')
+
 # Создание пользовательского типа
 DataClassType = Union[FilmWork, Genre, Person, GenreFilmWork, PersonFilmWork]
 
@@ -27,21 +37,60 @@ class SQLiteLoader:
         'genre_film_work': GenreFilmWork,
     }
 
-    def __init__(self, cursor: sqlite3.Cursor, table_name: str, batch: int = 100) -> None:
+    def __init__(self, cursor: sqlite3.Cursor, table_name: str, batch: int = 100,
+                 rowid_range: Optional[tuple[int, int]] = None, start_key: Optional[int] = None,
+                 updated_after: Optional[str] = None, metrics: Optional[TableMetrics] = None,
+                 exclude_ids: frozenset[str] = frozenset(),
+                 batch_sizer: Optional[AdaptiveBatchSizer] = None) -> None:
         """
         Инициализирует объект SQLiteLoader.
 
         :param cursor: Объект подключения к SQLite базе данных (sqlite3.Cursor).
         :param table_name: Имя таблицы, из которой будут извлекаться данные.
         :param batch: Размер партии данных, которые будут извлекаться из базы (по умолчанию 100).
+        :param rowid_range: Границы rowid (включительно) для чтения только одного шарда таблицы.
+        :param start_key: Последний уже перенесённый rowid: чтение продолжится со следующей строки.
+        :param updated_after: Отметка времени: читать только строки с updated_at не раньше неё
+            (инкрементальная синхронизация, строки выдаются в порядке updated_at).
+        :param metrics: Метрики таблицы, в которые записывается время чтения и преобразования партий.
+        :param exclude_ids: id строк, которые не нужно переносить (например, строки-сироты, см. integrity.py).
+        :param batch_sizer: Подбор размера партии по времени обработки и памяти; если задан, batch -
+            только начальный размер, а размер каждой следующей партии читается из batch_sizer.size.
         :raises ValueError: Если переданы некорректные параметры.
         """
         self._validate_batch_size(batch)
         self._validate_table_name(table_name)
+        self._validate_rowid_range(rowid_range)
+        self._validate_updated_after(table_name, updated_after, rowid_range)
 
         self.cursor: sqlite3.Cursor = cursor
         self.table_name: str = table_name
         self.batch: int = batch
+        self.rowid_range: Optional[tuple[int, int]] = rowid_range
+        # rowid последней строки последней выданной партии
+        self.last_key: Optional[int] = start_key
+        self.updated_after: Optional[str] = updated_after
+        # Наибольший updated_at среди выданных строк (новая отметка для инкрементальной синхронизации)
+        self.last_updated_at: Optional[str] = updated_after
+        self.metrics: TableMetrics = metrics or TableMetrics(table_name)
+        self.exclude_ids: frozenset[str] = exclude_ids
+        self.batch_sizer: Optional[AdaptiveBatchSizer] = batch_sizer
+        self.metrics.batch_size = self.batch_size
+
+    @property
+    def batch_size(self) -> int:
+        """Размер следующей партии."""
+        return self.batch if self.batch_sizer is None else self.batch_sizer.size
+
+    def _observe_batch(self, rows: list[tuple], started: float) -> None:
+        """
+        Передаёт подбору размера партии время её обработки: от начала чтения до запроса следующей партии,
+        то есть вместе с преобразованием и записью в PostgreSQL.
+        """
+        if self.batch_sizer is None:
+            return
+        self.batch_sizer.observe(len(rows), time.perf_counter() - started, estimate_row_bytes(rows))
+        self.metrics.batch_size = self.batch_sizer.size
 
     def _validate_batch_size(self, batch: int) -> None:
         """Проверяет, что размер партии является положительным целым числом."""
@@ -55,35 +104,117 @@ class SQLiteLoader:
         if table_name not in self.TABLE_TO_DATACLASS:
             raise ValueError(f"Invalid table name: {table_name}")
 
-    def extract_data(self, sqlite_cursor: sqlite3.Cursor) -> Generator[list[sqlite3.Row], None, None]:
+    def _validate_rowid_range(self, rowid_range: Optional[tuple[int, int]]) -> None:
+        """Проверяет, что диапазон rowid задан парой целых чисел в правильном порядке."""
+        if rowid_range is None:
+            return
+        if len(rowid_range) != 2 or not all(isinstance(bound, int) for bound in rowid_range):
+            raise ValueError("rowid_range must be a pair of integers.")
+        if rowid_range[0] > rowid_range[1]:
+            raise ValueError("rowid_range lower bound must not exceed upper bound.")
+
+    def _validate_updated_after(self, table_name: str, updated_after: Optional[str],
+                                rowid_range: Optional[tuple[int, int]]) -> None:
+        """Проверяет, что инкрементальная выборка применима к таблице."""
+        if updated_after is None:
+            return
+        if table_name not in TABLES_WITH_UPDATED_AT:
+            raise ValueError(f"Table {table_name} has no updated_at column.")
+        if rowid_range is not None:
+            raise ValueError("updated_after cannot be combined with rowid_range.")
+
+    def _extract_updated_data(self, sqlite_cursor: sqlite3.Cursor) -> Generator[list[tuple], None, None]:
         """
-        Извлекает данные из таблицы партиями.
+        Извлекает строки, изменённые начиная с self.updated_after, keyset-пагинацией по (updated_at, rowid).
 
         :param sqlite_cursor: Курсор SQLite для выполнения запросов к базе данных.
         :return: Генератор, который возвращает списки строк (batch) из таблицы.
         :raises RuntimeError: Если возникает ошибка при выполнении запроса или чтении данных.
         """
-        try:
-            # Выполняем SQL-запрос для получения всех данных из таблицы
-            sqlite_cursor.execute(f'SELECT * FROM {self.table_name};')
-        except sqlite3.OperationalError as e:
-            # Логируем ошибку и выбрасываем исключение, если запрос не может быть выполнен
-            logger.error(f"Failed to execute query: {e}")
-            raise RuntimeError(f"Failed to execute query: {e}")
+        query = (
+            f'SELECT rowid, updated_at, * FROM {self.table_name} '
+            f'WHERE (updated_at, rowid) > (?, ?) ORDER BY updated_at, rowid LIMIT ?;'
+        )
+        last_updated_at, last_key = self.updated_after, MIN_ROWID
+
+        while True:
+            started = time.perf_counter()
+            try:
+                with self.metrics.time('fetch'):
+                    results: list[tuple] = sqlite_cursor.execute(
+                        query, (last_updated_at, last_key, self.batch_size)
+                    ).fetchall()
+            except (sqlite3.OperationalError, sqlite3.InterfaceError) as e:
+                logger.error(f"Failed to fetch updated rows: {e}")
+                raise RuntimeError(f"Failed to fetch updated rows: {e}")
+
+            if not results:
+                break
+            last_key, last_updated_at = results[-1][0], results[-1][1]
+            self.last_key, self.last_updated_at = last_key, last_updated_at
+            yield self._without_excluded([row[2:] for row in results])
+            self._observe_batch(results, started)
+
+    def _without_excluded(self, rows: list[tuple]) -> list[tuple]:
+        """Убирает из партии исключённые строки. Партия может стать пустой - она всё равно выдаётся,
+        чтобы контрольная точка продвинулась."""
+        if not self.exclude_ids:
+            return rows
+        return [row for row in rows if row[0] not in self.exclude_ids]
+
+    def _build_select_query(self) -> str:
+        """Формирует запрос keyset-пагинации по rowid (с верхней границей шарда, если она задана)."""
+        upper_bound = ' AND rowid <= ?' if self.rowid_range is not None else ''
+        return f'SELECT rowid, * FROM {self.table_name} WHERE rowid > ?{upper_bound} ORDER BY rowid LIMIT ?;'
+
+    def extract_data(self, sqlite_cursor: sqlite3.Cursor) -> Generator[list[tuple], None, None]:
+        """
+        Извлекает данные из таблицы партиями с помощью keyset-пагинации по rowid.
+
+        Каждая партия читается отдельным запросом, начиная с self.last_key, поэтому
+        продолжение прерванного переноса не требует повторного чтения уже перенесённых строк.
+
+        :param sqlite_cursor: Курсор SQLite для выполнения запросов к базе данных.
+        :return: Генератор, который возвращает списки строк (batch) из таблицы.
+        :raises RuntimeError: Если возникает ошибка при выполнении запроса или чтении данных.
+        """
+        if self.updated_after is not None:
+            yield from self._extract_updated_data(sqlite_cursor)
+            return
+
+        query = self._build_select_query()
+        last_key = MIN_ROWID if self.last_key is None else self.last_key
+        if self.rowid_range is not None:
+            last_key = max(last_key, self.rowid_range[0] - 1)
 
         # Бесконечный цикл для извлечения данных партиями
         while True:
+            batch_size = self.batch_size
+            params = (last_key, self.rowid_range[1], batch_size) if self.rowid_range else (last_key, batch_size)
+            started = time.perf_counter()
             try:
-                # Извлекаем партию строк из результата запроса
-                results: list[sqlite3.Row] = sqlite_cursor.fetchmany(self.batch)
-                if not results:  # Если партия пустая, прекращаем генерацию данных
-                    break
-                yield results  # Возвращаем текущую партию строк
+                # Извлекаем партию строк, следующих за последним прочитанным rowid
+                with self.metrics.time('fetch'):
+                    results: list[tuple] = sqlite_cursor.execute(query, params).fetchall()
+            except sqlite3.OperationalError as e:
+                # Логируем ошибку и выбрасываем исключение, если запрос не может быть выполнен
+                logger.error(f"Failed to execute query: {e}")
+                raise RuntimeError(f"Failed to execute query: {e}")
             except sqlite3.InterfaceError as e:
                 # Логируем ошибку, если возникает проблема с курсором или чтением данных
                 logger.error(f"Error fetching data: {e}")
                 raise RuntimeError(f"Error fetching data: {e}")
 
+            if not results:  # Если партия пустая, прекращаем генерацию данных
+                break
+            last_key = results[-1][0]
+            self.last_key = last_key
+            yield self._without_excluded([row[1:] for row in results])  # Возвращаем текущую партию строк без rowid
+            self._observe_batch(results, started)
+
+        if self.batch_sizer is not None:
+            self.batch_sizer.report()
+
     def load_movies(self) -> Generator[list[DataClassType], None, None]:
         """
         Загружает данные из таблицы и преобразует их в объекты соответствующих датаклассам.
@@ -99,14 +230,105 @@ class SQLiteLoader:
             logger.error(f"Failed to create cursor: {e}")
             raise RuntimeError(f"Failed to create cursor: {e}")
 
-        # Определяем соответствующий датакласс для текущей таблицы
+        # Определяем соответствующий датакласс для текущей таблицы и его сгенерированный конвертер
         dataclass: Type[DataClassType] = self.TABLE_TO_DATACLASS[self.table_name]
+        convert = get_converter(dataclass)
 
         # Извлекаем данные партиями с помощью метода extract_data
         for batch in self.extract_data(sqlite_cursor):
             try:
                 # Преобразуем строки в объекты датаклассов
-                yield [dataclass(*row) for row in batch]
+                with self.metrics.time('convert'):
+                    objects = [convert(row) for row in batch]
             except (TypeError, ValueError) as e:
                 logger.error(f"Failed to create objects for table {self.table_name}: {e}")
-                raise RuntimeError(f"Failed to create objects for table {self.table_name}: {e}")
\ No newline at end of file
+                raise RuntimeError(f"Failed to create objects for table {self.table_name}: {e}")
+            yield objects
+
+    def load_rows(self) -> Generator[list[tuple], None, None]:
+        """
+        Загружает данные из таблицы партиями кортежей без создания объектов датаклассов.
+
+        Проверка и приведение типов выполняются для всей партии сразу (см. row_converters.get_batch_converter).
+
+        :return: Генератор, который возвращает списки проверенных кортежей в порядке полей датакласса.
+        :raises RuntimeError: Если возникает ошибка при чтении или проверке данных.
+        """
+        convert_batch = get_batch_converter(self.TABLE_TO_DATACLASS[self.table_name])
+
+        for batch in self.extract_data(self.cursor):
+            try:
+                with self.metrics.time('convert'):
+                    rows = convert_batch(batch)
+            except (TypeError, ValueError) as e:
+                logger.error(f"Failed to validate rows for table {self.table_name}: {e}")
+                raise RuntimeError(f"Failed to validate rows for table {self.table_name}: {e}")
+            yield rows
+
+    def load_columns(self) -> Generator['ColumnarBatch', None, None]:
+        """
+        Загружает данные из таблицы партиями столбцов, проверенных векторными операциями NumPy.
+
+        Некорректные строки не прерывают загрузку: их номера и причины доступны в ColumnarBatch.bad_rows.
+
+        :return: Генератор столбцовых партий.
+        :raises RuntimeError: Если NumPy не установлен или партию не удаётся разобрать на столбцы.
+        """
+        # Импорт внутри метода: NumPy нужен только в столбцовом режиме
+        from columnar import ColumnarValidator
+
+        validator = ColumnarValidator(self.TABLE_TO_DATACLASS[self.table_name])
+        for batch in self.extract_data(self.cursor):
+            try:
+                with self.metrics.time('convert'):
+                    columns = validator.validate(batch)
+            except TypeError as e:
+                logger.error(f"Failed to validate rows for table {self.table_name}: {e}")
+                raise RuntimeError(f"Failed to validate rows for table {self.table_name}: {e}")
+            yield columns
+
+    def count_rows(self) -> int:
+        """
+        Считает строки, которые предстоит прочитать (с учётом диапазона шарда и контрольной точки).
+
+        :return: Число строк.
+        :raises RuntimeError: Если запрос не удалось выполнить.
+        """
+        conditions, params = [], []
+        if self.updated_after is not None:
+            conditions.append('updated_at >= ?')
+            params.append(self.updated_after)
+        if self.last_key is not None:
+            conditions.append('rowid > ?')
+            params.append(self.last_key)
+        if self.rowid_range is not None:
+            conditions.append('rowid BETWEEN ? AND ?')
+            params += self.rowid_range
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        try:
+            return self.cursor.execute(f'SELECT COUNT(*) FROM {self.table_name}{where};', params).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Failed to count rows in table {self.table_name}: {e}")
+            raise RuntimeError(f"Failed to count rows in table {self.table_name}: {e}")
+
+    def load_by_ids(self, ids: list[str]) -> list[DataClassType]:
+        """
+        Загружает строки с указанными id и преобразует их в объекты датакласса.
+
+        :param ids: Список id строк.
+        :return: Список объектов текущего датакласса (удалённые к этому моменту строки пропускаются).
+        :raises RuntimeError: Если возникает ошибка при чтении или преобразовании данных.
+        """
+        if not ids:
+            return []
+        convert = get_converter(self.TABLE_TO_DATACLASS[self.table_name])
+        placeholders = ', '.join(['?'] * len(ids))
+        try:
+            rows = self.cursor.execute(f'SELECT * FROM {self.table_name} WHERE id IN ({placeholders});', ids).fetchall()
+            return [convert(row) for row in rows]
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load rows by id from table {self.table_name}: {e}")
+            raise RuntimeError(f"Failed to load rows by id from table {self.table_name}: {e}")
+        except (TypeError, ValueError) as e:
+            logger.error(f"Failed to create objects for table {self.table_name}: {e}")
+            raise RuntimeError(f"Failed to create objects for table {self.table_name}: {e}")
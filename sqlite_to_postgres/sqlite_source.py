@@ -0,0 +1,81 @@
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# Сколько строк возвращает cursor.fetchmany() без аргумента
+DEFAULT_ARRAYSIZE = 1000
+
+
+class SQLiteSource:
+    """
+    Доступ к исходной базе SQLite только для чтения.
+
+    База открывается по URI в режиме mode=ro, при immutable=True - ещё и с immutable=1: SQLite
+    не берёт блокировок и не проверяет, не изменил ли файл кто-то другой. Это безопасно только
+    для файла, в который никто не пишет во время переноса (выгрузка для первичной загрузки),
+    поэтому при инкрементальной синхронизации с живой базой immutable нужно выключать.
+    Файл отображается в память (mmap_size), кэш страниц соединения увеличен (cache_size).
+
+    Каждый вызов connect() или cursor() открывает отдельное соединение: соединения SQLite
+    нельзя делить между процессами, поэтому каждый исполнитель получает собственное.
+    """
+
+    def __init__(self, path: str, immutable: bool = True, mmap_size_mb: int = 256, cache_size_mb: int = 64,
+                 arraysize: int = DEFAULT_ARRAYSIZE) -> None:
+        """
+        Инициализирует объект SQLiteSource.
+
+        :param path: Путь к файлу SQLite.
+        :param immutable: Считать файл неизменяемым на время переноса.
+        :param mmap_size_mb: Сколько мегабайт файла отображать в память (0 - читать через read()).
+        :param cache_size_mb: Размер кэша страниц каждого соединения в мегабайтах.
+        :param arraysize: Размер порции cursor.fetchmany() по умолчанию.
+        :raises ValueError: Если параметры некорректны.
+        """
+        if mmap_size_mb < 0 or cache_size_mb <= 0 or arraysize <= 0:
+            raise ValueError("mmap_size_mb must be non-negative, cache_size_mb and arraysize must be positive.")
+
+        self.path = path
+        self.immutable = immutable
+        self.mmap_size_mb = mmap_size_mb
+        self.cache_size_mb = cache_size_mb
+        self.arraysize = arraysize
+
+    @property
+    def uri(self) -> str:
+        """URI файла с параметрами только для чтения."""
+        uri = f"file:{quote(os.path.abspath(self.path))}?mode=ro"
+        if self.immutable:
+            uri += '&immutable=1'
+        return uri
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Открывает новое соединение только для чтения с настроенными mmap и кэшем.
+
+        :raises sqlite3.OperationalError: Если файл не существует или не открывается.
+        """
+        connection = sqlite3.connect(self.uri, uri=True)
+        connection.execute(f'PRAGMA mmap_size = {self.mmap_size_mb * 2 ** 20}')
+        # Отрицательное значение cache_size - размер в килобайтах, а не в страницах
+        connection.execute(f'PRAGMA cache_size = -{self.cache_size_mb * 2 ** 10}')
+        connection.execute('PRAGMA temp_store = MEMORY')
+        return connection
+
+    @contextmanager
+    def cursor(self) -> Iterator[sqlite3.Cursor]:
+        """Курсор на отдельном соединении; соединение закрывается при выходе (фиксировать нечего)."""
+        logger.info("Creating SQLite connection")
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.arraysize = self.arraysize
+            yield cursor
+        finally:
+            logger.info("Closing SQLite connection")
+            connection.close()
@@ -0,0 +1,248 @@
+import logging
+import re
+from typing import Iterable, Optional
+import psycopg
+from psycopg.rows import dict_row
+from verification import TransferVerifier
+
+logger = logging.getLogger(__name__)
+
+STAGING_SCHEMA = 'content_staging'
+# Схема, куда при публикации уходят прежние таблицы (удаляется после публикации)
+RETIRED_SCHEMA = 'content_retired'
+
+# 'FOREIGN KEY (genre_id) REFERENCES content.genre(id) ON DELETE CASCADE'
+_FOREIGN_KEY = re.compile(r'FOREIGN KEY \((\w+)\) REFERENCES (?:\w+\.)?(\w+)\((\w+)\)')
+
+
+class StagingArea:
+    """
+    Загрузка в UNLOGGED-копии таблиц content с последующей атомарной подменой.
+
+    Промежуточные таблицы создаются в отдельной схеме по образцу таблиц content: те же столбцы,
+    значения по умолчанию, генерируемые столбцы (search_vector), CHECK, первичные ключи и UNIQUE с теми же именами (на них держится
+    ON CONFLICT). Запись в них не попадает в WAL, а вторичные индексы строятся после загрузки.
+    Читатели content (админка) не видят частично загруженных данных: таблицы подменяются
+    одной короткой транзакцией, после чего внешние ключи добавляются как NOT VALID и проверяются.
+    """
+
+    def __init__(self, dsl: dict, tables: Iterable[str], schema: str = 'content',
+                 staging_schema: str = STAGING_SCHEMA, lock_timeout: str = '10s') -> None:
+        """
+        Инициализирует объект StagingArea.
+
+        :param dsl: Параметры подключения к PostgreSQL.
+        :param tables: Публикуемые таблицы.
+        :param schema: Рабочая схема.
+        :param staging_schema: Схема промежуточных таблиц.
+        :param lock_timeout: Сколько ждать блокировок таблиц при публикации.
+        """
+        self.dsl = dsl
+        self.tables = list(tables)
+        self.schema = schema
+        self.staging_schema = staging_schema
+        self.lock_timeout = lock_timeout
+
+    def _constraints(self, connection: psycopg.Connection, contypes: str) -> list[dict]:
+        """Определения ограничений таблиц рабочей схемы указанных типов ('p', 'u', 'f')."""
+        return connection.execute(
+            """
+            SELECT c.conname AS name, t.relname AS table, c.contype AS type, pg_get_constraintdef(c.oid) AS definition
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = %s AND t.relname = ANY(%s) AND c.contype = ANY(%s)
+            ORDER BY t.relname, c.conname
+            """,
+            [self.schema, self.tables, list(contypes)],
+        ).fetchall()
+
+    def _secondary_indexes(self, connection: psycopg.Connection) -> list[dict]:
+        """Определения индексов рабочей схемы, не обслуживающих ограничения."""
+        return connection.execute(
+            """
+            SELECT i.relname AS name, t.relname AS table, pg_get_indexdef(i.oid) AS definition
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            JOIN pg_class t ON t.oid = x.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = %s AND t.relname = ANY(%s)
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+            ORDER BY t.relname, i.relname
+            """,
+            [self.schema, self.tables],
+        ).fetchall()
+
+    def _materialized_views(self, connection: psycopg.Connection) -> list[dict]:
+        """Материализованные представления рабочей схемы (content.film_work_summary) с их индексами."""
+        views = connection.execute(
+            "SELECT matviewname AS name, definition FROM pg_matviews WHERE schemaname = %s ORDER BY matviewname",
+            [self.schema],
+        ).fetchall()
+        for view in views:
+            view['indexes'] = [row['indexdef'] for row in connection.execute(
+                "SELECT indexdef FROM pg_indexes WHERE schemaname = %s AND tablename = %s ORDER BY indexname",
+                [self.schema, view['name']],
+            ).fetchall()]
+        return views
+
+    def _staging_tables(self, connection: psycopg.Connection) -> set[str]:
+        rows = connection.execute(
+            "SELECT tablename FROM pg_tables WHERE schemaname = %s AND tablename = ANY(%s)",
+            [self.staging_schema, self.tables],
+        ).fetchall()
+        return {row['tablename'] for row in rows}
+
+    def prepare(self, resume: bool = True) -> bool:
+        """
+        Создаёт промежуточные таблицы.
+
+        :param resume: Оставить уже существующие промежуточные таблицы (продолжение прерванной загрузки).
+        :return: True, если таблицы созданы заново (контрольные точки прежней загрузки недействительны).
+        """
+        with psycopg.connect(**self.dsl, row_factory=dict_row) as connection:
+            if resume and self._staging_tables(connection) == set(self.tables):
+                logger.info(f"Staging: continuing load into existing tables in schema {self.staging_schema}")
+                return False
+
+            connection.execute(f'CREATE SCHEMA IF NOT EXISTS {self.staging_schema}')
+            # Представления, оставшиеся от прерванной публикации, не дадут удалить таблицы
+            for view in self._materialized_views(connection):
+                connection.execute(f"DROP MATERIALIZED VIEW IF EXISTS {self.staging_schema}.{view['name']}")
+            for table in self.tables:
+                connection.execute(f'DROP TABLE IF EXISTS {self.staging_schema}.{table}')
+                connection.execute(
+                    f'CREATE UNLOGGED TABLE {self.staging_schema}.{table} '
+                    f'(LIKE {self.schema}.{table} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)'
+                )
+            # Первичные ключи и UNIQUE - сразу и с прежними именами: имена индексов уникальны в пределах схемы
+            for constraint in self._constraints(connection, 'pu'):
+                connection.execute(
+                    f"ALTER TABLE {self.staging_schema}.{constraint['table']} "
+                    f"ADD CONSTRAINT {constraint['name']} {constraint['definition']}"
+                )
+        logger.info(f"Staging: created UNLOGGED tables in schema {self.staging_schema}")
+        return True
+
+    def build_indexes(self) -> None:
+        """Строит вторичные индексы промежуточных таблиц (один раз, после загрузки)."""
+        with psycopg.connect(**self.dsl, row_factory=dict_row) as connection:
+            for index in self._secondary_indexes(connection):
+                definition = index['definition'].replace(
+                    f" ON {self.schema}.{index['table']} ", f" ON {self.staging_schema}.{index['table']} ", 1
+                )
+                connection.execute(definition.replace('INDEX ', 'INDEX IF NOT EXISTS ', 1))
+            for table in self.tables:
+                connection.execute(f'ANALYZE {self.staging_schema}.{table}')
+
+    def reject_orphans(self, dead_letter) -> int:
+        """
+        Переносит в dead_letter строки промежуточных таблиц, ссылающиеся на отсутствующие строки
+        (например, на строки, отложенные при записи). В content их не пропустили бы внешние ключи,
+        а у промежуточных таблиц внешних ключей нет.
+
+        :param dead_letter: Хранилище отвергнутых строк (dead_letter.py).
+        :return: Количество отложенных строк.
+        """
+        rejected = 0
+        with psycopg.connect(**self.dsl, row_factory=dict_row) as connection, connection.cursor() as cursor:
+            for fk in self._constraints(connection, 'f'):
+                match = _FOREIGN_KEY.search(fk['definition'])
+                if match is None:
+                    continue
+                column, parent, parent_column = match.groups()
+                orphans = cursor.execute(
+                    f"DELETE FROM {self.staging_schema}.{fk['table']} c "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM {self.staging_schema}.{parent} p "
+                    f"WHERE p.{parent_column} = c.{column}) RETURNING *"
+                ).fetchall()
+                for row in orphans:
+                    error = f'violates foreign key constraint "{fk["name"]}": {parent} {row[column]} is missing'
+                    dead_letter.write(cursor, fk['table'], row, error)
+                    logger.warning(f"Staging: rejected row {row['id']} of table '{fk['table']}': {error}")
+                rejected += len(orphans)
+        return rejected
+
+    def verify(self, sqlite_conn, exclude_ids: Optional[dict[str, frozenset[str]]] = None) -> list[str]:
+        """
+        Проверяет промежуточные таблицы: совпадение с SQLite и отсутствие строк-сирот по внешним ключам.
+
+        :param sqlite_conn: Соединение с SQLite.
+        :param exclude_ids: id намеренно не перенесённых строк по таблицам.
+        :return: Список найденных проблем (пустой, если таблицы можно публиковать).
+        """
+        problems = []
+        with psycopg.connect(**self.dsl, row_factory=dict_row) as connection:
+            for table in self.tables:
+                report = TransferVerifier(
+                    sqlite_conn, connection, table, schema=self.staging_schema,
+                    exclude_ids=(exclude_ids or {}).get(table, frozenset()),
+                ).verify()
+                if not report.ok:
+                    problems.append(f"{table}: data differs from SQLite")
+
+            for fk in self._constraints(connection, 'f'):
+                match = _FOREIGN_KEY.search(fk['definition'])
+                if match is None:
+                    continue
+                column, parent, parent_column = match.groups()
+                orphans = connection.execute(
+                    f"SELECT count(*) AS orphans FROM {self.staging_schema}.{fk['table']} c "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM {self.staging_schema}.{parent} p "
+                    f"WHERE p.{parent_column} = c.{column})"
+                ).fetchone()['orphans']
+                if orphans:
+                    problems.append(f"{fk['table']}: {orphans} rows violate {fk['name']}")
+        return problems
+
+    def publish(self) -> None:
+        """
+        Подменяет таблицы рабочей схемы промежуточными.
+
+        Таблицы переводятся в LOGGED заранее. Материализованные представления рабочей схемы тоже
+        заранее строятся по промежуточным таблицам и подменяются вместе с ними: иначе они удалились бы
+        вместе с прежними таблицами, от которых зависят. Сама подмена - перенос таблиц между схемами
+        в одной транзакции, которая ждёт блокировок не дольше lock_timeout. Прежние таблицы
+        удаляются после фиксации, внешние ключи новых таблиц проверяются уже без эксклюзивной блокировки.
+
+        :raises psycopg.Error: Если не удалось получить блокировки или выполнить подмену
+            (рабочие таблицы при этом не меняются).
+        """
+        with psycopg.connect(**self.dsl, row_factory=dict_row) as connection:
+            foreign_keys = self._constraints(connection, 'f')
+
+            # Запись таблиц в WAL - долгая операция, она выполняется до подмены
+            for table in self.tables:
+                connection.execute(f'ALTER TABLE {self.staging_schema}.{table} SET LOGGED')
+            views = self._materialized_views(connection)
+            for view in views:
+                staged = re.sub(rf'\b{self.schema}\.', f'{self.staging_schema}.', view['definition'])
+                connection.execute(f"DROP MATERIALIZED VIEW IF EXISTS {self.staging_schema}.{view['name']}")
+                connection.execute(f"CREATE MATERIALIZED VIEW {self.staging_schema}.{view['name']} AS {staged}")
+                for index in view['indexes']:
+                    connection.execute(re.sub(rf'\bON {self.schema}\.', f'ON {self.staging_schema}.', index, count=1))
+            connection.commit()
+
+            connection.execute(f"SET LOCAL lock_timeout = '{self.lock_timeout}'")
+            connection.execute(
+                f"LOCK TABLE {', '.join(f'{self.schema}.{table}' for table in self.tables)} IN ACCESS EXCLUSIVE MODE"
+            )
+            connection.execute(f'DROP SCHEMA IF EXISTS {RETIRED_SCHEMA} CASCADE')
+            connection.execute(f'CREATE SCHEMA {RETIRED_SCHEMA}')
+            for table in self.tables:
+                connection.execute(f'ALTER TABLE {self.schema}.{table} SET SCHEMA {RETIRED_SCHEMA}')
+                connection.execute(f'ALTER TABLE {self.staging_schema}.{table} SET SCHEMA {self.schema}')
+            for view in views:
+                connection.execute(f"ALTER MATERIALIZED VIEW {self.schema}.{view['name']} SET SCHEMA {RETIRED_SCHEMA}")
+                connection.execute(f"ALTER MATERIALIZED VIEW {self.staging_schema}.{view['name']} SET SCHEMA {self.schema}")
+            for fk in foreign_keys:
+                connection.execute(
+                    f"ALTER TABLE {self.schema}.{fk['table']} ADD CONSTRAINT {fk['name']} {fk['definition']} NOT VALID"
+                )
+            connection.commit()
+            logger.info(f"Staging: published {', '.join(self.tables)} into schema {self.schema}")
+
+            connection.execute(f'DROP SCHEMA {RETIRED_SCHEMA} CASCADE')
+            for fk in foreign_keys:
+                connection.execute(f"ALTER TABLE {self.schema}.{fk['table']} VALIDATE CONSTRAINT {fk['name']}")
+            connection.commit()
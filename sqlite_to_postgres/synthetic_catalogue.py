@@ -0,0 +1,171 @@
+"""
+Генератор синтетического каталога SQLite для нагрузочных проверок переноса.
+
+Создаёт таблицы с тем же порядком столбцов, что и в исходном db.sqlite (строки переносятся
+по позициям столбцов, см. PostgresSaver.TABLE_TO_DATACLASS), и заполняет их воспроизводимыми данными:
+у каждого фильма 1-3 жанра и несколько персон в разных ролях.
+
+Запуск: python synthetic_catalogue.py <путь к db.sqlite> [число фильмов | small | medium | large]
+"""
+import logging
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from typing import Iterator
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+# Готовые размеры каталога (число фильмов)
+SIZES = {'small': 10_000, 'medium': 1_000_000, 'large': 10_000_000}
+
+SCHEMA = """
+CREATE TABLE film_work (
+    id TEXT PRIMARY KEY, title TEXT NOT NULL, description TEXT, creation_date DATE, file_path TEXT,
+    rating FLOAT, type TEXT NOT NULL, created_at timestamp with time zone, updated_at timestamp with time zone
+);
+CREATE TABLE genre (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, description TEXT,
+    created_at timestamp with time zone, updated_at timestamp with time zone
+);
+CREATE TABLE person (
+    id TEXT PRIMARY KEY, full_name TEXT NOT NULL,
+    created_at timestamp with time zone, updated_at timestamp with time zone
+);
+CREATE TABLE genre_film_work (
+    id TEXT PRIMARY KEY, film_work_id TEXT NOT NULL, genre_id TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+CREATE TABLE person_film_work (
+    id TEXT PRIMARY KEY, film_work_id TEXT NOT NULL, person_id TEXT NOT NULL, role TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+"""
+
+GENRES = 50
+# Персон на фильм в среднем; сами персоны переиспользуются между фильмами
+PERSONS_PER_FILM = 6
+PERSON_POOL_RATIO = 0.5
+ROLES = ('actor', 'actor', 'actor', 'actor', 'director', 'writer')
+FILM_TYPES = ('movie', 'movie', 'movie', 'tv_show')
+
+CHUNK = 10_000
+EPOCH = datetime(2021, 1, 1)
+
+
+class _Generator:
+    """Источник воспроизводимых случайных значений."""
+
+    def __init__(self, seed: int) -> None:
+        self.random = random.Random(seed)
+
+    def uuid(self) -> str:
+        return str(UUID(int=self.random.getrandbits(128), version=4))
+
+    def timestamp(self) -> str:
+        moment = EPOCH + timedelta(seconds=self.random.randrange(3 * 365 * 24 * 3600),
+                                   microseconds=self.random.randrange(1_000_000))
+        return moment.strftime('%Y-%m-%d %H:%M:%S.%f+00')
+
+
+def _chunks(rows: Iterator[tuple]) -> Iterator[list[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(connection: sqlite3.Connection, table_name: str, rows: Iterator[tuple]) -> int:
+    count = 0
+    for chunk in _chunks(rows):
+        connection.executemany(f"INSERT INTO {table_name} VALUES ({', '.join(['?'] * len(chunk[0]))})", chunk)
+        count += len(chunk)
+    return count
+
+
+def generate_catalogue(path: str, films: int, seed: int = 42) -> dict[str, int]:
+    """
+    Создаёт файл SQLite с синтетическим каталогом.
+
+    Файл перезаписывается. Связи person_film_work уникальны по (person_id, film_work_id, role),
+    а genre_film_work - по (genre_id, film_work_id), как того требуют ограничения в PostgreSQL.
+
+    :param path: Путь к создаваемому файлу.
+    :param films: Число фильмов.
+    :param seed: Зерно генератора, одинаковое зерно даёт одинаковый каталог.
+    :return: Число строк в каждой таблице.
+    :raises ValueError: Если число фильмов не положительное.
+    """
+    if films <= 0:
+        raise ValueError("films must be a positive integer.")
+
+    gen = _Generator(seed)
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        for table_name in ('film_work', 'genre', 'person', 'genre_film_work', 'person_film_work'):
+            connection.execute(f'DROP TABLE IF EXISTS {table_name}')
+        connection.executescript(SCHEMA)
+
+        genre_ids = [gen.uuid() for _ in range(GENRES)]
+        person_ids = [gen.uuid() for _ in range(max(1, int(films * PERSON_POOL_RATIO)))]
+
+        counts = {
+            'genre': _insert(connection, 'genre', (
+                (genre_id, f'Genre {i}', f'Description of genre {i}', gen.timestamp(), gen.timestamp())
+                for i, genre_id in enumerate(genre_ids)
+            )),
+            'person': _insert(connection, 'person', (
+                (person_id, f'Person {i}', gen.timestamp(), gen.timestamp()) for i, person_id in enumerate(person_ids)
+            )),
+            'film_work': 0, 'genre_film_work': 0, 'person_film_work': 0,
+        }
+
+        # Фильмы и их связи создаются потоком, id фильмов в памяти не накапливаются
+        def film_rows() -> Iterator[tuple]:
+            r = gen.random
+            for i in range(films):
+                film_id = gen.uuid()
+                created_at = gen.timestamp()
+                yield 'film_work', (
+                    film_id, f'Film {i}', None if r.random() < 0.2 else f'Synthetic description of film {i}. ' * 3,
+                    None if r.random() < 0.3 else f'{r.randrange(1950, 2024)}-{r.randrange(1, 13):02}-01',
+                    None, None if r.random() < 0.1 else round(r.uniform(0, 9.9), 1), r.choice(FILM_TYPES),
+                    created_at, created_at,
+                )
+                for genre_id in r.sample(genre_ids, r.randint(1, 3)):
+                    yield 'genre_film_work', (gen.uuid(), film_id, genre_id, created_at)
+                links = {(r.choice(person_ids), r.choice(ROLES))
+                         for _ in range(r.randint(1, 2 * PERSONS_PER_FILM - 1))}
+                for person_id, role in links:
+                    yield 'person_film_work', (gen.uuid(), film_id, person_id, role, created_at)
+
+        pending: dict[str, list[tuple]] = {'film_work': [], 'genre_film_work': [], 'person_film_work': []}
+        for table_name, row in film_rows():
+            rows = pending[table_name]
+            rows.append(row)
+            if len(rows) == CHUNK:
+                counts[table_name] += _insert(connection, table_name, iter(rows))
+                rows.clear()
+        for table_name, rows in pending.items():
+            if rows:
+                counts[table_name] += _insert(connection, table_name, iter(rows))
+
+        connection.commit()
+    finally:
+        connection.close()
+
+    logger.info(f"Synthetic catalogue {path}: {counts}")
+    return counts
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    size = sys.argv[2] if len(sys.argv) > 2 else 'small'
+    generate_catalogue(sys.argv[1], SIZES[size] if size in SIZES else int(size))
@@ -1,5 +1,7 @@
 import sqlite3
 import psycopg
+from dataclasses import astuple, fields
+from datetime import date, datetime
 from uuid import UUID
 from film_work_dataclass import FilmWork
 from genre_dataclass import Genre
@@ -13,6 +15,17 @@ from person_film_work_dataclass import PersonFilmWork
 
 import logging
 
+
+def _comparable(item) -> tuple:
+    """Значения dataclass в сравнимом виде: UUID и даты из PostgreSQL - как строки SQLite."""
+    return tuple(
+        str(value) if isinstance(value, UUID)
+        else value.isoformat() if isinstance(value, date) and not isinstance(value, datetime)
+        else value
+        for value in astuple(item)
+    )
+
+
 class TestTransfer():
 
     TABLE_TO_DATACLASS = {
@@ -24,12 +37,16 @@ class TestTransfer():
     }
 
 
-    def __init__(self, sqlite_conn: sqlite3.Connection, pg_conn: psycopg.Connection, table_name: str, batch: int = 100) -> None:
+    def __init__(self, sqlite_conn: sqlite3.Connection, pg_conn: psycopg.Connection, table_name: str, batch: int = 100,
+                 schema: str = 'content') -> None:
         self.sqlite_conn = sqlite_conn
         self.pg_conn = pg_conn
         self.batch = batch
         self.table_name = table_name
+        self.schema = schema
         self.dataclass = self.TABLE_TO_DATACLASS[table_name]
+        # Сравниваются только поля dataclass: в PostgreSQL у таблиц есть и свои столбцы (search_vector)
+        self.columns = ', '.join(field.name for field in fields(self.dataclass))
         self.logger = logging.getLogger(__name__)
 
     def test_transfer(self) -> None:
@@ -39,7 +56,7 @@ class TestTransfer():
             pg_cursor = self.pg_conn.cursor()
 
             # Выполняем запрос к SQLite
-            sqlite_cursor.execute('SELECT * FROM {table}'.format(table=self.table_name))
+            sqlite_cursor.execute('SELECT {columns} FROM {table}'.format(columns=self.columns, table=self.table_name))
 
             while batch := sqlite_cursor.fetchmany(self.batch):
                 try:
@@ -47,13 +64,16 @@ class TestTransfer():
                     original_data_batch = [self.dataclass(*row) for row in batch]
                     ids = [data.id for data in original_data_batch]
                     # Выполняем запрос к PostgreSQL для получения данных
-                    pg_cursor.execute('SELECT * FROM content.{table} WHERE id = ANY(%s)'.format(table=self.table_name), [ids])
+                    pg_cursor.execute('SELECT {columns} FROM {schema}.{table} WHERE id = ANY(%s)'.format(
+                        columns=self.columns, schema=self.schema, table=self.table_name), [ids])
 
                     transferred_data_batch = [self.dataclass(**row) for row in pg_cursor.fetchall()]
+                    # id из SQLite - строки, из PostgreSQL - UUID: сопоставляем по строковому виду
+                    transferred_by_id = {str(item.id): item for item in transferred_data_batch}
                     for data in original_data_batch:
-                        for item in transferred_data_batch:
-                            if data.id == item.id:
-                                assert data == item, (f"{data} \nnot equal to {item}")
+                        item = transferred_by_id.get(str(data.id))
+                        if item is not None:
+                            assert _comparable(data) == _comparable(item), (f"{data} \nnot equal to {item}")
 
                     # Проверяем количество
                     assert len(original_data_batch) == len(transferred_data_batch), \
@@ -0,0 +1,73 @@
+import os
+import sys
+import uuid
+
+import psycopg
+import pytest
+
+# Модули переноса импортируются по плоским именам (from postgres_saver import ...), как в load_data.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def dsl() -> dict:
+    """Параметры подключения к тестовому PostgreSQL из тех же переменных окружения, что и у load_data.py."""
+    return {
+        'dbname': os.getenv('DB_NAME'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'host': os.getenv('DB_HOST'),
+        'port': os.getenv('DB_PORT'),
+    }
+
+
+@pytest.fixture
+def pg_conn(dsl):
+    """Соединение с PostgreSQL; тест пропускается, если сервер недоступен."""
+    try:
+        connection = psycopg.connect(**dsl, connect_timeout=3)
+    except psycopg.OperationalError as e:
+        pytest.skip(f"PostgreSQL is not available: {e}")
+    with connection:
+        yield connection
+
+
+@pytest.fixture
+def pg_schema(pg_conn):
+    """Отдельная схема на время теста, удаляется вместе с таблицами после него."""
+    schema = f'test_{uuid.uuid4().hex[:12]}'
+    pg_conn.execute(f'CREATE SCHEMA {schema}')
+    pg_conn.commit()
+    yield schema
+    pg_conn.rollback()
+    pg_conn.execute(f'DROP SCHEMA {schema} CASCADE')
+    pg_conn.commit()
+
+
+@pytest.fixture
+def film_work_table(pg_conn, pg_schema) -> str:
+    """Таблица film_work с теми же столбцами и ограничениями, что и в schema_design/movies_database.ddl."""
+    pg_conn.execute(f"""
+        CREATE TABLE {pg_schema}.film_work (
+            id UUID PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            creation_date DATE,
+            file_path TEXT,
+            rating DECIMAL(2,1) CHECK (rating >= 0 AND rating <= 10),
+            type VARCHAR NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            search_vector TSVECTOR GENERATED ALWAYS AS (
+                to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))
+            ) STORED
+        )
+    """)
+    pg_conn.commit()
+    return pg_schema
+
+
+def film_row(rating=5.0, title='Film') -> tuple:
+    """Строка film_work в порядке полей датакласса FilmWork."""
+    return (str(uuid.uuid4()), title, 'description', None, None, rating, 'movie',
+            '2021-06-16 20:14:09.221855+00', '2021-06-16 20:14:09.221855+00')
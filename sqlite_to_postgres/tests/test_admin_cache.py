@@ -0,0 +1,18 @@
+from admin_cache import clear_admin_cache
+
+
+def test_clears_only_admin_keys(pg_conn, dsl, pg_schema):
+    table = f'{pg_schema}.django_cache'
+    # Таблица в том виде, в каком её создаёт python manage.py createcachetable
+    pg_conn.execute(f'CREATE TABLE {table} (cache_key VARCHAR(255) PRIMARY KEY, value TEXT NOT NULL, '
+                    f'expires TIMESTAMPTZ NOT NULL)')
+    pg_conn.execute(f"INSERT INTO {table} VALUES (':1:admin-facets:filmwork', '', now()), "
+                    f"(':1:admin-autocomplete:1:term=keanu', '', now()), (':1:session:abc', '', now())")
+    pg_conn.commit()
+
+    assert clear_admin_cache(dsl, table) == 2
+    assert pg_conn.execute(f'SELECT cache_key FROM {table}').fetchall() == [(':1:session:abc',)]
+
+
+def test_missing_cache_table_is_skipped(pg_conn, dsl, pg_schema):
+    assert clear_admin_cache(dsl, f'{pg_schema}.django_cache') == 0
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from conftest import film_row
+from dead_letter import JsonlDeadLetter
+from postgres_saver import PostgresSaver
+
+columnar = pytest.importorskip('columnar', reason='NumPy is required for the columnar mode')
+pytest.importorskip('numpy')
+
+
+def columnar_batch(rows):
+    from film_work_dataclass import FilmWork
+    return columnar.ColumnarValidator(FilmWork).validate(rows)
+
+
+def test_invalid_rows_go_to_dead_letter(pg_conn, film_work_table, tmp_path):
+    rows = [film_row(), film_row(rating=42.0), film_row()]
+    dead_letter = JsonlDeadLetter(str(tmp_path / 'dead_letter.jsonl'))
+    saver = PostgresSaver(pg_conn, 'film_work', raw=True, schema=film_work_table, dead_letter=dead_letter)
+
+    assert saver.save_all_data([columnar_batch(rows)]) == 2
+    pg_conn.commit()
+
+    entries = [json.loads(line) for line in open(dead_letter.path, encoding='utf-8')]
+    assert [entry['record']['id'] for entry in entries] == [rows[1][0]]
+    assert 'rating' in entries[0]['error']
+    count = pg_conn.execute(f'SELECT count(*) FROM {film_work_table}.film_work').fetchone()[0]
+    assert count == 2
+
+
+def test_invalid_rows_stop_migration_without_dead_letter(pg_conn, film_work_table):
+    saver = PostgresSaver(pg_conn, 'film_work', raw=True, schema=film_work_table)
+
+    with pytest.raises(ValueError, match='invalid rows'):
+        saver.save_all_data([columnar_batch([film_row(), film_row(rating=42.0)])])
@@ -0,0 +1,64 @@
+import json
+import uuid
+
+import pytest
+
+from dead_letter import JsonlDeadLetter
+from load_data import MigrationConfig
+from staging import StagingArea
+
+
+def test_new_migration_starts_with_empty_dead_letter(pg_conn, tmp_path):
+    dead_letter = JsonlDeadLetter(str(tmp_path / 'dead_letter.jsonl'))
+    with pg_conn.cursor() as cursor:
+        dead_letter.write(cursor, 'film_work', {'id': 'previous-run'}, 'error')
+
+    dead_letter.clear(pg_conn)
+    with pg_conn.cursor() as cursor:
+        dead_letter.write(cursor, 'film_work', {'id': 'this-run'}, 'error')
+
+    assert dead_letter.rejected_ids(pg_conn) == {'film_work': frozenset({'this-run'})}
+    assert (tmp_path / 'dead_letter.jsonl.previous').exists()
+
+
+def test_dead_letter_is_rejected_with_delta_sync():
+    config = MigrationConfig(sqlite_db=':memory:', dsl={}, sync_mode='delta', dead_letter='jsonl')
+
+    with pytest.raises(ValueError, match='DEAD_LETTER'):
+        config.validate()
+
+
+def test_staging_rejects_rows_referencing_missing_parents(pg_conn, dsl, pg_schema, tmp_path):
+    staging_schema = f'{pg_schema}_staging'
+    pg_conn.execute(f'CREATE SCHEMA {staging_schema}')
+    for schema in (pg_schema, staging_schema):
+        pg_conn.execute(f'CREATE TABLE {schema}.film_work (id UUID PRIMARY KEY)')
+    # Как и у промежуточных таблиц load_data.py, внешний ключ есть только в рабочей схеме
+    pg_conn.execute(f"""
+        CREATE TABLE {pg_schema}.genre_film_work (
+            id UUID PRIMARY KEY,
+            film_work_id UUID NOT NULL REFERENCES {pg_schema}.film_work (id)
+        )
+    """)
+    pg_conn.execute(f'CREATE TABLE {staging_schema}.genre_film_work (id UUID PRIMARY KEY, film_work_id UUID NOT NULL)')
+    film_id, missing_film_id, link_id, orphan_id = (uuid.uuid4() for _ in range(4))
+    pg_conn.execute(f'INSERT INTO {staging_schema}.film_work VALUES (%s)', [film_id])
+    pg_conn.execute(f'INSERT INTO {staging_schema}.genre_film_work VALUES (%s, %s), (%s, %s)',
+                    [link_id, film_id, orphan_id, missing_film_id])
+    pg_conn.commit()
+    dead_letter = JsonlDeadLetter(str(tmp_path / 'dead_letter.jsonl'))
+    staging = StagingArea(dsl, ['film_work', 'genre_film_work'], schema=pg_schema, staging_schema=staging_schema)
+
+    try:
+        assert staging.reject_orphans(dead_letter) == 1
+        remaining = pg_conn.execute(f'SELECT id FROM {staging_schema}.genre_film_work').fetchall()
+    finally:
+        pg_conn.rollback()
+        pg_conn.execute(f'DROP SCHEMA {staging_schema} CASCADE')
+        pg_conn.commit()
+
+    assert remaining == [(link_id,)]
+    entries = [json.loads(line) for line in open(dead_letter.path, encoding='utf-8')]
+    assert [(entry['table'], entry['record']['id']) for entry in entries] == [('genre_film_work', str(orphan_id))]
+    assert 'foreign key' in entries[0]['error']
+    assert dead_letter.rejected_ids(pg_conn) == {'genre_film_work': frozenset({str(orphan_id)})}
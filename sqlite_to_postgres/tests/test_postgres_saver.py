@@ -0,0 +1,38 @@
+import json
+
+import psycopg
+import pytest
+
+from conftest import film_row
+from dead_letter import JsonlDeadLetter
+from film_work_dataclass import FilmWork
+from postgres_saver import WRITE_MODES, PostgresSaver
+
+
+@pytest.mark.parametrize('mode', WRITE_MODES)
+def test_only_bad_row_goes_to_dead_letter(pg_conn, film_work_table, tmp_path, mode):
+    rows = [film_row(title=f'Film {i}') for i in range(300)]
+    rows[150] = film_row(rating=42.0)
+    dead_letter = JsonlDeadLetter(str(tmp_path / 'dead_letter.jsonl'))
+    saver = PostgresSaver(pg_conn, 'film_work', mode=mode, schema=film_work_table, dead_letter=dead_letter)
+    films = [FilmWork(*row) for row in rows]
+
+    # Плохая строка во второй партии: остальные строки всех трёх партий должны быть записаны
+    assert saver.save_all_data([films[:100], films[100:200], films[200:]]) == 299
+    pg_conn.commit()
+
+    entries = [json.loads(line) for line in open(dead_letter.path, encoding='utf-8')]
+    assert [entry['record']['id'] for entry in entries] == [rows[150][0]]
+    # В dead_letter попадает ошибка самой строки, а не прерванного конвейера
+    assert 'numeric field overflow' in entries[0]['error']
+    written = {row[0] for row in pg_conn.execute(f'SELECT id::text FROM {film_work_table}.film_work')}
+    assert written == {row[0] for row in rows} - {rows[150][0]}
+
+
+def test_bad_row_stops_pipeline_without_dead_letter(pg_conn, film_work_table):
+    saver = PostgresSaver(pg_conn, 'film_work', mode='insert_pipeline', schema=film_work_table)
+
+    with pytest.raises(psycopg.DatabaseError, match='numeric field overflow'):
+        saver.save_all_data([[FilmWork(*film_row()), FilmWork(*film_row(rating=42.0))]])
+    count = pg_conn.execute(f'SELECT count(*) FROM {film_work_table}.film_work').fetchone()[0]
+    assert count == 0
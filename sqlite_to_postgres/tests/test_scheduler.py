@@ -0,0 +1,25 @@
+import os
+import re
+
+from scheduler import TABLE_DEPENDENCIES
+
+DDL_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'schema_design', 'movies_database.ddl')
+
+
+def ddl_dependencies() -> dict[str, tuple[str, ...]]:
+    """Таблицы схемы content и таблицы, на которые ссылаются их внешние ключи, по тексту DDL."""
+    with open(DDL_PATH, encoding='utf-8') as f:
+        ddl = f.read()
+    dependencies = {}
+    for match in re.finditer(r'CREATE TABLE (?:IF NOT EXISTS )?content\.(\w+) \((.*?)\n\);', ddl, re.S):
+        table, body = match.groups()
+        dependencies[table] = tuple(re.findall(r'REFERENCES content\.(\w+)', body))
+    return dependencies
+
+
+def test_table_dependencies_match_ddl():
+    ddl = ddl_dependencies()
+
+    assert ddl, f"No CREATE TABLE statements found in {DDL_PATH}"
+    assert {table: set(parents) for table, parents in TABLE_DEPENDENCIES.items()} == \
+        {table: set(parents) for table, parents in ddl.items()}
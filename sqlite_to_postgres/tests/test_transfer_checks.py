@@ -0,0 +1,49 @@
+import sqlite3
+
+import psycopg
+import pytest
+from psycopg import ClientCursor
+from psycopg.rows import dict_row
+
+from conftest import film_row
+from film_work_dataclass import FilmWork
+from postgres_saver import PostgresSaver
+from verification import TransferVerifier
+
+# Модуль, а не класс: иначе pytest попытается собрать TestTransfer как набор тестов
+import test_transfer
+
+
+@pytest.fixture
+def transferred(pg_conn, film_work_table):
+    """SQLite с таблицей film_work и её копия в PostgreSQL (со сгенерированным столбцом search_vector)."""
+    rows = [film_row(title=f'Film {i}') for i in range(5)]
+    sqlite_conn = sqlite3.connect(':memory:')
+    sqlite_conn.execute('CREATE TABLE film_work (id, title, description, creation_date, file_path, rating, type, '
+                        'created_at, updated_at)')
+    sqlite_conn.executemany('INSERT INTO film_work VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    PostgresSaver(pg_conn, 'film_work', schema=film_work_table).save_all_data([[FilmWork(*row) for row in rows]])
+    pg_conn.commit()
+    yield sqlite_conn
+    sqlite_conn.close()
+
+
+def test_row_check_ignores_generated_columns(dsl, film_work_table, transferred):
+    with psycopg.connect(**dsl, row_factory=dict_row, cursor_factory=ClientCursor) as pg_conn:
+        test_transfer.TestTransfer(transferred, pg_conn, 'film_work', schema=film_work_table).test_transfer()
+
+
+def test_row_check_detects_changed_row(dsl, pg_conn, film_work_table, transferred):
+    pg_conn.execute(f"UPDATE {film_work_table}.film_work SET title = 'Changed' WHERE title = 'Film 3'")
+    pg_conn.commit()
+
+    with psycopg.connect(**dsl, row_factory=dict_row, cursor_factory=ClientCursor) as check_conn:
+        with pytest.raises(RuntimeError, match='Data mismatch'):
+            test_transfer.TestTransfer(transferred, check_conn, 'film_work', schema=film_work_table).test_transfer()
+
+
+def test_digest_check_ignores_generated_columns(dsl, film_work_table, transferred):
+    with psycopg.connect(**dsl, row_factory=dict_row, cursor_factory=ClientCursor) as pg_conn:
+        report = TransferVerifier(transferred, pg_conn, 'film_work', schema=film_work_table).verify()
+
+    assert report.ok
@@ -0,0 +1,238 @@
+import hashlib
+import logging
+import random
+import sqlite3
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Optional
+import psycopg
+from psycopg.rows import tuple_row
+from postgres_saver import PostgresSaver
+from row_converters import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Разделитель полей и обозначение NULL в канонической записи строки
+FIELD_SEPARATOR = '\x1f'
+NULL = '\\N'
+# Число шестнадцатеричных цифр md5, складываемых в сумму (60 бит помещаются в bigint)
+DIGEST_HEX_DIGITS = 15
+HEX_DIGITS = '0123456789abcdef'
+# Первые 8 символов UUID - шестнадцатеричные цифры, дальше идёт дефис
+MAX_PREFIX_LENGTH = 8
+
+
+@dataclass
+class VerificationReport:
+    """Результат сверки таблицы."""
+    table_name: str
+    buckets_checked: int = 0
+    mismatched_buckets: list[str] = field(default_factory=list)
+    missing_ids: list[str] = field(default_factory=list)
+    extra_ids: list[str] = field(default_factory=list)
+    different_ids: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.mismatched_buckets or self.missing_ids or self.extra_ids or self.different_ids)
+
+
+def _canonical_sqlite_value(value: Any, pg_type: str) -> str:
+    """Приводит значение из SQLite к тому же тексту, который строит для PostgreSQL _canonical_pg_expression."""
+    if value is None:
+        return NULL
+    if pg_type == 'uuid':
+        return str(value).lower()
+    if pg_type == 'numeric':
+        return str(Decimal(str(value)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP))
+    if pg_type == 'timestamp':
+        return parse_timestamp(value).strftime('%Y-%m-%d %H:%M:%S.%f')
+    return str(value)
+
+
+def _canonical_pg_expression(column: str, pg_type: str) -> str:
+    """SQL-выражение канонической записи столбца в PostgreSQL."""
+    if pg_type == 'timestamp':
+        expression = f"to_char({column}, 'YYYY-MM-DD HH24:MI:SS.US')"
+    else:
+        expression = f'{column}::text'
+    return f"coalesce({expression}, '{NULL}')"
+
+
+def row_digest(canonical: str) -> int:
+    """Хеш канонической записи строки: первые DIGEST_HEX_DIGITS цифр md5 как целое число."""
+    return int(hashlib.md5(canonical.encode()).hexdigest()[:DIGEST_HEX_DIGITS], 16)
+
+
+class TransferVerifier:
+    """
+    Сверяет таблицу в SQLite и PostgreSQL по контрольным суммам диапазонов id.
+
+    Строки распределяются по диапазонам (bucket) по первым шестнадцатеричным цифрам id.
+    Для каждого диапазона с обеих сторон считаются число строк и сумма хешей канонических
+    записей строк - величина, не зависящая от порядка строк. В PostgreSQL суммы считаются
+    на сервере одним GROUP BY. Только диапазоны с расхождениями уточняются следующими
+    цифрами id, пока не станут достаточно малыми для построчного сравнения.
+    """
+
+    def __init__(self, sqlite_conn: sqlite3.Connection, pg_conn: psycopg.Connection, table_name: str,
+                 prefix_length: int = 2, drill_down_rows: int = 1000, schema: str = 'content',
+                 exclude_ids: frozenset[str] = frozenset()) -> None:
+        """
+        Инициализирует объект TransferVerifier.
+
+        :param sqlite_conn: Соединение с SQLite.
+        :param pg_conn: Соединение с PostgreSQL.
+        :param table_name: Имя таблицы.
+        :param prefix_length: Число цифр id, задающих диапазоны первого уровня (2 -> 256 диапазонов).
+        :param drill_down_rows: Диапазоны не больше этого размера сравниваются построчно.
+        :param schema: Схема таблицы в PostgreSQL.
+        :param exclude_ids: id строк SQLite, намеренно не перенесённых (строки-сироты, см. integrity.py).
+        :raises ValueError: Если таблица не поддерживается.
+        """
+        if table_name not in PostgresSaver.TABLE_TO_DATACLASS:
+            raise ValueError(f"Invalid table name: {table_name}")
+
+        self.sqlite_conn = sqlite_conn
+        self.pg_conn = pg_conn
+        self.table_name = table_name
+        self.prefix_length = prefix_length
+        self.drill_down_rows = drill_down_rows
+        self.schema = schema
+        self.exclude_ids = frozenset(row_id.lower() for row_id in exclude_ids)
+
+        self.fields = PostgresSaver.TABLE_TO_DATACLASS[table_name]['fields']
+        self.pg_types = PostgresSaver.TABLE_TO_DATACLASS[table_name]['pg_types']
+        self._pg_row_expression = "concat_ws(E'\\x1f', {})".format(
+            ', '.join(_canonical_pg_expression(column, pg_type) for column, pg_type in zip(self.fields, self.pg_types))
+        )
+
+    # --- SQLite ---
+
+    def _sqlite_rows(self, prefixes: Optional[list[str]]):
+        """Выдаёт (id, каноническая запись) строк SQLite, id которых начинаются с одного из префиксов."""
+        query = f"SELECT {', '.join(self.fields)} FROM {self.table_name}"
+        params: list[str] = []
+        if prefixes is not None:
+            length = len(prefixes[0])
+            query += f" WHERE lower(substr(id, 1, {length})) IN ({', '.join(['?'] * len(prefixes))})"
+            params = prefixes
+        cursor = self.sqlite_conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while rows := cursor.fetchmany(10_000):
+                for row in rows:
+                    row_id = str(row[0]).lower()
+                    if row_id in self.exclude_ids:
+                        continue
+                    yield row_id, FIELD_SEPARATOR.join(
+                        _canonical_sqlite_value(value, pg_type) for value, pg_type in zip(row, self.pg_types)
+                    )
+        finally:
+            cursor.close()
+
+    def _sqlite_digests(self, length: int, prefixes: Optional[list[str]]) -> dict[str, tuple[int, int]]:
+        digests: dict[str, list[int]] = {}
+        for row_id, canonical in self._sqlite_rows(prefixes):
+            bucket = digests.setdefault(row_id[:length], [0, 0])
+            bucket[0] += 1
+            bucket[1] += row_digest(canonical)
+        return {bucket: (count, digest) for bucket, (count, digest) in digests.items()}
+
+    # --- PostgreSQL ---
+
+    def _pg_where(self, prefixes: Optional[list[str]]) -> tuple[str, list]:
+        if prefixes is None:
+            return '', []
+        return f' WHERE left(id::text, {len(prefixes[0])}) = ANY(%s)', [prefixes]
+
+    def _pg_digests(self, length: int, prefixes: Optional[list[str]]) -> dict[str, tuple[int, int]]:
+        where, params = self._pg_where(prefixes)
+        query = f"""
+            SELECT left(id::text, {length}) AS bucket,
+                   count(*) AS rows,
+                   sum(('x' || substr(md5({self._pg_row_expression}), 1, {DIGEST_HEX_DIGITS}))::bit(60)::bigint)
+                       AS digest
+            FROM {self.schema}.{self.table_name}{where}
+            GROUP BY 1
+        """
+        with self.pg_conn.cursor(row_factory=tuple_row) as cursor:
+            cursor.execute(query, params)
+            return {bucket: (rows, int(digest)) for bucket, rows, digest in cursor.fetchall()}
+
+    def _pg_rows(self, prefixes: list[str]) -> dict[str, str]:
+        where, params = self._pg_where(prefixes)
+        query = f"SELECT id::text, {self._pg_row_expression} FROM {self.schema}.{self.table_name}{where}"
+        with self.pg_conn.cursor(row_factory=tuple_row) as cursor:
+            cursor.execute(query, params)
+            return dict(cursor.fetchall())
+
+    # --- Сверка ---
+
+    def _compare_rows(self, prefixes: list[str], report: VerificationReport) -> None:
+        """Построчное сравнение небольших диапазонов."""
+        source = dict(self._sqlite_rows(prefixes))
+        target = self._pg_rows(prefixes)
+        report.missing_ids += sorted(source.keys() - target.keys())
+        report.extra_ids += sorted(target.keys() - source.keys())
+        report.different_ids += sorted(i for i in source.keys() & target.keys() if source[i] != target[i])
+
+    def _compare_buckets(self, length: int, prefixes: Optional[list[str]], report: VerificationReport) -> None:
+        source = self._sqlite_digests(length, prefixes)
+        target = self._pg_digests(length, prefixes)
+        report.buckets_checked += len(source.keys() | target.keys())
+
+        mismatched = sorted(b for b in source.keys() | target.keys() if source.get(b) != target.get(b))
+        if not mismatched:
+            return
+        logger.info(f"Table '{self.table_name}': {len(mismatched)} mismatched buckets at prefix length {length}")
+
+        small, large = [], []
+        for bucket in mismatched:
+            size = max(source.get(bucket, (0, 0))[0], target.get(bucket, (0, 0))[0])
+            (small if size <= self.drill_down_rows or length >= MAX_PREFIX_LENGTH else large).append(bucket)
+
+        if small:
+            report.mismatched_buckets += small
+            self._compare_rows(small, report)
+        if large:
+            # Уточняем большие диапазоны следующей цифрой id
+            self._compare_buckets(length + 1, [bucket + digit for bucket in large for digit in HEX_DIGITS], report)
+
+    def verify(self) -> VerificationReport:
+        """
+        Полная сверка таблицы.
+
+        :return: Отчёт со списками отсутствующих, лишних и отличающихся id.
+        """
+        report = VerificationReport(self.table_name)
+        self._compare_buckets(self.prefix_length, None, report)
+        self._log(report)
+        return report
+
+    def quick_check(self, sample_buckets: int = 64, prefix_length: int = 3, seed: Optional[int] = None) -> VerificationReport:
+        """
+        Выборочная сверка: сравниваются только случайно выбранные диапазоны id.
+
+        :param sample_buckets: Число проверяемых диапазонов.
+        :param prefix_length: Длина префикса диапазона (3 -> 4096 диапазонов в таблице).
+        :param seed: Зерно генератора случайных чисел для воспроизводимости.
+        :return: Отчёт по проверенным диапазонам.
+        """
+        total = 16 ** prefix_length
+        chosen = random.Random(seed).sample(range(total), min(sample_buckets, total))
+        prefixes = [format(bucket, f'0{prefix_length}x') for bucket in chosen]
+
+        report = VerificationReport(self.table_name)
+        self._compare_buckets(prefix_length, prefixes, report)
+        self._log(report)
+        return report
+
+    def _log(self, report: VerificationReport) -> None:
+        if report.ok:
+            logger.info(f"Table '{self.table_name}' verified: {report.buckets_checked} buckets match")
+        else:
+            logger.error(
+                f"Table '{self.table_name}' mismatch: {len(report.missing_ids)} missing, "
+                f"{len(report.extra_ids)} extra, {len(report.different_ids)} different rows"
+            )